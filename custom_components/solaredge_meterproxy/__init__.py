@@ -11,6 +11,7 @@ from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import ConfigEntryNotReady
 
 from .const import DOMAIN
+from .coordinator import SolarEdgeMeterProxyCoordinator, energy_store
 
 PLATFORMS: list[Platform] = [Platform.SENSOR]
 
@@ -21,11 +22,20 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up SolarEdge MeterProxy from a config entry."""
     hass.data.setdefault(DOMAIN, {})
 
+    # One snapshot of the meter values per cycle, served by the Modbus
+    # server and shown by the sensors
+    coordinator = SolarEdgeMeterProxyCoordinator(hass, entry)
+    try:
+        await coordinator.async_config_entry_first_refresh()
+    except ConfigEntryNotReady:
+        await coordinator.async_shutdown()
+        raise
+
     # Try to start the Modbus proxy server
     modbus_server = None
     try:
         from .modbus_server import ModbusProxyServer
-        modbus_server = ModbusProxyServer(hass, entry, None)  # No coordinator needed
+        modbus_server = ModbusProxyServer(hass, entry, coordinator)
         await modbus_server.async_start()
         _LOGGER.info("Modbus proxy server started successfully")
     except Exception as ex:
@@ -33,6 +43,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         _LOGGER.info("Continuing without Modbus server - sensors will still work")
 
     hass.data[DOMAIN][entry.entry_id] = {
+        "coordinator": coordinator,
         "modbus_server": modbus_server,
     }
 
@@ -41,22 +52,6 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return True
 
 
-async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Unload a config entry."""
-    if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        data = hass.data[DOMAIN].pop(entry.entry_id)
-        
-        # Stop the Modbus server if it was running
-        if data.get("modbus_server"):
-            try:
-                await data["modbus_server"].async_stop()
-                _LOGGER.info("Modbus proxy server stopped")
-            except Exception as ex:
-                _LOGGER.error("Error stopping Modbus server: %s", ex)
-
-    return unload_ok
-
-
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
@@ -68,13 +63,19 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
                 await modbus_server.async_stop()
             except Exception as ex:
                 _LOGGER.warning("Error stopping Modbus server: %s", ex)
-        
+
+        await data["coordinator"].async_shutdown()
         hass.data[DOMAIN].pop(entry.entry_id)
 
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the energy counters of a deleted config entry."""
+    await energy_store(hass, entry).async_remove()
+
+
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Reload config entry."""
     await async_unload_entry(hass, entry)
-    await async_setup_entry(hass, entry)
\ No newline at end of file
+    await async_setup_entry(hass, entry)
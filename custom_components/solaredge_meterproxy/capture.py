@@ -0,0 +1,280 @@
+"""Capture and replay of the Modbus sessions served by SolarEdge MeterProxy.
+
+This module only uses the standard library, so the replay tool can use it
+without Home Assistant; replays take a connected pymodbus client.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+import math
+from pathlib import Path
+import struct
+import time
+from typing import Any
+
+# Every capture file starts with this marker and format version
+CAPTURE_MAGIC = b"SEMPCAP\x01"
+# Time, latency, unit id, function code, address, count, exception code and
+# the number of written and served registers that follow
+RECORD_HEADER = struct.Struct("<dfBBHHBHH")
+# Exception code of a request that got no response at all
+NO_RESPONSE = 0xFF
+# Rotated files kept next to the one being written
+CAPTURE_BACKUPS = 1
+
+# Function codes the replay tool can send
+REPLAY_FUNCTION_CODES = frozenset((3, 4, 6, 16))
+
+
+@dataclass(frozen=True)
+class CaptureRecord:
+    """One request of a Modbus client and what was served for it."""
+
+    timestamp: float
+    latency: float
+    unit_id: int
+    function_code: int
+    address: int
+    count: int
+    exception_code: int = 0
+    written: tuple[int, ...] = ()
+    registers: tuple[int, ...] = ()
+
+    def encode(self) -> bytes:
+        """Return the binary form of the record."""
+        return RECORD_HEADER.pack(
+            self.timestamp,
+            self.latency,
+            self.unit_id,
+            self.function_code,
+            self.address,
+            self.count,
+            self.exception_code,
+            len(self.written),
+            len(self.registers),
+        ) + struct.pack(
+            f"<{len(self.written) + len(self.registers)}H",
+            *self.written,
+            *self.registers,
+        )
+
+
+def read_capture(path: str | Path) -> Iterator[CaptureRecord]:
+    """Read the records of a capture file in order.
+
+    A record cut short (e.g. by a crash while writing) ends the file.
+    """
+    data = Path(path).read_bytes()
+    if not data.startswith(CAPTURE_MAGIC):
+        raise ValueError(f"{path} is not a capture file")
+    offset = len(CAPTURE_MAGIC)
+    while offset + RECORD_HEADER.size <= len(data):
+        *fields, written, served = RECORD_HEADER.unpack_from(data, offset)
+        offset += RECORD_HEADER.size
+        end = offset + 2 * (written + served)
+        if end > len(data):
+            return
+        registers = struct.unpack_from(f"<{written + served}H", data, offset)
+        offset = end
+        yield CaptureRecord(
+            *fields, written=registers[:written], registers=registers[written:]
+        )
+
+
+class CaptureLog:
+    """Append-only capture file that rotates at a size limit.
+
+    Records are collected in memory from the event loop; :meth:`take` hands
+    them over and :meth:`write` appends them from an executor, so the file
+    is never written from the event loop. Each file is kept below
+    ``max_bytes`` and ``backups`` rotated files are kept, which bounds the
+    disk space used. Records arriving while ``max_bytes`` of them still wait
+    to be written are dropped and counted.
+    """
+
+    def __init__(
+        self, path: str | Path, max_bytes: int, backups: int = CAPTURE_BACKUPS
+    ) -> None:
+        """Initialize the log."""
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.records = 0
+        self.dropped = 0
+        self._buffer = bytearray()
+
+    def record(self, record: CaptureRecord) -> None:
+        """Add a record to the pending data."""
+        if len(self._buffer) >= self.max_bytes:
+            self.dropped += 1
+            return
+        self._buffer += record.encode()
+        self.records += 1
+
+    def take(self) -> bytes:
+        """Return the pending data and start collecting anew."""
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+    def write(self, data: bytes) -> None:
+        """Append data to the file, rotating it first if it would grow too big.
+
+        This does blocking I/O.
+        """
+        if not data:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        size = self.path.stat().st_size if self.path.exists() else 0
+        if size > len(CAPTURE_MAGIC) and size + len(data) > self.max_bytes:
+            self._rotate()
+            size = 0
+        with self.path.open("ab") as file:
+            if not size:
+                file.write(CAPTURE_MAGIC)
+            file.write(data)
+
+    def _rotate(self) -> None:
+        """Shift the rotated files along and drop the oldest."""
+        for index in range(self.backups, 0, -1):
+            source = self._rotated(index - 1) if index > 1 else self.path
+            if source.exists():
+                source.replace(self._rotated(index))
+        if not self.backups:
+            self.path.unlink()
+
+    def _rotated(self, index: int) -> Path:
+        """Return the path of a rotated file, 1 being the most recent."""
+        return self.path.with_name(f"{self.path.name}.{index}")
+
+
+@dataclass
+class ReplayReport:
+    """Throughput, latency and differences of a replayed capture."""
+
+    requests: int = 0
+    skipped: int = 0
+    errors: int = 0
+    duration: float = 0.0
+    latencies: list[float] = field(default_factory=list)
+    # Served registers that differ from the capture, per address
+    mismatches: Counter[int] = field(default_factory=Counter)
+    exception_mismatches: int = 0
+
+    def latency_percentile(self, percentile: float) -> float | None:
+        """Return a response latency percentile in seconds (nearest rank)."""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        rank = max(math.ceil(percentile / 100 * len(ordered)), 1)
+        return ordered[rank - 1]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the report in a JSON serialisable form."""
+        return {
+            "requests": self.requests,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "duration_s": round(self.duration, 3),
+            "requests_per_second": (
+                round(self.requests / self.duration, 1) if self.duration else None
+            ),
+            "latency_p50_ms": _milliseconds(self.latency_percentile(50)),
+            "latency_p95_ms": _milliseconds(self.latency_percentile(95)),
+            "latency_p99_ms": _milliseconds(self.latency_percentile(99)),
+            "latency_max_ms": _milliseconds(max(self.latencies, default=None)),
+            "mismatched_registers": {
+                str(address): count
+                for address, count in sorted(self.mismatches.items())
+            },
+            "exception_mismatches": self.exception_mismatches,
+        }
+
+
+async def async_replay(
+    client,
+    records: Iterable[CaptureRecord],
+    speed: float | None = 1.0,
+    unit_id: int | None = None,
+) -> ReplayReport:
+    """Send the captured requests to a proxy and compare what it serves.
+
+    ``client`` is a connected pymodbus client. With ``speed`` the requests
+    keep their captured spacing, divided by the speed; with ``None`` they
+    are sent back to back. Requests that got no response or use a function
+    code the tool doesn't send are skipped.
+    """
+    report = ReplayReport()
+    first: float | None = None
+    started = time.perf_counter()
+    for record in records:
+        if (
+            record.exception_code == NO_RESPONSE
+            or record.function_code not in REPLAY_FUNCTION_CODES
+        ):
+            report.skipped += 1
+            continue
+        if first is None:
+            first = record.timestamp
+        if speed:
+            delay = (record.timestamp - first) / speed - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+        sent = time.perf_counter()
+        try:
+            response = await _async_send(client, record, unit_id)
+        except Exception:  # pylint: disable=broad-except
+            report.errors += 1
+            continue
+        report.latencies.append(time.perf_counter() - sent)
+        report.requests += 1
+        _compare(report, record, response)
+
+    report.duration = time.perf_counter() - started
+    return report
+
+
+async def _async_send(client, record: CaptureRecord, unit_id: int | None):
+    """Send the request of a record."""
+    slave = record.unit_id if unit_id is None else unit_id
+    if record.function_code == 3:
+        return await client.read_holding_registers(
+            record.address, record.count, slave=slave
+        )
+    if record.function_code == 4:
+        return await client.read_input_registers(
+            record.address, record.count, slave=slave
+        )
+    if record.function_code == 6:
+        return await client.write_register(
+            record.address, record.written[0], slave=slave
+        )
+    return await client.write_registers(
+        record.address, list(record.written), slave=slave
+    )
+
+
+def _compare(report: ReplayReport, record: CaptureRecord, response) -> None:
+    """Count the differences between a response and the captured one."""
+    if response.isError():
+        if response.exception_code != record.exception_code:
+            report.exception_mismatches += 1
+        return
+    if record.exception_code:
+        report.exception_mismatches += 1
+        return
+    served = getattr(response, "registers", None) or ()
+    for offset, value in enumerate(record.registers):
+        if offset >= len(served) or served[offset] != value:
+            report.mismatches[record.address + offset] += 1
+
+
+def _milliseconds(seconds: float | None) -> float | None:
+    """Convert seconds to rounded milliseconds."""
+    if seconds is None:
+        return None
+    return round(seconds * 1000, 3)
@@ -0,0 +1,169 @@
+"""Shared asyncio Modbus clients for upstream meters."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Sequence
+import logging
+import time
+
+from pymodbus.client import AsyncModbusTcpClient
+from pymodbus.exceptions import ModbusException
+from pymodbus.register_read_message import (
+    ReadHoldingRegistersRequest,
+    ReadInputRegistersRequest,
+)
+
+from homeassistant.core import HomeAssistant
+
+from .const import DATA_CLIENTS, DATA_CLIENTS_LOCK, DEFAULT_METER_PIPELINE_DEPTH
+from .read_planner import ReadRange
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds to wait for a response before the connection is considered broken
+REQUEST_TIMEOUT = 3.0
+
+# Reconnect backoff: the delay doubles after every failed connect
+RECONNECT_DELAY = 1.0
+RECONNECT_DELAY_MAX = 60.0
+
+
+class SharedModbusClient:
+    """Modbus TCP client shared by every meter behind one host and port.
+
+    Requests from all meters on the gateway go through one connection. Up to
+    ``pipeline_depth`` requests are in flight at the same time, matched to
+    their responses by transaction id; a depth of 1 sends one request at a
+    time, which is what most serial gateways need. A broken connection is
+    re-established on the next request, with an exponential backoff between
+    failed attempts.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        host: str,
+        port: int,
+        pipeline_depth: int = DEFAULT_METER_PIPELINE_DEPTH,
+    ) -> None:
+        """Initialize the shared client."""
+        self.hass = hass
+        self.host = host
+        self.port = port
+        self.pipeline_depth = max(pipeline_depth, 1)
+        # Reconnects are driven by the backoff below, not by pymodbus
+        self._client = AsyncModbusTcpClient(
+            host, port=port, timeout=REQUEST_TIMEOUT, reconnect_delay=0
+        )
+        self._in_flight = asyncio.Semaphore(self.pipeline_depth)
+        self._connect_lock = asyncio.Lock()
+        self._reconnect_delay = RECONNECT_DELAY
+        self._next_attempt = 0.0
+        self.users = 0
+
+    @property
+    def connected(self) -> bool:
+        """Return whether the connection is up."""
+        return self._client.connected
+
+    async def async_connect(self) -> None:
+        """Connect unless connected, honouring the reconnect backoff."""
+        if self._client.connected:
+            return
+        async with self._connect_lock:
+            if self._client.connected:
+                return
+            now = time.monotonic()
+            if now < self._next_attempt:
+                raise ConnectionError(
+                    f"Reconnecting to {self.host}:{self.port} in "
+                    f"{self._next_attempt - now:.1f}s"
+                )
+            if await self._client.connect():
+                _LOGGER.info("Connected to Modbus gateway %s:%s", self.host, self.port)
+                self._reconnect_delay = RECONNECT_DELAY
+                self._next_attempt = 0.0
+                return
+            self._next_attempt = now + self._reconnect_delay
+            _LOGGER.warning(
+                "Failed to connect to %s:%s, retrying in %.1fs",
+                self.host,
+                self.port,
+                self._reconnect_delay,
+            )
+            self._reconnect_delay = min(2 * self._reconnect_delay, RECONNECT_DELAY_MAX)
+            raise ConnectionError(f"Failed to connect to {self.host}:{self.port}")
+
+    def close(self) -> None:
+        """Close the connection."""
+        self._client.close()
+
+    async def async_read_registers(
+        self, reads: Sequence[ReadRange], slave: int, input_registers: bool = True
+    ) -> list[list[int] | None]:
+        """Run a set of register reads, ``None`` for every rejected read."""
+        await self.async_connect()
+        request_class = (
+            ReadInputRegistersRequest if input_registers else ReadHoldingRegistersRequest
+        )
+        responses = await asyncio.gather(
+            *(
+                self._async_execute(request_class(read.address, read.count, slave=slave))
+                for read in reads
+            )
+        )
+        return [
+            None if response.isError() else response.registers for response in responses
+        ]
+
+    async def _async_execute(self, request):
+        """Send a request and wait for the response with the same transaction id."""
+        client = self._client
+        async with self._in_flight:
+            if not client.connected:
+                raise ConnectionError(f"Not connected to {self.host}:{self.port}")
+            request.transaction_id = client.transaction.getNextTID()
+            response = client.build_response(request.transaction_id)
+            client.send(client.framer.buildPacket(request))
+            try:
+                return await asyncio.wait_for(response, REQUEST_TIMEOUT)
+            except asyncio.TimeoutError as ex:
+                client.transaction.getTransaction(request.transaction_id)
+                # Responses may now arrive out of step, start over
+                client.close()
+                raise ModbusException(
+                    f"No response from {self.host}:{self.port}"
+                ) from ex
+
+
+async def async_acquire_client(
+    hass: HomeAssistant,
+    host: str,
+    port: int,
+    pipeline_depth: int = DEFAULT_METER_PIPELINE_DEPTH,
+) -> SharedModbusClient:
+    """Return the shared client for a host and port, creating it if needed."""
+    lock = hass.data.setdefault(DATA_CLIENTS_LOCK, asyncio.Lock())
+    async with lock:
+        clients: dict[tuple[str, int], SharedModbusClient] = hass.data.setdefault(
+            DATA_CLIENTS, {}
+        )
+        client = clients.get((host, port))
+        if client is None:
+            client = SharedModbusClient(hass, host, port, pipeline_depth)
+            clients[(host, port)] = client
+        client.users += 1
+        return client
+
+
+async def async_release_client(hass: HomeAssistant, client: SharedModbusClient) -> None:
+    """Release a shared client, closing it when no meter uses it anymore."""
+    lock = hass.data.setdefault(DATA_CLIENTS_LOCK, asyncio.Lock())
+    async with lock:
+        client.users -= 1
+        if client.users > 0:
+            return
+        client.close()
+        clients = hass.data.get(DATA_CLIENTS, {})
+        if clients.get((client.host, client.port)) is client:
+            del clients[(client.host, client.port)]
@@ -13,7 +13,52 @@ from homeassistant.data_entry_flow import FlowResult
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers import entity_registry as er
 
-from .const import DOMAIN
+from .const import (
+    BAUDRATES,
+    CONF_BAUDRATE,
+    CONF_CAPTURE_SIZE,
+    CONF_COALESCE_WINDOW,
+    CONF_CT_CURRENT,
+    CONF_CT_INVERTED,
+    CONF_DEMAND_PERIOD,
+    CONF_DEMAND_SUBINTERVALS,
+    CONF_INFLUXDB_CACHE_TTL,
+    CONF_INFLUXDB_DATABASE,
+    CONF_INFLUXDB_FIELDS,
+    CONF_INFLUXDB_MEASUREMENT,
+    CONF_INFLUXDB_ORG,
+    CONF_INFLUXDB_TOKEN,
+    CONF_INFLUXDB_URL,
+    CONF_LOG_LEVEL,
+    CONF_MAX_AGE,
+    CONF_METER_ADDRESS,
+    CONF_METER_HOST,
+    CONF_METER_PIPELINE_DEPTH,
+    CONF_METER_PORT,
+    CONF_METER_TYPE,
+    CONF_MQTT_TOPIC,
+    CONF_OUTPUT_FILTERS,
+    CONF_P1_BAUDRATE,
+    CONF_P1_PORT,
+    CONF_PARITY,
+    CONF_PHASE_OFFSET,
+    CONF_SENSOR_DEADBAND,
+    CONF_SERIAL_NUMBER,
+    CONF_SERIAL_PORT,
+    CONF_STALE_POLICY,
+    CONF_STALE_TIMEOUT,
+    CONF_UPDATE_MODE,
+    DEFAULT_METER_TYPE,
+    DOMAIN,
+    LOG_LEVELS,
+    METER_TYPES,
+    MODBUS_METER_TYPES,
+    PARITIES,
+    PROTOCOL_TYPES,
+    STALE_POLICIES,
+    UPDATE_MODES,
+)
+from .filters import parse_filters
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -86,6 +131,10 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    def __init__(self) -> None:
+        """Initialize the config flow."""
+        self._data: dict[str, Any] = {}
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
@@ -94,11 +143,12 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         if user_input is not None:
             try:
-                title = f"SolarEdge MeterProxy (Port {user_input['server_port']})"
-                return self.async_create_entry(title=title, data=user_input)
-            except Exception:  # pylint: disable=broad-except
-                _LOGGER.exception("Unexpected exception")
-                errors["base"] = "unknown"
+                parse_filters(user_input.get(CONF_OUTPUT_FILTERS))
+            except ValueError:
+                errors[CONF_OUTPUT_FILTERS] = "invalid_output_filters"
+            else:
+                self._data = dict(user_input)
+                return await self.async_step_meter()
 
         # Get available entities for dropdowns
         power_entities = get_power_entities(self.hass)
@@ -111,7 +161,11 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         data_schema = vol.Schema({
             vol.Required("server_ip", default=default_ip): cv.string,
             vol.Required("server_port", default=5502): cv.port,
-            vol.Required("protocol", default="tcp"): vol.In(["tcp", "rtu"]),
+            vol.Required("protocol", default="tcp"): vol.In(PROTOCOL_TYPES),
+            vol.Optional(CONF_SERIAL_PORT): cv.string,
+            vol.Optional(CONF_BAUDRATE): vol.All(vol.Coerce(int), vol.In(BAUDRATES)),
+            vol.Optional(CONF_PARITY): vol.In(PARITIES),
+            vol.Optional(CONF_LOG_LEVEL): vol.In(LOG_LEVELS),
             vol.Optional("p1_power_entity"): vol.In(power_entities) if power_entities else cv.string,
             vol.Optional("p1_voltage_l1_entity"): vol.In(voltage_entities) if voltage_entities else cv.string,
             vol.Optional("p1_voltage_l2_entity"): vol.In(voltage_entities) if voltage_entities else cv.string,
@@ -122,8 +176,28 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             vol.Optional("p1_power_l1_entity"): vol.In(power_entities) if power_entities else cv.string,
             vol.Optional("p1_power_l2_entity"): vol.In(power_entities) if power_entities else cv.string,
             vol.Optional("p1_power_l3_entity"): vol.In(power_entities) if power_entities else cv.string,
-            vol.Required("meter_modbus_address", default=2): vol.Range(min=1, max=247),
-            vol.Required("refresh_rate", default=5): vol.Range(min=1, max=300),
+            vol.Optional("p1_import_energy_t1_entity"): vol.In(power_entities) if power_entities else cv.string,
+            vol.Optional("p1_import_energy_t2_entity"): vol.In(power_entities) if power_entities else cv.string,
+            vol.Optional("p1_export_energy_t1_entity"): vol.In(power_entities) if power_entities else cv.string,
+            vol.Optional("p1_export_energy_t2_entity"): vol.In(power_entities) if power_entities else cv.string,
+            vol.Optional(CONF_UPDATE_MODE): vol.In(UPDATE_MODES),
+            vol.Optional(CONF_COALESCE_WINDOW): vol.All(
+                vol.Coerce(int), vol.Range(min=0, max=5000)
+            ),
+            vol.Optional(CONF_MAX_AGE): vol.All(
+                vol.Coerce(float), vol.Range(min=0.1, max=60)
+            ),
+            vol.Optional(CONF_SENSOR_DEADBAND): vol.All(
+                vol.Coerce(float), vol.Range(min=0, max=50)
+            ),
+            vol.Optional(CONF_OUTPUT_FILTERS): cv.string,
+            vol.Optional(CONF_STALE_TIMEOUT): vol.All(
+                vol.Coerce(int), vol.Range(min=0, max=3600)
+            ),
+            vol.Optional(CONF_STALE_POLICY): vol.In(STALE_POLICIES),
+            vol.Optional(CONF_CAPTURE_SIZE): vol.All(
+                vol.Coerce(int), vol.Range(min=0, max=102400)
+            ),
         })
 
         return self.async_show_form(
@@ -134,4 +208,73 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 "local_ip": default_ip,
                 "entity_count": f"{len(power_entities)} power, {len(voltage_entities)} voltage, {len(current_entities)} current entities found"
             }
-        )
\ No newline at end of file
+        )
+
+    async def async_step_meter(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Handle the meter step: where the served values come from."""
+        errors = {}
+
+        if user_input is not None:
+            meter_type = user_input[CONF_METER_TYPE]
+            if meter_type in MODBUS_METER_TYPES and not user_input.get(CONF_METER_HOST):
+                errors[CONF_METER_HOST] = "meter_host_required"
+            else:
+                try:
+                    data = {**self._data, **user_input}
+                    title = f"SolarEdge MeterProxy (Port {data['server_port']})"
+                    return self.async_create_entry(title=title, data=data)
+                except Exception:  # pylint: disable=broad-except
+                    _LOGGER.exception("Unexpected exception")
+                    errors["base"] = "unknown"
+
+        data_schema = vol.Schema({
+            vol.Required(CONF_METER_TYPE, default=DEFAULT_METER_TYPE): vol.In(METER_TYPES),
+            vol.Optional(CONF_METER_HOST): cv.string,
+            vol.Optional(CONF_METER_PORT): cv.port,
+            vol.Optional(CONF_METER_ADDRESS): vol.All(
+                vol.Coerce(int), vol.Range(min=1, max=247)
+            ),
+            vol.Optional(CONF_METER_PIPELINE_DEPTH): vol.All(
+                vol.Coerce(int), vol.Range(min=1, max=16)
+            ),
+            vol.Optional(CONF_MQTT_TOPIC): cv.string,
+            vol.Optional(CONF_P1_PORT): cv.string,
+            vol.Optional(CONF_P1_BAUDRATE): vol.All(vol.Coerce(int), vol.In([9600, 115200])),
+            vol.Optional(CONF_INFLUXDB_URL): cv.string,
+            vol.Optional(CONF_INFLUXDB_DATABASE): cv.string,
+            vol.Optional(CONF_INFLUXDB_ORG): cv.string,
+            vol.Optional(CONF_INFLUXDB_TOKEN): cv.string,
+            vol.Optional(CONF_INFLUXDB_MEASUREMENT): cv.string,
+            vol.Optional(CONF_INFLUXDB_FIELDS): cv.string,
+            vol.Optional(CONF_INFLUXDB_CACHE_TTL): vol.All(
+                vol.Coerce(float), vol.Range(min=0, max=300)
+            ),
+            vol.Required("meter_modbus_address", default=2): vol.Range(min=1, max=247),
+            vol.Required("refresh_rate", default=5): vol.Range(min=1, max=300),
+            # Served in an int16 register
+            vol.Optional(CONF_CT_CURRENT): vol.All(
+                vol.Coerce(int), vol.Range(min=1, max=32767)
+            ),
+            vol.Optional(CONF_CT_INVERTED): vol.All(vol.Coerce(int), vol.In([0, 1])),
+            vol.Optional(CONF_PHASE_OFFSET): vol.All(
+                vol.Coerce(int), vol.Range(min=0, max=360)
+            ),
+            # Served in an int32 register
+            vol.Optional(CONF_SERIAL_NUMBER): vol.All(
+                vol.Coerce(int), vol.Range(min=1, max=2**31 - 1)
+            ),
+            vol.Optional(CONF_DEMAND_PERIOD): vol.All(
+                vol.Coerce(int), vol.Range(min=1, max=360)
+            ),
+            vol.Optional(CONF_DEMAND_SUBINTERVALS): vol.All(
+                vol.Coerce(int), vol.Range(min=1, max=10)
+            ),
+        })
+
+        return self.async_show_form(
+            step_id="meter",
+            data_schema=data_schema,
+            errors=errors,
+        )
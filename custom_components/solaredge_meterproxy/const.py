@@ -2,6 +2,12 @@
 
 DOMAIN = "solaredge_meterproxy"
 
+# hass.data keys for the Modbus listeners shared between config entries
+DATA_SERVERS = f"{DOMAIN}_servers"
+DATA_SERVERS_LOCK = f"{DOMAIN}_servers_lock"
+DATA_CLIENTS = f"{DOMAIN}_clients"
+DATA_CLIENTS_LOCK = f"{DOMAIN}_clients_lock"
+
 # Configuration constants
 CONF_SERVER_IP = "server_ip"
 CONF_SERVER_PORT = "server_port"
@@ -10,41 +16,143 @@ CONF_METER_HOST = "meter_host"
 CONF_METER_PORT = "meter_port"
 CONF_METER_ADDRESS = "meter_address"
 CONF_METER_MODBUS_ADDRESS = "meter_modbus_address"
+CONF_METER_PIPELINE_DEPTH = "meter_pipeline_depth"
+CONF_MQTT_TOPIC = "mqtt_topic"
+CONF_P1_PORT = "p1_port"
+CONF_P1_BAUDRATE = "p1_baudrate"
+CONF_INFLUXDB_URL = "influxdb_url"
+CONF_INFLUXDB_DATABASE = "influxdb_database"
+CONF_INFLUXDB_ORG = "influxdb_org"
+CONF_INFLUXDB_TOKEN = "influxdb_token"
+CONF_INFLUXDB_MEASUREMENT = "influxdb_measurement"
+CONF_INFLUXDB_FIELDS = "influxdb_fields"
+CONF_INFLUXDB_CACHE_TTL = "influxdb_cache_ttl"
 CONF_REFRESH_RATE = "refresh_rate"
 CONF_LOG_LEVEL = "log_level"
 CONF_CT_CURRENT = "ct_current"
 CONF_CT_INVERTED = "ct_inverted"
 CONF_PHASE_OFFSET = "phase_offset"
 CONF_SERIAL_NUMBER = "serial_number"
+CONF_DEMAND_PERIOD = "demand_period"
+CONF_DEMAND_SUBINTERVALS = "demand_subintervals"
 CONF_PROTOCOL = "protocol"
+CONF_UPDATE_MODE = "update_mode"
+CONF_COALESCE_WINDOW = "coalesce_window"
+CONF_MAX_AGE = "max_age"
+CONF_SENSOR_DEADBAND = "sensor_deadband"
+CONF_OUTPUT_FILTERS = "output_filters"
+CONF_STALE_TIMEOUT = "stale_timeout"
+CONF_STALE_POLICY = "stale_policy"
+CONF_CAPTURE_SIZE = "capture_size"
+CONF_SERIAL_PORT = "serial_port"
+CONF_BAUDRATE = "baudrate"
+CONF_PARITY = "parity"
+
+# P1 entity configuration
+CONF_P1_POWER_ENTITY = "p1_power_entity"
+CONF_P1_POWER_L1_ENTITY = "p1_power_l1_entity"
+CONF_P1_POWER_L2_ENTITY = "p1_power_l2_entity"
+CONF_P1_POWER_L3_ENTITY = "p1_power_l3_entity"
+CONF_P1_VOLTAGE_L1_ENTITY = "p1_voltage_l1_entity"
+CONF_P1_VOLTAGE_L2_ENTITY = "p1_voltage_l2_entity"
+CONF_P1_VOLTAGE_L3_ENTITY = "p1_voltage_l3_entity"
+CONF_P1_CURRENT_L1_ENTITY = "p1_current_l1_entity"
+CONF_P1_CURRENT_L2_ENTITY = "p1_current_l2_entity"
+CONF_P1_CURRENT_L3_ENTITY = "p1_current_l3_entity"
+CONF_P1_IMPORT_ENERGY_T1_ENTITY = "p1_import_energy_t1_entity"
+CONF_P1_IMPORT_ENERGY_T2_ENTITY = "p1_import_energy_t2_entity"
+CONF_P1_EXPORT_ENERGY_T1_ENTITY = "p1_export_energy_t1_entity"
+CONF_P1_EXPORT_ENERGY_T2_ENTITY = "p1_export_energy_t2_entity"
+
+P1_ENTITY_KEYS = [
+    CONF_P1_POWER_ENTITY,
+    CONF_P1_POWER_L1_ENTITY,
+    CONF_P1_POWER_L2_ENTITY,
+    CONF_P1_POWER_L3_ENTITY,
+    CONF_P1_VOLTAGE_L1_ENTITY,
+    CONF_P1_VOLTAGE_L2_ENTITY,
+    CONF_P1_VOLTAGE_L3_ENTITY,
+    CONF_P1_CURRENT_L1_ENTITY,
+    CONF_P1_CURRENT_L2_ENTITY,
+    CONF_P1_CURRENT_L3_ENTITY,
+    CONF_P1_IMPORT_ENERGY_T1_ENTITY,
+    CONF_P1_IMPORT_ENERGY_T2_ENTITY,
+    CONF_P1_EXPORT_ENERGY_T1_ENTITY,
+    CONF_P1_EXPORT_ENERGY_T2_ENTITY,
+]
 
 # Default values
 DEFAULT_SERVER_IP = "0.0.0.0"
 DEFAULT_SERVER_PORT = 5502
+DEFAULT_METER_TYPE = "p1"
 DEFAULT_METER_PORT = 502
 DEFAULT_METER_ADDRESS = 1
 DEFAULT_METER_MODBUS_ADDRESS = 2
+DEFAULT_METER_PIPELINE_DEPTH = 1
+DEFAULT_MQTT_TOPIC = "dsmr/telegram"
+DEFAULT_P1_PORT = "/dev/ttyUSB0"
+DEFAULT_P1_BAUDRATE = 115200
+DEFAULT_INFLUXDB_URL = "http://localhost:8086"
+DEFAULT_INFLUXDB_DATABASE = "home_assistant"
+DEFAULT_INFLUXDB_MEASUREMENT = "meter"
+DEFAULT_INFLUXDB_CACHE_TTL = 5.0  # seconds
 DEFAULT_REFRESH_RATE = 5
 DEFAULT_LOG_LEVEL = "INFO"
 DEFAULT_CT_CURRENT = 5
 DEFAULT_CT_INVERTED = 0
 DEFAULT_PHASE_OFFSET = 120
 DEFAULT_SERIAL_NUMBER = 987654
+DEFAULT_DEMAND_PERIOD = 15
+DEFAULT_DEMAND_SUBINTERVALS = 1
 DEFAULT_PROTOCOL = "tcp"
+DEFAULT_UPDATE_MODE = "push"
+DEFAULT_COALESCE_WINDOW = 0  # milliseconds
+DEFAULT_BAUDRATE = 9600
+DEFAULT_PARITY = "N"
+DEFAULT_MAX_AGE = 1.0  # seconds
+DEFAULT_SENSOR_DEADBAND = 0.5  # percent
+DEFAULT_STALE_TIMEOUT = 30  # seconds, 0 disables the check
+DEFAULT_STALE_POLICY = "no_response"
+DEFAULT_CAPTURE_SIZE = 0  # kB per capture file, 0 disables capturing
 
-# Meter types
+# Meter types, "p1" reads the configured P1 entities
+METER_TYPE_P1 = "p1"
 METER_TYPES = [
+    METER_TYPE_P1,
     "sdm120",
     "sdm230", 
     "sdm630",
     "influxdb",
     "mqtt",
     "mqttP1",
+    "dsmr",
     "generic"
 ]
 
+# Meter types read over Modbus TCP, they need a meter host
+MODBUS_METER_TYPES = ["sdm120", "sdm230", "sdm630"]
+
 # Protocol types
-PROTOCOL_TYPES = ["tcp", "rtu"]
+PROTOCOL_TCP = "tcp"
+PROTOCOL_RTU = "rtu"  # RTU on a serial port
+PROTOCOL_RTU_OVER_TCP = "rtu_over_tcp"
+PROTOCOL_TYPES = [PROTOCOL_TCP, PROTOCOL_RTU, PROTOCOL_RTU_OVER_TCP]
+
+# Serial line settings supported by the WattNode
+BAUDRATES = [1200, 2400, 4800, 9600, 19200, 38400, 57600, 76800, 115200]
+PARITIES = ["N", "E"]
+
+# Register update modes
+UPDATE_MODE_PUSH = "push"
+UPDATE_MODE_POLL = "poll"
+UPDATE_MODE_ON_DEMAND = "on_demand"
+UPDATE_MODES = [UPDATE_MODE_PUSH, UPDATE_MODE_POLL, UPDATE_MODE_ON_DEMAND]
+
+# What the inverter is served while the meter data is stale
+STALE_POLICY_HOLD = "hold"
+STALE_POLICY_MAX_IMPORT = "max_import"
+STALE_POLICY_NO_RESPONSE = "no_response"
+STALE_POLICIES = [STALE_POLICY_HOLD, STALE_POLICY_MAX_IMPORT, STALE_POLICY_NO_RESPONSE]
 
 # Log levels
 LOG_LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR"]
@@ -1,34 +1,78 @@
 """Data coordinator for SolarEdge MeterProxy."""
 from __future__ import annotations
 
-import asyncio
 import logging
+import math
+import time
 from datetime import timedelta
 from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
 from .const import (
     DOMAIN,
+    CONF_DEMAND_PERIOD,
+    CONF_DEMAND_SUBINTERVALS,
     CONF_REFRESH_RATE,
+    DEFAULT_DEMAND_PERIOD,
+    DEFAULT_DEMAND_SUBINTERVALS,
     DEFAULT_REFRESH_RATE,
 )
+from .demand import DemandCalculator
+from .energy import EnergyAccumulator
 
 _LOGGER = logging.getLogger(__name__)
 
+ENERGY_STORAGE_VERSION = 1
+# Seconds between writes of the energy counters to disk
+ENERGY_SAVE_DELAY = 60
 
-class SolarEdgeMeterProxyCoordinator(DataUpdateCoordinator):
-    """Class to manage fetching data from meter device."""
+
+def energy_store(hass: HomeAssistant, entry: ConfigEntry) -> Store[dict[str, Any]]:
+    """Return the store holding the energy counters of a config entry."""
+    return Store(hass, ENERGY_STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.energy")
+
+
+class SolarEdgeMeterProxyCoordinator(DataUpdateCoordinator[dict[str, Any]]):
+    """Class to manage fetching data from meter device.
+
+    The meter device is read once per cycle and the Modbus server and the
+    sensors all listen to the same snapshot. Devices that push their values
+    (P1 entities, DSMR telegrams) hand over every change straight away; for
+    them the refresh interval only acts as a watchdog, publishing the same
+    values again so the energy and demand move on. Such a repeat is not a
+    new reading, :attr:`last_poll` only moves for polled devices.
+
+    Every snapshot carries the energy counters integrated from the power
+    values, which are persisted so they continue after a restart, and the
+    rolling demand.
+
+    How old the values are is tracked too, so the Modbus server can tell
+    when the source stopped delivering.
+    """
 
     def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
         """Initialize the coordinator."""
         self.entry = entry
         self.meter_device = None
-        
-        refresh_rate = entry.data.get("refresh_rate", 5)
-        
+        self._unsub_device: CALLBACK_TYPE | None = None
+        self._last_read: float | None = None
+        # When a polled meter device was last read, None for pushing devices
+        self.last_poll: float | None = None
+        self._energy = EnergyAccumulator()
+        self._energy_store = energy_store(hass, entry)
+        self._energy_loaded = False
+        self._energy_save_pending = False
+        self._demand = DemandCalculator(
+            entry.data.get(CONF_DEMAND_PERIOD, DEFAULT_DEMAND_PERIOD),
+            entry.data.get(CONF_DEMAND_SUBINTERVALS, DEFAULT_DEMAND_SUBINTERVALS),
+        )
+
+        refresh_rate = entry.data.get(CONF_REFRESH_RATE, DEFAULT_REFRESH_RATE)
+
         super().__init__(
             hass,
             _LOGGER,
@@ -37,7 +81,10 @@ class SolarEdgeMeterProxyCoordinator(DataUpdateCoordinator):
         )
 
     async def _async_setup(self) -> None:
-        """Set up the meter device."""
+        """Set up the meter device and restore the energy counters."""
+        if not self._energy_loaded:
+            self._energy.restore(await self._energy_store.async_load())
+            self._energy_loaded = True
         try:
             from .meter_devices import MeterDeviceFactory
             self.meter_device = await MeterDeviceFactory.create_device(
@@ -47,12 +94,79 @@ class SolarEdgeMeterProxyCoordinator(DataUpdateCoordinator):
             _LOGGER.error("Failed to set up meter device: %s", ex)
             raise UpdateFailed(f"Failed to set up meter device: {ex}") from ex
 
+        self._unsub_device = self.meter_device.async_add_listener(
+            self._async_device_updated
+        )
+
     async def _async_update_data(self) -> dict[str, Any]:
         """Update data via library."""
         if self.meter_device is None:
             await self._async_setup()
 
         try:
-            return await self.meter_device.async_read_values()
+            values = await self.meter_device.async_read_values()
         except Exception as ex:
-            raise UpdateFailed(f"Error communicating with meter: {ex}") from ex
\ No newline at end of file
+            raise UpdateFailed(f"Error communicating with meter: {ex}") from ex
+        self._last_read = time.monotonic()
+        if self._unsub_device is None:
+            self.last_poll = self._last_read
+        return self._add_accumulated(values)
+
+    def data_age(self) -> float:
+        """Return the seconds since the meter device had new values."""
+        if self.meter_device is not None:
+            age = self.meter_device.data_age()
+            if age is not None:
+                return age
+        if self._last_read is None:
+            return math.inf
+        return time.monotonic() - self._last_read
+
+    @callback
+    def _async_device_updated(self) -> None:
+        """Hand the values pushed by the meter device to the listeners."""
+        self._last_read = time.monotonic()
+        self.async_set_updated_data(
+            self._add_accumulated(self.meter_device.meter_data)
+        )
+
+    @callback
+    def _add_accumulated(self, values: dict[str, Any]) -> dict[str, Any]:
+        """Add a sample to the energy and demand, and add those to it."""
+        data = {
+            **values,
+            **self._energy.update(values, time.monotonic()),
+            **self._demand.update(values, time.time()),
+        }
+        if not self._energy_save_pending:
+            self._energy_save_pending = True
+            self._energy_store.async_delay_save(
+                self._energy_data_to_save, ENERGY_SAVE_DELAY
+            )
+        return data
+
+    @callback
+    def _energy_data_to_save(self) -> dict[str, Any]:
+        """Return the energy counters to write to disk."""
+        self._energy_save_pending = False
+        return self._energy.as_dict()
+
+    @callback
+    def async_reset_demand(self) -> None:
+        """Reset the minimum and maximum demand and serve the result."""
+        self._demand.reset()
+        if self.data is not None:
+            self.async_set_updated_data({**self.data, **self._demand.registers()})
+
+    async def async_shutdown(self) -> None:
+        """Stop refreshing and disconnect the meter device."""
+        await super().async_shutdown()
+        if self._unsub_device:
+            self._unsub_device()
+            self._unsub_device = None
+        if self.meter_device is not None:
+            await self.meter_device.async_disconnect()
+            self.meter_device = None
+        if self._energy_loaded:
+            await self._energy_store.async_save(self._energy.as_dict())
+            self._energy_save_pending = False
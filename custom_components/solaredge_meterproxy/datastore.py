@@ -0,0 +1,87 @@
+"""Modbus datastore for the SolarEdge MeterProxy WattNode emulation."""
+from __future__ import annotations
+
+from array import array
+from collections.abc import Callable, Iterable, Sequence
+
+from pymodbus.datastore import ModbusBaseSlaveContext
+
+# Function codes that address the register image (holding and input registers)
+REGISTER_FUNCTION_CODES = frozenset((3, 4, 6, 16, 22, 23))
+
+# WattNode register pages: basic and advanced values, configuration and
+# device information. Unused registers inside a page read as zero, anything
+# outside these pages is answered with an illegal data address exception.
+WATTNODE_REGISTER_RANGES = ((1000, 1200), (1600, 1800))
+
+
+class WattNodeSlaveContext(ModbusBaseSlaveContext):
+    """Double-buffered slave context backed by one flat register array.
+
+    The whole WattNode address space is staged in a single contiguous
+    ``array('H')``. :meth:`publish` turns the staged array into the served
+    image with one reference swap, so readers never see a half-written image
+    and the read path takes no lock. A read is one bounds check against the
+    register map and one slice of the served image.
+    """
+
+    def __init__(
+        self, ranges: Iterable[tuple[int, int]] = WATTNODE_REGISTER_RANGES
+    ) -> None:
+        """Initialize the context for the given ``(start, end)`` ranges."""
+        self._ranges = tuple(sorted(ranges))
+        self._base = self._ranges[0][0]
+        self._size = self._ranges[-1][1] - self._base
+        self._staging = array("H", bytes(2 * self._size))
+        self._image: list[int] = self._staging.tolist()
+        # Called with (address, count) before a read is served, e.g. to
+        # refresh a stale image on demand
+        self.read_hook: Callable[[int, int], None] | None = None
+        # Called with (address, values) after a write is published, e.g. to
+        # act on a configuration register
+        self.write_hook: Callable[[int, Sequence[int]], None] | None = None
+
+    def in_map(self, address: int, count: int = 1) -> bool:
+        """Return whether all registers of a range are in the register map."""
+        end = address + count
+        for start, stop in self._ranges:
+            if start <= address and end <= stop:
+                return True
+        return False
+
+    def reset(self) -> None:
+        """Reset all registers to zero."""
+        self._staging = array("H", bytes(2 * self._size))
+        self.publish()
+
+    def stage(self, address: int, values: Sequence[int]) -> None:
+        """Write registers into the staging array without publishing them."""
+        if not self.in_map(address, len(values)):
+            raise ValueError(
+                f"Registers {address}-{address + len(values) - 1} are outside "
+                "the register map"
+            )
+        start = address - self._base
+        self._staging[start : start + len(values)] = array("H", values)
+
+    def publish(self) -> None:
+        """Atomically make the staged image the served one."""
+        self._image = self._staging.tolist()
+
+    def validate(self, fc_as_hex: int, address: int, count: int = 1) -> bool:
+        """Validate the request to make sure it is in range."""
+        return fc_as_hex in REGISTER_FUNCTION_CODES and self.in_map(address, count)
+
+    def getValues(self, fc_as_hex: int, address: int, count: int = 1) -> list[int]:
+        """Get ``count`` registers from the published image."""
+        if self.read_hook is not None:
+            self.read_hook(address, count)
+        start = address - self._base
+        return self._image[start : start + count]
+
+    def setValues(self, fc_as_hex: int, address: int, values: list[int]) -> None:
+        """Write registers and publish them immediately."""
+        self.stage(address, values)
+        self.publish()
+        if self.write_hook is not None:
+            self.write_hook(address, values)
@@ -0,0 +1,136 @@
+"""Rolling demand for SolarEdge MeterProxy."""
+from __future__ import annotations
+
+from collections.abc import Mapping
+
+from .energy import MAX_SAMPLE_GAP
+
+# Power value and the demand register it feeds
+DEMAND_CHANNELS = (
+    ("power_active", "demand_power_active"),
+    ("power_apparent", "demand_power_apparent"),
+    ("l1_power_active", "l1_demand_power_active"),
+    ("l2_power_active", "l2_demand_power_active"),
+    ("l3_power_active", "l3_demand_power_active"),
+)
+
+
+class DemandCalculator:
+    """Sliding window demand, updated at the end of every subinterval.
+
+    Like a WattNode, the demand period (minutes) is split into subintervals
+    aligned to the clock. Each subinterval keeps the energy and the time
+    covered per channel in a ring buffer; the window sums are kept up to date
+    by adding the closed subinterval and subtracting the one that drops out,
+    so every sample costs the same no matter how long the period is. The
+    demand is the average power over the covered part of the window, and the
+    minimum and maximum of the total demand are kept until reset.
+    """
+
+    def __init__(
+        self, period: int, subintervals: int, max_gap: float = MAX_SAMPLE_GAP
+    ) -> None:
+        """Initialize the calculator for a period in minutes."""
+        subintervals = max(1, subintervals)
+        self._subinterval = period * 60 / subintervals
+        self._size = subintervals
+        self._max_gap = max_gap
+        channels = len(DEMAND_CHANNELS)
+        self._ring_energy = [[0.0] * channels for _ in range(subintervals)]
+        self._ring_time = [0.0] * subintervals
+        self._position = 0
+        self._window_energy = [0.0] * channels
+        self._window_time = 0.0
+        self._energy = [0.0] * channels
+        self._time = 0.0
+        self._index: int | None = None
+        self._last_time: float | None = None
+        self._last_values: Mapping[str, float] = {}
+        self.demand: dict[str, float] = {
+            register: 0.0 for _, register in DEMAND_CHANNELS
+        }
+        self.minimum: float | None = None
+        self.maximum: float | None = None
+
+    def update(self, values: Mapping[str, float], now: float) -> dict[str, float]:
+        """Add a sample of power values at wall clock ``now``, return the registers."""
+        index = int(now // self._subinterval)
+        if self._index is None:
+            self._index = index
+
+        last_time = self._last_time
+        if last_time is not None and 0 < now - last_time <= self._max_gap:
+            last = self._last_values
+            averages = [
+                (last[power] + values[power]) / 2
+                if power in values and power in last
+                else 0.0
+                for power, _ in DEMAND_CHANNELS
+            ]
+            start = last_time
+            while self._index < index:
+                boundary = (self._index + 1) * self._subinterval
+                self._integrate(averages, boundary - start)
+                self._close()
+                start = boundary
+            self._integrate(averages, now - start)
+        else:
+            # Nothing to integrate, only move the window along
+            for _ in range(min(index - self._index, self._size)):
+                self._close()
+            self._index = index
+
+        self._last_time = now
+        self._last_values = values
+        return self.registers()
+
+    def _integrate(self, averages: list[float], seconds: float) -> None:
+        """Add a stretch of constant average power to the open subinterval."""
+        energy = self._energy
+        for channel, average in enumerate(averages):
+            energy[channel] += average * seconds
+        self._time += seconds
+
+    def _close(self) -> None:
+        """Move the open subinterval into the ring and update the demand."""
+        position = self._position
+        dropped = self._ring_energy[position]
+        window = self._window_energy
+        for channel, energy in enumerate(self._energy):
+            window[channel] += energy - dropped[channel]
+        self._window_time += self._time - self._ring_time[position]
+        self._ring_energy[position] = self._energy
+        self._ring_time[position] = self._time
+        self._position = (position + 1) % self._size
+        self._energy = [0.0] * len(DEMAND_CHANNELS)
+        self._time = 0.0
+        self._index += 1
+        if self._position == 0:
+            # Once per period, recompute the sums so rounding can't build up
+            window = self._window_energy = [
+                sum(energies) for energies in zip(*self._ring_energy)
+            ]
+            self._window_time = sum(self._ring_time)
+
+        if self._window_time <= 0:
+            return
+        for channel, (_, register) in enumerate(DEMAND_CHANNELS):
+            self.demand[register] = window[channel] / self._window_time
+        demand = self.demand["demand_power_active"]
+        if self.minimum is None or demand < self.minimum:
+            self.minimum = demand
+        if self.maximum is None or demand > self.maximum:
+            self.maximum = demand
+
+    def reset(self) -> None:
+        """Reset the minimum and maximum demand."""
+        self.minimum = None
+        self.maximum = None
+
+    def registers(self) -> dict[str, float]:
+        """Return the demand register values."""
+        return {
+            **self.demand,
+            "minimum_demand_power_active": self.minimum or 0.0,
+            "maximum_demand_power_active": self.maximum or 0.0,
+        }
@@ -0,0 +1,229 @@
+"""Derived electrical quantities for SolarEdge MeterProxy."""
+from __future__ import annotations
+
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+import math
+from typing import Any
+
+# Voltage assumed when no phase voltage is known
+NOMINAL_VOLTAGE = 230.0
+
+# Raw inputs, all per phase except the total power
+INPUT_POWER = "measured_power"
+INPUT_POWER_TOTAL = "measured_power_total"
+INPUT_VOLTAGE = "measured_voltage"
+INPUT_CURRENT = "measured_current"
+
+Phases = tuple[float, float, float]
+
+
+@dataclass(frozen=True)
+class Derivation:
+    """A quantity computed for all three phases at once.
+
+    ``inputs`` name raw inputs or earlier derivations, whose values are
+    passed to ``compute`` in that order. The result is a tuple that is
+    served under ``outputs``, position by position.
+    """
+
+    name: str
+    inputs: tuple[str, ...]
+    compute: Callable[..., tuple[float, ...]]
+    outputs: tuple[str, ...] = ()
+
+
+def _phase_power(total: float, power: Phases, voltage: Phases) -> Phases:
+    """Split the total over the phases when no per-phase power is known."""
+    if any(power) or not total:
+        return power
+    phases = [phase for phase, value in enumerate(voltage) if value > 0] or [0]
+    share = total / len(phases)
+    return tuple(share if phase in phases else 0.0 for phase in range(3))
+
+
+def _total_power(total: float, power: Phases) -> tuple[float]:
+    """Sum the phases when no total power is known."""
+    return (total or sum(power),)
+
+
+def _voltage_ln(voltage: Phases) -> tuple[float, ...]:
+    """Fill in missing phase voltages with the average of the known ones."""
+    known = [value for value in voltage if value > 0]
+    average = sum(known) / len(known) if known else NOMINAL_VOLTAGE
+    return (*(value if value > 0 else average for value in voltage), average)
+
+
+def _voltage_ll(phase_offset: float) -> Callable[..., tuple[float, ...]]:
+    """Return the line to line voltages for phases ``phase_offset`` apart."""
+    factor = 2 * math.cos(math.radians(phase_offset))
+
+    def compute(voltage_ln: tuple[float, ...]) -> tuple[float, ...]:
+        l1, l2, l3 = voltage_ln[:3]
+        line = tuple(
+            math.sqrt(max(a * a + b * b - factor * a * b, 0.0))
+            for a, b in ((l1, l2), (l2, l3), (l3, l1))
+        )
+        return (*line, sum(line) / 3)
+
+    return compute
+
+
+def _current(
+    current: Phases, power: Phases, voltage_ln: tuple[float, ...]
+) -> Phases:
+    """Return signed phase currents, negative while exporting.
+
+    A measured current only has a magnitude and takes the sign of the phase
+    power; a missing current is derived from the power and the voltage.
+    """
+    return tuple(
+        math.copysign(i, p) if i else (p / v if v > 0 else 0.0)
+        for i, p, v in zip(current, power, voltage_ln)
+    )
+
+
+def _power_apparent(
+    current: Phases, power: Phases, voltage_ln: tuple[float, ...]
+) -> tuple[float, ...]:
+    """Return S = V * I per phase and in total, never below the active power."""
+    phases = tuple(
+        max(v * abs(i), abs(p)) for i, p, v in zip(current, power, voltage_ln)
+    )
+    return (*phases, sum(phases))
+
+
+def _power_reactive(apparent: tuple[float, ...], power: Phases) -> tuple[float, ...]:
+    """Return Q = sqrt(S² - P²) per phase and in total."""
+    phases = tuple(
+        math.sqrt(max(s * s - p * p, 0.0)) for s, p in zip(apparent, power)
+    )
+    return (*phases, sum(phases))
+
+
+def _power_factor(
+    apparent: tuple[float, ...], power: Phases, total: tuple[float]
+) -> tuple[float, ...]:
+    """Return P / S per phase and in total, signed like the active power."""
+    return tuple(
+        p / s if s else 1.0 for s, p in zip(apparent, (*power, total[0]))
+    )
+
+
+def _phase_keys(template: str) -> tuple[str, str, str]:
+    """Return the per-phase register keys for a template like ``l{}_current``."""
+    return tuple(template.format(phase) for phase in (1, 2, 3))
+
+
+def meter_derivations(phase_offset: float = 120) -> tuple[Derivation, ...]:
+    """Return the dependency graph of the served quantities, in order."""
+    return (
+        Derivation(
+            "phase_power",
+            (INPUT_POWER_TOTAL, INPUT_POWER, INPUT_VOLTAGE),
+            _phase_power,
+            _phase_keys("l{}_power_active"),
+        ),
+        Derivation(
+            "total_power",
+            (INPUT_POWER_TOTAL, "phase_power"),
+            _total_power,
+            ("power_active",),
+        ),
+        Derivation(
+            "voltage_ln",
+            (INPUT_VOLTAGE,),
+            _voltage_ln,
+            (*_phase_keys("l{}n_voltage"), "voltage_ln"),
+        ),
+        Derivation(
+            "voltage_ll",
+            ("voltage_ln",),
+            _voltage_ll(phase_offset),
+            ("l12_voltage", "l23_voltage", "l31_voltage", "voltage_ll"),
+        ),
+        Derivation(
+            "current",
+            (INPUT_CURRENT, "phase_power", "voltage_ln"),
+            _current,
+            _phase_keys("l{}_current"),
+        ),
+        Derivation(
+            "power_apparent",
+            ("current", "phase_power", "voltage_ln"),
+            _power_apparent,
+            (*_phase_keys("l{}_power_apparent"), "power_apparent"),
+        ),
+        Derivation(
+            "power_reactive",
+            ("power_apparent", "phase_power"),
+            _power_reactive,
+            (*_phase_keys("l{}_power_reactive"), "power_reactive"),
+        ),
+        Derivation(
+            "power_factor",
+            ("power_apparent", "phase_power", "total_power"),
+            _power_factor,
+            (*_phase_keys("l{}_power_factor"), "power_factor"),
+        ),
+    )
+
+
+class DerivedQuantities:
+    """Incremental evaluation of a derivation graph.
+
+    Only derivations with an input that changed since the previous update
+    are computed again; a derivation whose result didn't change doesn't
+    invalidate the ones depending on it.
+    """
+
+    def __init__(self, derivations: tuple[Derivation, ...] | None = None) -> None:
+        """Initialize the graph, defaulting to the meter quantities."""
+        self._derivations = (
+            meter_derivations() if derivations is None else derivations
+        )
+        self._values: dict[str, Any] = {}
+        self._served: dict[str, float] = {}
+
+    def update(self, inputs: Mapping[str, Any]) -> dict[str, float]:
+        """Update the raw inputs and return all served quantities."""
+        values = self._values
+        changed = {name for name, value in inputs.items() if values.get(name) != value}
+        values.update(inputs)
+
+        for derivation in self._derivations:
+            if derivation.name in values and changed.isdisjoint(derivation.inputs):
+                continue
+            result = derivation.compute(*(values[name] for name in derivation.inputs))
+            if values.get(derivation.name) == result:
+                continue
+            values[derivation.name] = result
+            changed.add(derivation.name)
+            self._served.update(zip(derivation.outputs, result))
+
+        return dict(self._served)
+
+
+def max_import_values(values: Mapping[str, Any], ct_current: float) -> dict[str, Any]:
+    """Return ``values`` with every phase importing at the full CT rating.
+
+    The voltages, frequency, energy and demand are kept; the power,
+    current and power factor are those of a meter at full scale.
+    """
+    served = dict(values)
+    for phase in (1, 2, 3):
+        power = ct_current * (values.get(f"l{phase}n_voltage") or NOMINAL_VOLTAGE)
+        served.update(
+            {
+                f"l{phase}_power_active": power,
+                f"l{phase}_power_apparent": power,
+                f"l{phase}_power_reactive": 0.0,
+                f"l{phase}_power_factor": 1.0,
+                f"l{phase}_current": float(ct_current),
+            }
+        )
+    total = sum(served[f"l{phase}_power_active"] for phase in (1, 2, 3))
+    served.update(
+        power_active=total, power_apparent=total, power_reactive=0.0, power_factor=1.0
+    )
+    return served
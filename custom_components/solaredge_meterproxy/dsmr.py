@@ -0,0 +1,263 @@
+"""DSMR P1 telegram parsing for SolarEdge MeterProxy."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Mapping
+
+from .const import (
+    CONF_P1_CURRENT_L1_ENTITY,
+    CONF_P1_CURRENT_L2_ENTITY,
+    CONF_P1_CURRENT_L3_ENTITY,
+    CONF_P1_POWER_ENTITY,
+    CONF_P1_POWER_L1_ENTITY,
+    CONF_P1_POWER_L2_ENTITY,
+    CONF_P1_POWER_L3_ENTITY,
+    CONF_P1_VOLTAGE_L1_ENTITY,
+    CONF_P1_VOLTAGE_L2_ENTITY,
+    CONF_P1_VOLTAGE_L3_ENTITY,
+)
+from .derived import DerivedQuantities
+from .state_cache import derive_meter_data
+
+# OBIS references read from a telegram and the field they are stored as
+OBIS_FIELDS: dict[str, str] = {
+    "1-0:1.8.1": "import_energy_tariff_1",
+    "1-0:1.8.2": "import_energy_tariff_2",
+    "1-0:2.8.1": "export_energy_tariff_1",
+    "1-0:2.8.2": "export_energy_tariff_2",
+    "1-0:1.7.0": "power_delivered",
+    "1-0:2.7.0": "power_returned",
+    "1-0:21.7.0": "power_delivered_l1",
+    "1-0:41.7.0": "power_delivered_l2",
+    "1-0:61.7.0": "power_delivered_l3",
+    "1-0:22.7.0": "power_returned_l1",
+    "1-0:42.7.0": "power_returned_l2",
+    "1-0:62.7.0": "power_returned_l3",
+    "1-0:32.7.0": "voltage_l1",
+    "1-0:52.7.0": "voltage_l2",
+    "1-0:72.7.0": "voltage_l3",
+    "1-0:31.7.0": "current_l1",
+    "1-0:51.7.0": "current_l2",
+    "1-0:71.7.0": "current_l3",
+}
+DSMR_FIELDS = tuple(OBIS_FIELDS.values())
+
+# Search keys: an OBIS reference starts a line and is followed by its value
+_SEARCH_KEYS = tuple((f"\n{obis}(", field) for obis, field in OBIS_FIELDS.items())
+
+
+# A telegram that grows beyond this without an end marker is discarded
+MAX_TELEGRAM_SIZE = 4096
+
+
+def _crc16_table() -> tuple[int, ...]:
+    """Build the lookup table of CRC-16/ARC (polynomial 0x8005, reflected)."""
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+        table.append(crc)
+    return tuple(table)
+
+
+_CRC16_TABLE = _crc16_table()
+
+
+def crc16(data: bytes) -> int:
+    """Return the DSMR CRC16 of a telegram, from ``/`` up to and including ``!``."""
+    crc = 0
+    table = _CRC16_TABLE
+    for byte in data:
+        crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
+    return crc
+
+
+class TelegramFramer:
+    """Split a P1 byte stream into complete, CRC checked telegrams.
+
+    Data can be fed in chunks of any size. A telegram runs from ``/`` to the
+    line holding the ``!`` end marker; DSMR 4 and 5 put the CRC16 of the
+    telegram on that line and telegrams failing the check are dropped and
+    counted. Telegrams without a CRC (DSMR 2 and 3) are passed on as is.
+    """
+
+    def __init__(self, max_size: int = MAX_TELEGRAM_SIZE) -> None:
+        """Initialize the framer."""
+        self._buffer = bytearray()
+        self._max_size = max_size
+        self.crc_errors = 0
+
+    def feed(self, data: bytes) -> list[str]:
+        """Add received data and return the telegrams it completed."""
+        buffer = self._buffer
+        buffer += data
+        telegrams = []
+        while True:
+            start = buffer.find(b"/")
+            if start == -1:
+                buffer.clear()
+                break
+            if start:
+                del buffer[:start]
+            end = buffer.find(b"!")
+            restart = buffer.find(b"/", 1, end if end != -1 else len(buffer))
+            if restart != -1:
+                # A new telegram started before this one ended
+                del buffer[:restart]
+                continue
+            line_end = buffer.find(b"\n", end) if end != -1 else -1
+            if line_end == -1:
+                if len(buffer) > self._max_size:
+                    # No end marker in sight, resynchronise on the next start
+                    del buffer[:1]
+                    continue
+                break
+
+            checksum = buffer[end + 1 : line_end].strip()
+            if checksum:
+                try:
+                    valid = int(checksum, 16) == crc16(buffer[: end + 1])
+                except ValueError:
+                    valid = False
+                if not valid:
+                    self.crc_errors += 1
+                    del buffer[: line_end + 1]
+                    continue
+            telegrams.append(buffer[: line_end + 1].decode("ascii", "replace"))
+            del buffer[: line_end + 1]
+        return telegrams
+
+
+def split_recording(data: bytes) -> list[bytes]:
+    """Split a recorded P1 stream into its telegrams."""
+    telegrams = []
+    start = data.find(b"/")
+    while start != -1:
+        end = data.find(b"\n/", start)
+        telegrams.append(data[start : end + 1 if end != -1 else len(data)])
+        start = end + 1 if end != -1 else -1
+    return telegrams
+
+
+async def async_replay(
+    data: bytes,
+    feed: Callable[[bytes], object],
+    interval: float = 1.0,
+    speed: float | None = None,
+    chunk_size: int = 64,
+) -> int:
+    """Feed a recorded P1 stream as if it arrived from a meter.
+
+    Telegrams are sent in ``chunk_size`` chunks, ``interval`` seconds apart
+    (1 s for DSMR 5) divided by ``speed``; without a speed they are sent as
+    fast as the consumer keeps up. Returns the number of telegrams sent.
+    """
+    telegrams = split_recording(data)
+    for index, telegram in enumerate(telegrams):
+        if index and speed:
+            await asyncio.sleep(interval / speed)
+        for position in range(0, len(telegram), chunk_size):
+            feed(telegram[position : position + chunk_size])
+            await asyncio.sleep(0)
+    return len(telegrams)
+
+
+def parse_value(raw: str) -> float:
+    """Parse a COSEM value such as ``01.193*kW`` or ``(230.1*V)``."""
+    start = 1 if raw[:1] == "(" else 0
+    end = len(raw)
+    for stop in ("*", ")"):
+        position = raw.find(stop, start, end)
+        if position != -1:
+            end = position
+    return float(raw[start:end])
+
+
+class DsmrParser:
+    """Parse DSMR telegrams into a fixed set of values.
+
+    The parser only looks for the OBIS references it needs: every reference
+    is located with one ``str.find`` over the whole telegram and only its
+    value is converted, so a telegram costs one float per field and no
+    per-line splitting. Values live in one dict that is updated in place.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the parser."""
+        self.values: dict[str, float] = dict.fromkeys(DSMR_FIELDS, 0.0)
+
+    def parse_telegram(self, telegram: str) -> bool:
+        """Update the values from a full telegram, return whether any changed.
+
+        References missing from the telegram (e.g. the L2 and L3 values of a
+        single phase connection) keep their last value.
+        """
+        values = self.values
+        changed = False
+        for key, field in _SEARCH_KEYS:
+            position = telegram.find(key)
+            if position == -1:
+                continue
+            position += len(key)
+            end = telegram.find(")", position)
+            if end == -1:
+                continue
+            unit = telegram.find("*", position, end)
+            try:
+                value = float(telegram[position : unit if unit != -1 else end])
+            except ValueError:
+                continue
+            if values[field] != value:
+                values[field] = value
+                changed = True
+        return changed
+
+    def parse_object(self, obis: str, raw: str) -> bool:
+        """Update one value from a single OBIS reference, return whether it changed."""
+        field = OBIS_FIELDS.get(obis)
+        if field is None:
+            return False
+        try:
+            value = parse_value(raw.strip())
+        except ValueError:
+            return False
+        if self.values[field] == value:
+            return False
+        self.values[field] = value
+        return True
+
+
+def dsmr_meter_data(
+    values: Mapping[str, float], quantities: DerivedQuantities | None = None
+) -> dict[str, float]:
+    """Derive the served meter values from parsed DSMR values.
+
+    Power is reported in kW as separate delivered and returned values; the
+    proxy serves net watts, positive when importing.
+    """
+    meter_data = derive_meter_data(
+        {
+            CONF_P1_POWER_ENTITY: 1000
+            * (values["power_delivered"] - values["power_returned"]),
+            CONF_P1_POWER_L1_ENTITY: 1000
+            * (values["power_delivered_l1"] - values["power_returned_l1"]),
+            CONF_P1_POWER_L2_ENTITY: 1000
+            * (values["power_delivered_l2"] - values["power_returned_l2"]),
+            CONF_P1_POWER_L3_ENTITY: 1000
+            * (values["power_delivered_l3"] - values["power_returned_l3"]),
+            CONF_P1_VOLTAGE_L1_ENTITY: values["voltage_l1"],
+            CONF_P1_VOLTAGE_L2_ENTITY: values["voltage_l2"],
+            CONF_P1_VOLTAGE_L3_ENTITY: values["voltage_l3"],
+            CONF_P1_CURRENT_L1_ENTITY: values["current_l1"],
+            CONF_P1_CURRENT_L2_ENTITY: values["current_l2"],
+            CONF_P1_CURRENT_L3_ENTITY: values["current_l3"],
+        },
+        quantities,
+    )
+    imported = values["import_energy_tariff_1"] + values["import_energy_tariff_2"]
+    exported = values["export_energy_tariff_1"] + values["export_energy_tariff_2"]
+    meter_data["import_energy_active"] = imported
+    meter_data["export_energy_active"] = exported
+    meter_data["energy_active"] = imported - exported
+    return meter_data
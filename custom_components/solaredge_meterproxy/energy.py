@@ -0,0 +1,175 @@
+"""Energy counters integrated from power samples for SolarEdge MeterProxy."""
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import Any
+
+# Samples further apart than this (seconds) are not integrated across
+MAX_SAMPLE_GAP = 60.0
+
+# Watt-seconds per kWh
+_WS_PER_KWH = 3_600_000.0
+
+# Signed active power and the import, export and net counters it feeds
+ACTIVE_CHANNELS = (
+    ("power_active", "import_energy_active", "export_energy_active", "energy_active"),
+    (
+        "l1_power_active",
+        "l1_import_energy_active",
+        "l1_export_energy_active",
+        "l1_energy_active",
+    ),
+    (
+        "l2_power_active",
+        "l2_import_energy_active",
+        "l2_export_energy_active",
+        "l2_energy_active",
+    ),
+    (
+        "l3_power_active",
+        "l3_import_energy_active",
+        "l3_export_energy_active",
+        "l3_energy_active",
+    ),
+)
+
+# Reactive and apparent power and the counter of their integral
+TOTAL_CHANNELS = (
+    ("power_reactive", "energy_reactive"),
+    ("l1_power_reactive", "l1_energy_reactive"),
+    ("l2_power_reactive", "l2_energy_reactive"),
+    ("l3_power_reactive", "l3_energy_reactive"),
+    ("power_apparent", "energy_apparent"),
+    ("l1_power_apparent", "l1_energy_apparent"),
+    ("l2_power_apparent", "l2_energy_apparent"),
+    ("l3_power_apparent", "l3_energy_apparent"),
+)
+
+# Counters a meter can report itself, such as the P1 tariff totals
+METERED_COUNTERS = tuple(
+    counter
+    for _, imported, exported, _ in ACTIVE_CHANNELS
+    for counter in (imported, exported)
+)
+
+ENERGY_COUNTERS = METERED_COUNTERS + tuple(counter for _, counter in TOTAL_CHANNELS)
+
+_REPORTED_COUNTERS = tuple(net for *_, net in ACTIVE_CHANNELS) + tuple(
+    counter for _, counter in TOTAL_CHANNELS
+)
+
+
+def split_trapezoid(start: float, end: float, seconds: float) -> tuple[float, float]:
+    """Return the imported and exported Ws of a linear power ramp.
+
+    When the ramp crosses zero it is split at the crossing, so a switch from
+    import to export is attributed to both sides correctly.
+    """
+    if start >= 0 and end >= 0:
+        return (start + end) / 2 * seconds, 0.0
+    if start <= 0 and end <= 0:
+        return 0.0, -(start + end) / 2 * seconds
+    crossing = seconds * start / (start - end)
+    first = start * crossing / 2
+    second = end * (seconds - crossing) / 2
+    if start > 0:
+        return first, -second
+    return second, -first
+
+
+class EnergyAccumulator:
+    """Energy counters integrated from power, one sample at a time.
+
+    Every sample costs a fixed amount of work: the trapezoid between it and
+    the previous sample is added to the counters of each channel. Samples
+    more than ``max_gap`` seconds apart are not integrated, so an outage
+    doesn't invent energy. Counters a meter reports itself (e.g. the P1
+    tariff totals) follow the meter: the integrated energy only fills in
+    between two readings and a served counter never decreases.
+    """
+
+    def __init__(self, max_gap: float = MAX_SAMPLE_GAP) -> None:
+        """Initialize the counters at zero."""
+        self._max_gap = max_gap
+        self.counters: dict[str, float] = dict.fromkeys(ENERGY_COUNTERS, 0.0)
+        # Last meter reading of a counter and the energy integrated since
+        self._readings: dict[str, float] = {}
+        self._since: dict[str, float] = dict.fromkeys(ENERGY_COUNTERS, 0.0)
+        self._last_time: float | None = None
+        self._last_values: Mapping[str, float] = {}
+
+    def update(self, values: Mapping[str, float], now: float) -> dict[str, float]:
+        """Add a sample of power values and meter readings, return the counters."""
+        counters = self.counters
+        since = self._since
+        readings = self._readings
+
+        for counter in METERED_COUNTERS:
+            reading = values.get(counter)
+            if reading and reading > 0 and reading != readings.get(counter):
+                readings[counter] = reading
+                since[counter] = 0.0
+                counters[counter] = max(counters[counter], reading)
+
+        last = self._last_values
+        elapsed = now - self._last_time if self._last_time is not None else 0.0
+        if 0 < elapsed <= self._max_gap:
+            for power, imported, exported, _ in ACTIVE_CHANNELS:
+                if power in values and power in last:
+                    imported_ws, exported_ws = split_trapezoid(
+                        last[power], values[power], elapsed
+                    )
+                    self._add(imported, imported_ws / _WS_PER_KWH)
+                    self._add(exported, exported_ws / _WS_PER_KWH)
+            for power, counter in TOTAL_CHANNELS:
+                if power in values and power in last:
+                    average = (last[power] + values[power]) / 2
+                    counters[counter] += average * elapsed / _WS_PER_KWH
+        self._last_time = now
+        self._last_values = values
+
+        energy = dict(counters)
+        for _, imported, exported, net in ACTIVE_CHANNELS:
+            energy[net] = counters[imported] - counters[exported]
+        # Other totals a meter reports itself are served as they are
+        for counter in _REPORTED_COUNTERS:
+            reported = values.get(counter)
+            if reported:
+                energy[counter] = reported
+        return energy
+
+    def _add(self, counter: str, energy: float) -> None:
+        """Add integrated energy to a counter, keeping it monotonic."""
+        if not energy:
+            return
+        self._since[counter] += energy
+        if counter in self._readings:
+            self.counters[counter] = max(
+                self.counters[counter], self._readings[counter] + self._since[counter]
+            )
+        else:
+            self.counters[counter] += energy
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state to persist."""
+        return {
+            "counters": self.counters,
+            "readings": self._readings,
+            "since": self._since,
+        }
+
+    def restore(self, data: Mapping[str, Any] | None) -> None:
+        """Continue from a persisted state."""
+        if not data:
+            return
+        for counter, value in data.get("counters", {}).items():
+            if counter in self.counters:
+                self.counters[counter] = value
+        self._readings.update(
+            (counter, value)
+            for counter, value in data.get("readings", {}).items()
+            if counter in self.counters
+        )
+        for counter, value in data.get("since", {}).items():
+            if counter in self._since:
+                self._since[counter] = value
@@ -0,0 +1,215 @@
+"""Output filters for the values served to the inverter."""
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Mapping
+import math
+from typing import Any
+
+# Largest median window, which bounds the cost of a sample
+MAX_MEDIAN_SIZE = 9
+# Longest time (seconds) a value is extrapolated beyond its sample
+MAX_EXTRAPOLATION = 10.0
+
+
+class MedianFilter:
+    """Median of the last samples, rejecting single-sample spikes."""
+
+    def __init__(self, size: int) -> None:
+        """Initialize the filter for a window of ``size`` samples."""
+        self._window: deque[float] = deque(maxlen=size)
+
+    def update(self, value: float, now: float) -> float:
+        """Add a sample and return the median of the window."""
+        self._window.append(value)
+        ordered = sorted(self._window)
+        middle = len(ordered) // 2
+        if len(ordered) % 2:
+            return ordered[middle]
+        return (ordered[middle - 1] + ordered[middle]) / 2
+
+
+class EmaFilter:
+    """Exponential moving average with a time constant in seconds.
+
+    The weight of a sample follows from the time since the previous one, so
+    irregular P1 updates are smoothed the same way as regular ones.
+    """
+
+    def __init__(self, time_constant: float) -> None:
+        """Initialize the filter."""
+        self._time_constant = time_constant
+        self._value: float | None = None
+        self._time = 0.0
+
+    def update(self, value: float, now: float) -> float:
+        """Add a sample and return the average."""
+        if self._value is None:
+            self._value = value
+        else:
+            elapsed = max(now - self._time, 0.0)
+            alpha = 1 - math.exp(-elapsed / self._time_constant)
+            self._value += alpha * (value - self._value)
+        self._time = now
+        return self._value
+
+
+class LinearExtrapolator:
+    """Continue the trend of the last two samples for a short horizon.
+
+    P1 values arrive every few seconds; between two samples the value is
+    projected along the slope between the previous two, for at most
+    ``horizon`` seconds, instead of being held.
+    """
+
+    def __init__(self, horizon: float) -> None:
+        """Initialize the extrapolator."""
+        self._horizon = horizon
+        self._value = 0.0
+        self._time: float | None = None
+        self._slope = 0.0
+
+    def update(self, value: float, now: float) -> float:
+        """Add a sample and return it."""
+        if self._time is not None and now > self._time:
+            self._slope = (value - self._value) / (now - self._time)
+        self._value = value
+        self._time = now
+        return value
+
+    def value_at(self, now: float) -> float:
+        """Return the extrapolated value at ``now``."""
+        if self._time is None:
+            return self._value
+        elapsed = min(max(now - self._time, 0.0), self._horizon)
+        return self._value + self._slope * elapsed
+
+
+class QuantityFilter:
+    """The filter stages of one served quantity.
+
+    Stages always run in the same order, whatever order they were
+    configured in: median, then EMA, then extrapolation.
+    """
+
+    def __init__(
+        self,
+        median: int | None = None,
+        ema: float | None = None,
+        extrapolate: float | None = None,
+    ) -> None:
+        """Initialize the stages that are given."""
+        self._stages: list[MedianFilter | EmaFilter] = []
+        if median:
+            self._stages.append(MedianFilter(median))
+        if ema:
+            self._stages.append(EmaFilter(ema))
+        self._extrapolator = LinearExtrapolator(extrapolate) if extrapolate else None
+        self._value: float | None = None
+
+    @property
+    def extrapolates(self) -> bool:
+        """Return whether the served value changes between samples."""
+        return self._extrapolator is not None
+
+    def update(self, value: float, now: float) -> None:
+        """Add a sample."""
+        for stage in self._stages:
+            value = stage.update(value, now)
+        if self._extrapolator is not None:
+            self._extrapolator.update(value, now)
+        self._value = value
+
+    def value_at(self, now: float) -> float | None:
+        """Return the value to serve at ``now``, None before the first sample."""
+        if self._extrapolator is not None and self._value is not None:
+            return self._extrapolator.value_at(now)
+        return self._value
+
+
+def parse_filters(option: str | None) -> dict[str, dict[str, float]]:
+    """Parse ``key=stage:parameter+...`` entries into stage settings per key.
+
+    For example ``power_active=median:3+ema:2+extrapolate:1.5`` rejects
+    spikes over three samples, smooths with a 2 second time constant and
+    extrapolates up to 1.5 seconds.
+    """
+    settings: dict[str, dict[str, float]] = {}
+    if not option:
+        return settings
+    for entry in option.split(","):
+        key, _, stages = entry.partition("=")
+        key = key.strip()
+        if not key or not stages.strip():
+            raise ValueError(f"Invalid output filter: {entry!r}")
+        stage_settings: dict[str, float] = {}
+        for stage in stages.split("+"):
+            name, _, parameter = stage.partition(":")
+            name = name.strip()
+            try:
+                value = float(parameter)
+            except ValueError as ex:
+                raise ValueError(f"Invalid output filter stage: {stage!r}") from ex
+            if name == "median" and value in range(1, MAX_MEDIAN_SIZE + 1):
+                stage_settings[name] = int(value)
+            elif name == "ema" and value > 0:
+                stage_settings[name] = value
+            elif name == "extrapolate" and 0 < value <= MAX_EXTRAPOLATION:
+                stage_settings[name] = value
+            else:
+                raise ValueError(f"Invalid output filter stage: {stage!r}")
+        settings[key] = stage_settings
+    return settings
+
+
+class OutputFilter:
+    """Filters applied to the meter values before they are encoded.
+
+    A quantity gets a new sample when a coordinator snapshot changes its
+    value, or when the snapshot holds a new reading of a polled meter. Other
+    snapshots only repeat the value, because another value changed, the
+    watchdog refreshed or the demand was reset, and are not samples; devices
+    that push their values only hand over changes. Serving a snapshot again
+    at a later time moves extrapolated values along their trend.
+    """
+
+    def __init__(self, settings: Mapping[str, Mapping[str, float]]) -> None:
+        """Initialize a filter per configured quantity."""
+        self._filters = {
+            key: QuantityFilter(**stages) for key, stages in settings.items()
+        }
+        self._source: Mapping[str, Any] | None = None
+        self._samples: dict[str, Any] = {}
+        self._reading: float | None = None
+
+    @property
+    def extrapolates(self) -> bool:
+        """Return whether any served value changes between samples."""
+        return any(quantity.extrapolates for quantity in self._filters.values())
+
+    def apply(
+        self, values: Mapping[str, Any], now: float, reading: float | None = None
+    ) -> dict[str, Any]:
+        """Return the values to serve at ``now``.
+
+        ``reading`` is the time a polled meter was read for ``values``, a new
+        reading is a sample even for values that didn't change.
+        """
+        if values is not self._source:
+            self._source = values
+            new_reading = reading is not None and reading != self._reading
+            self._reading = reading
+            for key, quantity in self._filters.items():
+                value = values.get(key)
+                if value is None:
+                    continue
+                if new_reading or value != self._samples.get(key):
+                    self._samples[key] = value
+                    quantity.update(value, now)
+
+        served = dict(values)
+        for key, quantity in self._filters.items():
+            value = quantity.value_at(now)
+            if value is not None:
+                served[key] = value
+        return served
@@ -0,0 +1,187 @@
+"""InfluxDB queries for SolarEdge MeterProxy.
+
+All fields of a meter are fetched with a single query per poll, InfluxQL for
+InfluxDB 1.x and Flux for InfluxDB 2.x, over the HTTP API.
+"""
+from __future__ import annotations
+
+from collections.abc import Mapping, Sequence
+import csv
+from datetime import datetime
+
+# Only points written within this window count as the current value
+QUERY_WINDOW = "15m"
+
+# Served values queried when no fields are configured, stored under their
+# own name
+DEFAULT_INFLUXDB_FIELDS = (
+    "power_active",
+    "l1_power_active",
+    "l2_power_active",
+    "l3_power_active",
+    "l1n_voltage",
+    "l2n_voltage",
+    "l3n_voltage",
+    "l1_current",
+    "l2_current",
+    "l3_current",
+    "frequency",
+    "import_energy_active",
+    "export_energy_active",
+)
+
+# Served values a query result must hold one of to count as meter data
+POWER_VALUES = (
+    "power_active",
+    "l1_power_active",
+    "l2_power_active",
+    "l3_power_active",
+)
+
+
+def parse_field_map(option: str | None) -> dict[str, str]:
+    """Parse ``key=field`` pairs into a map of served value to Influx field.
+
+    A key without ``=field`` is stored in a field of the same name. Without
+    an option the default fields are used.
+    """
+    if not option:
+        return {key: key for key in DEFAULT_INFLUXDB_FIELDS}
+    field_map = {}
+    for entry in option.split(","):
+        key, _, field = entry.partition("=")
+        key = key.strip()
+        field = field.strip() or key
+        if not key:
+            raise ValueError(f"Invalid InfluxDB field mapping: {option!r}")
+        field_map[key] = field
+    return field_map
+
+
+def _quote_identifier(name: str) -> str:
+    """Quote an InfluxQL identifier."""
+    return '"' + name.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _quote_string(value: str) -> str:
+    """Quote a Flux string literal."""
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def influxql_query(
+    measurement: str, fields: Sequence[str], time_fields: Sequence[str] = ()
+) -> str:
+    """Return an InfluxQL query for the last value of every field.
+
+    With more than one selector InfluxDB returns the start of the time range
+    instead of the time of the points, so every field of ``time_fields``
+    gets a statement of its own that returns the time of its last point.
+    """
+    source = (
+        f"FROM {_quote_identifier(measurement)} "
+        f"WHERE time > now() - {QUERY_WINDOW}"
+    )
+    statements = [f"SELECT {_influxql_selectors(fields)} {source}"]
+    if len(fields) > 1:
+        statements.extend(
+            f"SELECT {_influxql_selectors([field])} {source}" for field in time_fields
+        )
+    return "; ".join(statements)
+
+
+def _influxql_selectors(fields: Sequence[str]) -> str:
+    """Return the InfluxQL selectors of the last value of fields."""
+    return ", ".join(
+        f"last({_quote_identifier(field)}) AS {_quote_identifier(field)}"
+        for field in fields
+    )
+
+
+def flux_query(bucket: str, measurement: str, fields: Sequence[str]) -> str:
+    """Return a Flux query for the last value of every field."""
+    predicate = " or ".join(f"r._field == {_quote_string(field)}" for field in fields)
+    return (
+        f"from(bucket: {_quote_string(bucket)})\n"
+        f"  |> range(start: -{QUERY_WINDOW})\n"
+        f"  |> filter(fn: (r) => r._measurement == {_quote_string(measurement)})\n"
+        f"  |> filter(fn: (r) => {predicate})\n"
+        "  |> last()\n"
+        '  |> keep(columns: ["_field", "_value", "_time"])'
+    )
+
+
+def parse_influxql_response(data: Mapping) -> dict[str, float]:
+    """Return the field values of an InfluxQL ``/query`` JSON response."""
+    if "error" in data:
+        raise ValueError(f"InfluxDB query failed: {data['error']}")
+    values: dict[str, float] = {}
+    for result in data.get("results", ()):
+        if "error" in result:
+            raise ValueError(f"InfluxDB query failed: {result['error']}")
+        for series in result.get("series", ()):
+            columns = series["columns"]
+            for row in series.get("values", ()):
+                for column, value in zip(columns, row):
+                    if column != "time" and value is not None:
+                        values[column] = float(value)
+    return values
+
+
+def parse_influxql_times(data: Mapping) -> dict[str, float]:
+    """Return the point times of the fields selected on their own.
+
+    The response must be in epoch seconds (``epoch=s``). Only statements
+    with a single selector return the time of the point.
+    """
+    times: dict[str, float] = {}
+    for result in data.get("results", ()):
+        for series in result.get("series", ()):
+            columns = series["columns"]
+            if len(columns) != 2 or columns[0] != "time":
+                continue
+            for point_time, value in series.get("values", ()):
+                if value is not None:
+                    times[columns[1]] = float(point_time)
+    return times
+
+
+def parse_flux_csv(text: str) -> dict[str, float]:
+    """Return the field values of a Flux annotated CSV response.
+
+    Every table of the response repeats its header row; annotation rows
+    (``#datatype`` etc.) and empty separator rows are skipped.
+    """
+    values: dict[str, float] = {}
+    field_column = value_column = None
+    for row in csv.reader(text.splitlines()):
+        if not row or row[0].startswith("#"):
+            continue
+        if "_field" in row and "_value" in row:
+            field_column = row.index("_field")
+            value_column = row.index("_value")
+            continue
+        if field_column is None or len(row) <= max(field_column, value_column):
+            continue
+        if row[value_column]:
+            values[row[field_column]] = float(row[value_column])
+    return values
+
+
+def parse_flux_times(text: str) -> dict[str, float]:
+    """Return the point times of a Flux annotated CSV response in epoch seconds."""
+    times: dict[str, float] = {}
+    field_column = time_column = None
+    for row in csv.reader(text.splitlines()):
+        if not row or row[0].startswith("#"):
+            continue
+        if "_field" in row and "_time" in row:
+            field_column = row.index("_field")
+            time_column = row.index("_time")
+            continue
+        if field_column is None or len(row) <= max(field_column, time_column):
+            continue
+        if row[time_column]:
+            times[row[field_column]] = datetime.fromisoformat(
+                row[time_column]
+            ).timestamp()
+    return times
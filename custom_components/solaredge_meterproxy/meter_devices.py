@@ -3,15 +3,79 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import math
+import time
 from abc import ABC, abstractmethod
+from collections.abc import Callable
+from functools import partial
 from typing import Any
 
-from homeassistant.core import HomeAssistant
+import aiohttp
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 
-from .const import DOMAIN
+from .const import (
+    CONF_INFLUXDB_CACHE_TTL,
+    CONF_INFLUXDB_DATABASE,
+    CONF_INFLUXDB_FIELDS,
+    CONF_INFLUXDB_MEASUREMENT,
+    CONF_INFLUXDB_ORG,
+    CONF_INFLUXDB_TOKEN,
+    CONF_INFLUXDB_URL,
+    CONF_METER_ADDRESS,
+    CONF_METER_HOST,
+    CONF_METER_PIPELINE_DEPTH,
+    CONF_METER_PORT,
+    CONF_METER_TYPE,
+    CONF_MQTT_TOPIC,
+    CONF_P1_BAUDRATE,
+    CONF_P1_PORT,
+    CONF_PHASE_OFFSET,
+    DEFAULT_INFLUXDB_CACHE_TTL,
+    DEFAULT_INFLUXDB_DATABASE,
+    DEFAULT_INFLUXDB_MEASUREMENT,
+    DEFAULT_INFLUXDB_URL,
+    DEFAULT_METER_ADDRESS,
+    DEFAULT_METER_PIPELINE_DEPTH,
+    DEFAULT_METER_PORT,
+    DEFAULT_METER_TYPE,
+    DEFAULT_MQTT_TOPIC,
+    DEFAULT_P1_BAUDRATE,
+    DEFAULT_P1_PORT,
+    DEFAULT_PHASE_OFFSET,
+    DOMAIN,
+    METER_TYPE_P1,
+)
+from .derived import DerivedQuantities, meter_derivations
+from .dsmr import DsmrParser, TelegramFramer, dsmr_meter_data
+from .influxdb import (
+    POWER_VALUES,
+    QUERY_WINDOW,
+    flux_query,
+    influxql_query,
+    parse_field_map,
+    parse_flux_csv,
+    parse_flux_times,
+    parse_influxql_response,
+    parse_influxql_times,
+)
+from .meter_registers import (
+    SDM120_REGISTERS,
+    SDM230_REGISTERS,
+    SDM630_REGISTERS,
+    SINGLE_PHASE_DEFAULTS,
+    THREE_PHASE_DEFAULTS,
+)
+from .read_planner import MeterRegister, ReadPlan
+from .state_cache import P1StateCache
 
 _LOGGER = logging.getLogger(__name__)
 
+# Seconds between attempts to reopen a lost P1 port
+P1_RECONNECT_DELAY = 5
+
+# Time to wait for an InfluxDB query
+INFLUXDB_TIMEOUT = aiohttp.ClientTimeout(total=10)
+
 
 class BaseMeterDevice(ABC):
     """Base class for meter devices."""
@@ -26,6 +90,21 @@ class BaseMeterDevice(ABC):
         """Read values from the meter device."""
         pass
 
+    @callback
+    def async_add_listener(
+        self, update_callback: Callable[[], None]
+    ) -> CALLBACK_TYPE | None:
+        """Call back when the device has new values, ``None`` if it is polled."""
+        return None
+
+    def data_age(self) -> float | None:
+        """Return the seconds since the device last had new values.
+
+        ``None`` means every successful read returns new values, so the
+        coordinator tracks the age itself.
+        """
+        return None
+
     @abstractmethod
     async def async_connect(self) -> None:
         """Connect to the meter device."""
@@ -77,105 +156,604 @@ class GenericMeterDevice(BaseMeterDevice):
         pass
 
 
-class SDM120MeterDevice(BaseMeterDevice):
-    """SDM120 meter device implementation."""
+class P1EntityMeterDevice(BaseMeterDevice):
+    """P1 values read from the configured Home Assistant entities.
+
+    Every state change of a P1 entity is pushed to the listeners, so the
+    served values follow the P1 integration without polling.
+    """
 
     def __init__(self, hass: HomeAssistant, config: dict[str, Any]) -> None:
-        """Initialize the SDM120 meter device."""
+        """Initialize the P1 entity meter device."""
+        super().__init__(hass, config)
+        self._state_cache = P1StateCache(hass, config)
+
+    @property
+    def meter_data(self) -> dict[str, float]:
+        """Return the meter data derived from the current P1 states."""
+        return self._state_cache.meter_data
+
+    async def async_connect(self) -> None:
+        """Read the P1 entities and follow their changes."""
+        self._state_cache.async_start()
+
+    async def async_disconnect(self) -> None:
+        """Stop following the P1 entities."""
+        self._state_cache.async_stop()
+
+    async def async_read_values(self) -> dict[str, Any]:
+        """Return the values of the current P1 states."""
+        return self._state_cache.meter_data
+
+    @callback
+    def async_add_listener(self, update_callback: Callable[[], None]) -> CALLBACK_TYPE:
+        """Call back after every P1 state change."""
+        return self._state_cache.async_add_listener(update_callback)
+
+    def data_age(self) -> float | None:
+        """Return the seconds since a P1 power entity was last written."""
+        return self._state_cache.data_age()
+
+
+class ModbusMeterDevice(BaseMeterDevice):
+    """Modbus meter read through a table of register definitions.
+
+    Subclasses only declare their registers. The registers are planned into
+    as few bulk reads as possible and every response block is decoded with
+    a single ``unpack``.
+    """
+
+    meter_name = "Modbus meter"
+    registers: tuple[MeterRegister, ...] = ()
+    # (start, end) register ranges the meter rejects reads of
+    gaps: tuple[tuple[int, int], ...] = ()
+    defaults: dict[str, float] = {}
+    input_registers = True
+
+    def __init__(self, hass: HomeAssistant, config: dict[str, Any]) -> None:
+        """Initialize the Modbus meter device."""
         super().__init__(hass, config)
         self._client = None
+        self._plan = ReadPlan(self.registers, gaps=self.gaps)
+        self._zeros = dict.fromkeys(
+            (register.name for register in self.registers), 0.0
+        )
+        self._read: float | None = None
 
     async def async_connect(self) -> None:
-        """Connect to the SDM120 meter via Modbus."""
+        """Connect to the meter via Modbus."""
         try:
             try:
-                from pymodbus.client import ModbusTcpClient
+                from .client_pool import async_acquire_client
             except ImportError:
-                _LOGGER.error("pymodbus is required for SDM120 meter support")
+                _LOGGER.error("pymodbus is required for %s support", self.meter_name)
                 raise ConnectionError("pymodbus is not installed")
-            
-            host = self.config["meter_host"]
-            port = self.config["meter_port"]
-            
-            self._client = ModbusTcpClient(host, port=port)
-            connection = await self.hass.async_add_executor_job(self._client.connect)
-            
-            if not connection:
-                raise ConnectionError(f"Failed to connect to SDM120 at {host}:{port}")
-                
-            _LOGGER.info("Connected to SDM120 meter at %s:%s", host, port)
-            
+
+            host = self.config[CONF_METER_HOST]
+            port = self.config.get(CONF_METER_PORT, DEFAULT_METER_PORT)
+
+            # Meters behind the same gateway share one connection
+            if self._client is None:
+                self._client = await async_acquire_client(
+                    self.hass,
+                    host,
+                    port,
+                    self.config.get(
+                        CONF_METER_PIPELINE_DEPTH, DEFAULT_METER_PIPELINE_DEPTH
+                    ),
+                )
+            await self._client.async_connect()
+
+            _LOGGER.info("Connected to %s at %s:%s", self.meter_name, host, port)
+
         except Exception as ex:
-            _LOGGER.error("Failed to connect to SDM120 meter: %s", ex)
+            _LOGGER.error("Failed to connect to %s: %s", self.meter_name, ex)
             raise
 
     async def async_disconnect(self) -> None:
-        """Disconnect from the SDM120 meter."""
+        """Disconnect from the meter."""
         if self._client:
-            await self.hass.async_add_executor_job(self._client.close)
+            from .client_pool import async_release_client
+
+            await async_release_client(self.hass, self._client)
+            self._client = None
 
     async def async_read_values(self) -> dict[str, Any]:
-        """Read values from the SDM120 meter."""
-        if not self._client or not self._client.connected:
+        """Read values from the meter."""
+        if not self._client:
             await self.async_connect()
 
         try:
-            meter_address = self.config["meter_address"]
-            
-            # Read basic values from SDM120 registers
-            # These are the standard SDM120 Modbus registers
-            voltage_result = await self.hass.async_add_executor_job(
-                self._client.read_input_registers, 0, 2, meter_address
-            )
-            current_result = await self.hass.async_add_executor_job(
-                self._client.read_input_registers, 6, 2, meter_address
-            )
-            power_result = await self.hass.async_add_executor_job(
-                self._client.read_input_registers, 12, 2, meter_address
+            meter_address = self.config.get(CONF_METER_ADDRESS, DEFAULT_METER_ADDRESS)
+
+            # The shared client reconnects (with backoff) when needed
+            results = await self._client.async_read_registers(
+                self._plan.reads, meter_address, self.input_registers
             )
-            energy_result = await self.hass.async_add_executor_job(
-                self._client.read_input_registers, 72, 2, meter_address
+            if any(
+                registers is None and read.count > 2
+                for registers, read in zip(results, self._plan.reads)
+            ):
+                # The meter rejected a bulk read, read value by value
+                _LOGGER.warning(
+                    "%s rejected a bulk read, falling back to one read per value",
+                    self.meter_name,
+                )
+                self._plan = ReadPlan(self.registers, max_count=2)
+                results = await self._client.async_read_registers(
+                    self._plan.reads, meter_address, self.input_registers
+                )
+            if all(registers is None for registers in results):
+                raise ValueError(f"{self.meter_name} rejected every read")
+
+            values = {**self._zeros, **self.defaults, **self._plan.decode(results)}
+            self._read = time.monotonic()
+            return self._derive_values(values)
+
+        except Exception as ex:
+            # The coordinator keeps the last good values, which age until the
+            # stale policy takes over
+            _LOGGER.error("Failed to read %s values: %s", self.meter_name, ex)
+            raise
+
+    def data_age(self) -> float | None:
+        """Return the seconds since the meter was last read successfully."""
+        if self._read is None:
+            return math.inf
+        return time.monotonic() - self._read
+
+    def _derive_values(self, values: dict[str, float]) -> dict[str, Any]:
+        """Complete the decoded values with the ones the meter doesn't provide."""
+        return values
+
+
+class SDM120MeterDevice(ModbusMeterDevice):
+    """SDM120 meter device implementation."""
+
+    meter_name = "SDM120"
+    registers = SDM120_REGISTERS
+    defaults = SINGLE_PHASE_DEFAULTS
+
+    def _derive_values(self, values: dict[str, float]) -> dict[str, Any]:
+        """Serve the single phase as the meter totals."""
+        energy = values["import_energy_active"]
+        return {
+            **values,
+            "energy_active": energy,
+            "power_active": values["l1_power_active"],
+            "voltage_ln": values["l1n_voltage"],
+            "power_factor": 0.95,  # SDM120 doesn't always provide this
+            "l1_power_factor": 0.95,
+            "l1_energy_active": energy,
+        }
+
+
+class SDM230MeterDevice(ModbusMeterDevice):
+    """SDM230 single phase meter device implementation."""
+
+    meter_name = "SDM230"
+    registers = SDM230_REGISTERS
+    defaults = SINGLE_PHASE_DEFAULTS
+
+    def _derive_values(self, values: dict[str, float]) -> dict[str, Any]:
+        """Serve the single phase as the meter totals."""
+        return {
+            **values,
+            "power_active": values["l1_power_active"],
+            "power_apparent": values["l1_power_apparent"],
+            "power_reactive": values["l1_power_reactive"],
+            "power_factor": values["l1_power_factor"],
+            "voltage_ln": values["l1n_voltage"],
+            "l1_energy_active": values["energy_active"],
+            "l1_import_energy_active": values["import_energy_active"],
+            "l1_export_energy_active": values["export_energy_active"],
+            "l1_energy_reactive": values["energy_reactive"],
+        }
+
+
+class SDM630MeterDevice(ModbusMeterDevice):
+    """SDM630 three phase meter device implementation."""
+
+    meter_name = "SDM630"
+    registers = SDM630_REGISTERS
+    defaults = THREE_PHASE_DEFAULTS
+
+
+class InfluxDbMeterDevice(BaseMeterDevice):
+    """Meter values read from InfluxDB.
+
+    All fields of the meter are fetched with one query per poll: InfluxQL
+    against InfluxDB 1.x, or Flux against InfluxDB 2.x when a token is
+    configured. The result is cached for ``influxdb_cache_ttl`` seconds and
+    reads during a running query wait for that query, so frequent register
+    refreshes don't reach the database.
+
+    The age of the values is the age of the newest power point, so a writer
+    that stopped makes the values stale even while the queries succeed.
+    """
+
+    def __init__(self, hass: HomeAssistant, config: dict[str, Any]) -> None:
+        """Initialize the InfluxDB meter device."""
+        super().__init__(hass, config)
+        self._url = config.get(CONF_INFLUXDB_URL, DEFAULT_INFLUXDB_URL).rstrip("/")
+        self._database = config.get(CONF_INFLUXDB_DATABASE, DEFAULT_INFLUXDB_DATABASE)
+        self._org = config.get(CONF_INFLUXDB_ORG)
+        self._token = config.get(CONF_INFLUXDB_TOKEN)
+        self._measurement = config.get(
+            CONF_INFLUXDB_MEASUREMENT, DEFAULT_INFLUXDB_MEASUREMENT
+        )
+        self._cache_ttl = config.get(
+            CONF_INFLUXDB_CACHE_TTL, DEFAULT_INFLUXDB_CACHE_TTL
+        )
+        # Influx field to served value
+        self._keys = {
+            field: key
+            for key, field in parse_field_map(config.get(CONF_INFLUXDB_FIELDS)).items()
+        }
+        self._power_fields = [
+            field for field, key in self._keys.items() if key in POWER_VALUES
+        ]
+        self._values: dict[str, float] | None = None
+        self._fetched = 0.0
+        self._point_time: float | None = None
+        self._pending: asyncio.Future | None = None
+        self._session = None
+        self.queries = 0
+
+    async def async_connect(self) -> None:
+        """Check the database answers the meter query."""
+        from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+        self._session = async_get_clientsession(self.hass)
+        try:
+            await self._async_refresh()
+        except Exception as ex:
+            raise ConnectionError(
+                f"Failed to query InfluxDB at {self._url}: {ex}"
+            ) from ex
+        _LOGGER.info("Reading meter values from InfluxDB at %s", self._url)
+
+    async def async_disconnect(self) -> None:
+        """Forget the cached values, the HTTP session is shared."""
+        self._values = None
+
+    async def async_read_values(self) -> dict[str, Any]:
+        """Return the cached values, querying InfluxDB when they expired."""
+        age = time.monotonic() - self._fetched
+        if self._values is not None and age < self._cache_ttl:
+            return self._values
+        if self._session is None:
+            await self.async_connect()
+            return self._values
+
+        # Concurrent reads share one query
+        if self._pending is None:
+            self._pending = self.hass.async_create_task(self._async_refresh())
+        try:
+            return await asyncio.shield(self._pending)
+        except Exception as ex:
+            if self._values is None:
+                raise
+            # The stale policy takes over once the cached values are too old
+            _LOGGER.error("Failed to read InfluxDB values: %s", ex)
+            return self._values
+
+    def data_age(self) -> float | None:
+        """Return the seconds since the newest power point was written.
+
+        Without point times this is the time since the last successful
+        query. A failed query keeps serving the cached values, which age
+        meanwhile.
+        """
+        if self._values is None:
+            return math.inf
+        if self._point_time is not None:
+            return max(time.time() - self._point_time, 0.0)
+        return time.monotonic() - self._fetched
+
+    async def _async_refresh(self) -> dict[str, float]:
+        """Run the meter query and cache the result."""
+        try:
+            fields, times = await self._async_query()
+        finally:
+            self._pending = None
+        fetched = {
+            self._keys[field]: value
+            for field, value in fields.items()
+            if field in self._keys
+        }
+        if not any(key in fetched for key in POWER_VALUES):
+            raise ValueError(
+                f"No power values in {self._measurement} within the last "
+                f"{QUERY_WINDOW}"
             )
-            frequency_result = await self.hass.async_add_executor_job(
-                self._client.read_input_registers, 70, 2, meter_address
+        values = {
+            **dict.fromkeys(self._keys.values(), 0.0),
+            **THREE_PHASE_DEFAULTS,
+            **fetched,
+        }
+        # Totals the database doesn't hold follow from the other values
+        if "power_active" not in fetched:
+            values["power_active"] = sum(
+                values.get(f"l{phase}_power_active", 0.0) for phase in (1, 2, 3)
             )
-            
-            # Convert register values to float (SDM120 uses 32-bit floats)
-            voltage = self._registers_to_float(voltage_result.registers) if not voltage_result.isError() else 230.0
-            current = self._registers_to_float(current_result.registers) if not current_result.isError() else 0.0
-            power = self._registers_to_float(power_result.registers) if not power_result.isError() else 0.0
-            energy = self._registers_to_float(energy_result.registers) if not energy_result.isError() else 0.0
-            frequency = self._registers_to_float(frequency_result.registers) if not frequency_result.isError() else 50.0
-            
-            return {
-                "energy_active": energy,
-                "import_energy_active": energy,
-                "power_active": power,
-                "l1_power_active": power,
-                "voltage_ln": voltage,
-                "l1n_voltage": voltage,
-                "frequency": frequency,
-                "l1_current": current,
-                "power_factor": 0.95,  # SDM120 doesn't always provide this
-                "l1_power_factor": 0.95,
-                "l1_energy_active": energy,
-            }
-            
+        if "energy_active" not in fetched:
+            values["energy_active"] = values.get(
+                "import_energy_active", 0.0
+            ) - values.get("export_energy_active", 0.0)
+        self._values = values
+        self._fetched = time.monotonic()
+        self._point_time = max(
+            (times[field] for field in self._power_fields if field in times),
+            default=None,
+        )
+        return values
+
+    async def _async_query(self) -> tuple[dict[str, float], dict[str, float]]:
+        """Fetch the last value of every field with a single query.
+
+        Returns the values and the point times of the fields.
+        """
+        self.queries += 1
+        fields = list(self._keys)
+        if self._token:
+            async with self._session.post(
+                f"{self._url}/api/v2/query",
+                params={"org": self._org} if self._org else None,
+                data=flux_query(self._database, self._measurement, fields),
+                headers={
+                    "Authorization": f"Token {self._token}",
+                    "Content-Type": "application/vnd.flux",
+                    "Accept": "application/csv",
+                },
+                timeout=INFLUXDB_TIMEOUT,
+            ) as response:
+                response.raise_for_status()
+                text = await response.text()
+                return parse_flux_csv(text), parse_flux_times(text)
+
+        async with self._session.get(
+            f"{self._url}/query",
+            params={
+                "db": self._database,
+                "q": influxql_query(self._measurement, fields, self._power_fields),
+                "epoch": "s",
+            },
+            timeout=INFLUXDB_TIMEOUT,
+        ) as response:
+            response.raise_for_status()
+            data = await response.json()
+            return parse_influxql_response(data), parse_influxql_times(data)
+
+
+class DsmrMeterDevice(BaseMeterDevice):
+    """Meter device fed with DSMR P1 telegrams.
+
+    Telegrams are pushed to the device instead of polled: every telegram
+    that changes a value updates :attr:`meter_data` and calls the listeners,
+    so the Modbus server can patch its registers without going through Home
+    Assistant entities.
+    """
+
+    def __init__(self, hass: HomeAssistant, config: dict[str, Any]) -> None:
+        """Initialize the DSMR meter device."""
+        super().__init__(hass, config)
+        self._parser = DsmrParser()
+        self._quantities = DerivedQuantities(
+            meter_derivations(config.get(CONF_PHASE_OFFSET, DEFAULT_PHASE_OFFSET))
+        )
+        self._meter_data: dict[str, float] | None = None
+        self._listeners: list[Callable[[], None]] = []
+        self._received: float | None = None
+        self.telegrams = 0
+
+    @property
+    def meter_data(self) -> dict[str, float]:
+        """Return the meter data derived from the last telegram."""
+        if self._meter_data is None:
+            self._meter_data = dsmr_meter_data(self._parser.values, self._quantities)
+        return self._meter_data
+
+    async def async_read_values(self) -> dict[str, Any]:
+        """Return the values of the last telegram."""
+        return self.meter_data
+
+    @callback
+    def async_add_listener(self, update_callback: Callable[[], None]) -> CALLBACK_TYPE:
+        """Call back after every telegram that changed a value."""
+        self._listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            if update_callback in self._listeners:
+                self._listeners.remove(update_callback)
+
+        return remove_listener
+
+    def data_age(self) -> float | None:
+        """Return the seconds since the last telegram, changed or not."""
+        if self._received is None:
+            return math.inf
+        return time.monotonic() - self._received
+
+    @callback
+    def async_handle_telegram(self, telegram: str) -> None:
+        """Apply a full telegram."""
+        self.telegrams += 1
+        self._received = time.monotonic()
+        if self._parser.parse_telegram(telegram):
+            self._async_changed()
+
+    @callback
+    def async_handle_object(self, obis: str, value: str) -> None:
+        """Apply a single OBIS reference."""
+        self._received = time.monotonic()
+        if self._parser.parse_object(obis, value):
+            self._async_changed()
+
+    @callback
+    def _async_changed(self) -> None:
+        """Invalidate the derived values and notify the listeners."""
+        self._meter_data = None
+        for update_callback in list(self._listeners):
+            update_callback()
+
+
+class MqttP1MeterDevice(DsmrMeterDevice):
+    """DSMR P1 data received over MQTT.
+
+    The topic either carries raw telegrams, or ends in a wildcard
+    (``dsmr/#``) with one OBIS reference per topic (``dsmr/1-0:1.7.0``).
+    """
+
+    def __init__(self, hass: HomeAssistant, config: dict[str, Any]) -> None:
+        """Initialize the MQTT P1 meter device."""
+        super().__init__(hass, config)
+        self._topic = config.get(CONF_MQTT_TOPIC, DEFAULT_MQTT_TOPIC)
+        self._unsubscribe: CALLBACK_TYPE | None = None
+
+    async def async_connect(self) -> None:
+        """Subscribe to the P1 topic."""
+        try:
+            from homeassistant.components import mqtt
+        except ImportError:
+            raise ConnectionError("The MQTT integration is not available")
+
+        per_object = self._topic.endswith(("#", "+"))
+        self._unsubscribe = await mqtt.async_subscribe(
+            self.hass,
+            self._topic,
+            self._async_object_received if per_object else self._async_telegram_received,
+        )
+        _LOGGER.info("Subscribed to P1 data on MQTT topic %s", self._topic)
+
+    async def async_disconnect(self) -> None:
+        """Unsubscribe from the P1 topic."""
+        if self._unsubscribe:
+            self._unsubscribe()
+            self._unsubscribe = None
+
+    @callback
+    def _async_telegram_received(self, message) -> None:
+        """Handle a raw telegram."""
+        self.async_handle_telegram(message.payload)
+
+    @callback
+    def _async_object_received(self, message) -> None:
+        """Handle a single OBIS reference, named by the last topic level."""
+        self.async_handle_object(message.topic.rpartition("/")[2], message.payload)
+
+
+class DsmrP1MeterDevice(DsmrMeterDevice):
+    """DSMR P1 port read directly, from a serial port or over TCP.
+
+    ``p1_port`` is a serial device (``/dev/ttyUSB0``) or a ser2net style
+    ``socket://host:port`` address. Every telegram that passes its CRC check
+    updates the registers, once per second on DSMR 5 meters. A lost
+    connection is reopened in the background.
+    """
+
+    def __init__(self, hass: HomeAssistant, config: dict[str, Any]) -> None:
+        """Initialize the P1 port reader."""
+        super().__init__(hass, config)
+        self._port = config.get(CONF_P1_PORT, DEFAULT_P1_PORT)
+        self._baudrate = config.get(CONF_P1_BAUDRATE, DEFAULT_P1_BAUDRATE)
+        self._framer = TelegramFramer()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def crc_errors(self) -> int:
+        """Return the number of telegrams dropped on a CRC mismatch."""
+        return self._framer.crc_errors
+
+    async def async_connect(self) -> None:
+        """Open the P1 port and start reading telegrams."""
+        try:
+            stream = await self._async_open()
         except Exception as ex:
-            _LOGGER.error("Failed to read SDM120 values: %s", ex)
-            # Return default values on error
-            return await GenericMeterDevice(self.hass, self.config).async_read_values()
-
-    def _registers_to_float(self, registers: list[int]) -> float:
-        """Convert two Modbus registers to a 32-bit float."""
-        if len(registers) != 2:
-            return 0.0
-        
-        import struct
-        # Combine two 16-bit registers into one 32-bit value
-        combined = (registers[0] << 16) | registers[1]
-        # Convert to float using IEEE 754 format
-        return struct.unpack('>f', struct.pack('>I', combined))[0]
+            raise ConnectionError(f"Failed to open P1 port {self._port}: {ex}") from ex
+        _LOGGER.info("Reading DSMR telegrams from %s", self._port)
+        self._task = self.hass.async_create_background_task(
+            self._async_run(stream), f"{DOMAIN} P1 reader {self._port}"
+        )
+
+    async def async_disconnect(self) -> None:
+        """Stop reading and close the P1 port."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @callback
+    def async_feed(self, data: bytes) -> None:
+        """Frame received P1 data and apply every complete telegram."""
+        for telegram in self._framer.feed(data):
+            self.async_handle_telegram(telegram)
+
+    async def _async_run(self, stream) -> None:
+        """Read the P1 port, reopening it when the connection is lost."""
+        while True:
+            reader, close = stream
+            try:
+                while data := await reader.read(1024):
+                    self.async_feed(data)
+                _LOGGER.warning("P1 port %s closed", self._port)
+            except Exception as ex:
+                _LOGGER.warning("Error reading P1 port %s: %s", self._port, ex)
+            finally:
+                close()
+
+            while True:
+                await asyncio.sleep(P1_RECONNECT_DELAY)
+                try:
+                    stream = await self._async_open()
+                    break
+                except Exception as ex:
+                    _LOGGER.debug("Failed to reopen P1 port %s: %s", self._port, ex)
+
+    async def _async_open(self) -> tuple[asyncio.StreamReader, Callable[[], None]]:
+        """Open the P1 port, return a stream reader and a close function."""
+        if self._port.startswith("socket://"):
+            host, _, port = self._port[len("socket://") :].rpartition(":")
+            reader, writer = await asyncio.open_connection(host, int(port))
+            return reader, writer.close
+
+        import serial
+
+        # DSMR 4 and 5 use 115200 8N1, DSMR 2 and 3 use 9600 7E1
+        legacy = self._baudrate < 115200
+        port = await self.hass.async_add_executor_job(
+            partial(
+                serial.Serial,
+                self._port,
+                baudrate=self._baudrate,
+                bytesize=serial.SEVENBITS if legacy else serial.EIGHTBITS,
+                parity=serial.PARITY_EVEN if legacy else serial.PARITY_NONE,
+                timeout=0,
+            )
+        )
+        reader = asyncio.StreamReader()
+        loop = self.hass.loop
+        fileno = port.fileno()
+
+        def _readable() -> None:
+            try:
+                data = port.read(port.in_waiting or 1)
+            except serial.SerialException as ex:
+                loop.remove_reader(fileno)
+                reader.set_exception(ex)
+                return
+            reader.feed_data(data)
+
+        def _close() -> None:
+            loop.remove_reader(fileno)
+            port.close()
+
+        loop.add_reader(fileno, _readable)
+        return reader, _close
 
 
 class MeterDeviceFactory:
@@ -184,10 +762,22 @@ class MeterDeviceFactory:
     @staticmethod
     async def create_device(hass: HomeAssistant, config: dict[str, Any]) -> BaseMeterDevice:
         """Create a meter device based on configuration."""
-        meter_type = config.get("meter_type", "generic")
+        meter_type = config.get(CONF_METER_TYPE, DEFAULT_METER_TYPE)
         
-        if meter_type == "sdm120":
+        if meter_type == METER_TYPE_P1:
+            device = P1EntityMeterDevice(hass, config)
+        elif meter_type == "sdm120":
             device = SDM120MeterDevice(hass, config)
+        elif meter_type == "sdm230":
+            device = SDM230MeterDevice(hass, config)
+        elif meter_type == "sdm630":
+            device = SDM630MeterDevice(hass, config)
+        elif meter_type == "influxdb":
+            device = InfluxDbMeterDevice(hass, config)
+        elif meter_type == "mqttP1":
+            device = MqttP1MeterDevice(hass, config)
+        elif meter_type == "dsmr":
+            device = DsmrP1MeterDevice(hass, config)
         elif meter_type == "generic":
             device = GenericMeterDevice(hass, config)
         else:
@@ -0,0 +1,99 @@
+"""Register tables of the supported upstream Modbus meters.
+
+Every register is named after the WattNode value it is served as, so a
+decoded poll is already in the shape the proxy serves. Eastron SDM meters
+expose their measurements as float32 input registers.
+"""
+from __future__ import annotations
+
+from .read_planner import MeterRegister
+
+# SDM120 (single phase): one read of registers 0-73
+SDM120_REGISTERS = (
+    MeterRegister("l1n_voltage", 0),
+    MeterRegister("l1_current", 6),
+    MeterRegister("l1_power_active", 12),
+    MeterRegister("frequency", 70),
+    MeterRegister("import_energy_active", 72),
+)
+
+# SDM230 (single phase): reads of registers 0-87 and 342-345
+SDM230_REGISTERS = (
+    MeterRegister("l1n_voltage", 0),
+    MeterRegister("l1_current", 6),
+    MeterRegister("l1_power_active", 12),
+    MeterRegister("l1_power_apparent", 18),
+    MeterRegister("l1_power_reactive", 24),
+    MeterRegister("l1_power_factor", 30),
+    MeterRegister("frequency", 70),
+    MeterRegister("import_energy_active", 72),
+    MeterRegister("export_energy_active", 74),
+    MeterRegister("demand_power_active", 84),
+    MeterRegister("maximum_demand_power_active", 86),
+    MeterRegister("energy_active", 342),
+    MeterRegister("energy_reactive", 344),
+)
+
+# SDM630 (three phase): reads of registers 0-87, 200-207 and 342-363
+SDM630_REGISTERS = (
+    MeterRegister("l1n_voltage", 0),
+    MeterRegister("l2n_voltage", 2),
+    MeterRegister("l3n_voltage", 4),
+    MeterRegister("l1_current", 6),
+    MeterRegister("l2_current", 8),
+    MeterRegister("l3_current", 10),
+    MeterRegister("l1_power_active", 12),
+    MeterRegister("l2_power_active", 14),
+    MeterRegister("l3_power_active", 16),
+    MeterRegister("l1_power_apparent", 18),
+    MeterRegister("l2_power_apparent", 20),
+    MeterRegister("l3_power_apparent", 22),
+    MeterRegister("l1_power_reactive", 24),
+    MeterRegister("l2_power_reactive", 26),
+    MeterRegister("l3_power_reactive", 28),
+    MeterRegister("l1_power_factor", 30),
+    MeterRegister("l2_power_factor", 32),
+    MeterRegister("l3_power_factor", 34),
+    MeterRegister("voltage_ln", 42),  # average line to neutral voltage
+    MeterRegister("power_active", 52),
+    MeterRegister("power_apparent", 56),
+    MeterRegister("power_reactive", 60),
+    MeterRegister("power_factor", 62),
+    MeterRegister("frequency", 70),
+    MeterRegister("import_energy_active", 72),
+    MeterRegister("export_energy_active", 74),
+    MeterRegister("demand_power_active", 84),
+    MeterRegister("maximum_demand_power_active", 86),
+    MeterRegister("l12_voltage", 200),
+    MeterRegister("l23_voltage", 202),
+    MeterRegister("l31_voltage", 204),
+    MeterRegister("voltage_ll", 206),  # average line to line voltage
+    MeterRegister("energy_active", 342),
+    MeterRegister("energy_reactive", 344),
+    MeterRegister("l1_import_energy_active", 346),
+    MeterRegister("l2_import_energy_active", 348),
+    MeterRegister("l3_import_energy_active", 350),
+    MeterRegister("l1_export_energy_active", 352),
+    MeterRegister("l2_export_energy_active", 354),
+    MeterRegister("l3_export_energy_active", 356),
+    MeterRegister("l1_energy_active", 358),
+    MeterRegister("l2_energy_active", 360),
+    MeterRegister("l3_energy_active", 362),
+)
+
+# Values served when the read of a register fails
+SINGLE_PHASE_DEFAULTS = {
+    "l1n_voltage": 230.0,
+    "frequency": 50.0,
+}
+THREE_PHASE_DEFAULTS = {
+    "l1n_voltage": 230.0,
+    "l2n_voltage": 230.0,
+    "l3n_voltage": 230.0,
+    "voltage_ln": 230.0,
+    "l12_voltage": 400.0,
+    "l23_voltage": 400.0,
+    "l31_voltage": 400.0,
+    "voltage_ll": 400.0,
+    "frequency": 50.0,
+}
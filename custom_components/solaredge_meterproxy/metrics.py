@@ -0,0 +1,157 @@
+"""Runtime metrics for the SolarEdge MeterProxy Modbus server."""
+from __future__ import annotations
+
+from collections import Counter, deque
+import math
+import time
+from typing import Any
+
+# Requests per second are averaged over this sliding window
+RATE_WINDOW = 60.0
+
+# Number of recent response latencies kept for the percentiles
+LATENCY_SAMPLES = 1024
+
+
+def address_range(address: int) -> str:
+    """Return the 100-register WattNode page an address falls in."""
+    start = address - address % 100
+    return f"{start}-{start + 99}"
+
+
+class ProxyMetrics:
+    """Request, latency and freshness metrics for one virtual meter."""
+
+    def __init__(self) -> None:
+        """Initialize the metrics."""
+        self.requests: Counter[tuple[int, str]] = Counter()
+        self.exceptions: Counter[str] = Counter()
+        self.update_errors = 0
+        self.update_count = 0
+        self.last_update_duration: float | None = None
+        self.stale = False
+        self.stale_transitions = 0
+        self.fresh_transitions = 0
+        self.silenced_requests = 0
+        self._snapshot_time: float | None = None
+        self._source_time: float | None = None
+        self._recent: deque[tuple[float, tuple[int, str]]] = deque()
+        self._latencies: deque[float] = deque(maxlen=LATENCY_SAMPLES)
+
+    def record_request(
+        self, function_code: int, address: int | None, latency: float
+    ) -> None:
+        """Record a served request and its response latency in seconds."""
+        key = (
+            function_code,
+            address_range(address) if address is not None else "n/a",
+        )
+        now = time.monotonic()
+        self.requests[key] += 1
+        self._recent.append((now, key))
+        self._latencies.append(latency)
+        self._expire(now)
+
+    def record_exception(self, name: str) -> None:
+        """Record a Modbus exception response."""
+        self.exceptions[name] += 1
+
+    def record_update(self, duration: float) -> None:
+        """Record a published register update and how long it took."""
+        self.update_count += 1
+        self.last_update_duration = duration
+        self._snapshot_time = time.monotonic()
+
+    def record_update_error(self) -> None:
+        """Record a failed register update."""
+        self.update_errors += 1
+
+    def record_freshness(self, age: float, stale: bool) -> None:
+        """Record the age of the meter data and whether it counts as stale."""
+        self._source_time = time.monotonic() - age if math.isfinite(age) else None
+        if stale != self.stale:
+            self.stale = stale
+            if stale:
+                self.stale_transitions += 1
+            else:
+                self.fresh_transitions += 1
+
+    def record_silenced(self) -> None:
+        """Record a request left unanswered by the stale data policy."""
+        self.silenced_requests += 1
+
+    @property
+    def source_age(self) -> float | None:
+        """Return the age of the meter data in seconds, None if it has none."""
+        if self._source_time is None:
+            return None
+        return time.monotonic() - self._source_time
+
+    @property
+    def snapshot_age(self) -> float | None:
+        """Return the age of the served register image in seconds."""
+        if self._snapshot_time is None:
+            return None
+        return time.monotonic() - self._snapshot_time
+
+    @property
+    def exception_count(self) -> int:
+        """Return the total number of exception responses."""
+        return sum(self.exceptions.values())
+
+    def request_rates(self) -> dict[tuple[int, str], float]:
+        """Return requests/sec per function code and address range."""
+        self._expire(time.monotonic())
+        counts = Counter(key for _, key in self._recent)
+        return {key: count / RATE_WINDOW for key, count in counts.items()}
+
+    def request_rate(self) -> float:
+        """Return the total requests/sec over the rate window."""
+        self._expire(time.monotonic())
+        return len(self._recent) / RATE_WINDOW
+
+    def latency_percentile(self, percentile: float) -> float | None:
+        """Return a response latency percentile in seconds (nearest rank)."""
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        rank = max(math.ceil(percentile / 100 * len(ordered)), 1)
+        return ordered[rank - 1]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return all metrics in a JSON serialisable form."""
+        return {
+            "requests_total": {
+                f"fc{function_code} {addresses}": count
+                for (function_code, addresses), count in self.requests.items()
+            },
+            "requests_per_second": {
+                f"fc{function_code} {addresses}": round(rate, 3)
+                for (function_code, addresses), rate in self.request_rates().items()
+            },
+            "latency_p50_ms": _milliseconds(self.latency_percentile(50)),
+            "latency_p99_ms": _milliseconds(self.latency_percentile(99)),
+            "exceptions": dict(self.exceptions),
+            "snapshot_age_s": self.snapshot_age,
+            "source_age_s": self.source_age,
+            "stale": self.stale,
+            "stale_transitions": self.stale_transitions,
+            "fresh_transitions": self.fresh_transitions,
+            "silenced_requests": self.silenced_requests,
+            "update_count": self.update_count,
+            "update_errors": self.update_errors,
+            "last_update_duration_ms": _milliseconds(self.last_update_duration),
+        }
+
+    def _expire(self, now: float) -> None:
+        """Drop requests that fell out of the rate window."""
+        recent = self._recent
+        while recent and now - recent[0][0] > RATE_WINDOW:
+            recent.popleft()
+
+
+def _milliseconds(seconds: float | None) -> float | None:
+    """Convert seconds to rounded milliseconds."""
+    if seconds is None:
+        return None
+    return round(seconds * 1000, 3)
@@ -2,21 +2,28 @@
 from __future__ import annotations
 
 import asyncio
+from collections.abc import Mapping
+from datetime import timedelta
+from functools import partial
 import logging
-import threading
+import time
 from typing import Any
 
-from pymodbus.constants import Endian
-from pymodbus.datastore import ModbusSlaveContext, ModbusServerContext
+from pymodbus.datastore import ModbusServerContext
 from pymodbus.device import ModbusDeviceIdentification
-from pymodbus.payload import BinaryPayloadBuilder
-from pymodbus.server import StartTcpServer
+from pymodbus.pdu import ModbusExceptions
+from pymodbus.server import ModbusSerialServer, ModbusTcpServer
+from pymodbus.server.async_io import ModbusBaseServer, ModbusServerRequestHandler
 from pymodbus.transaction import ModbusRtuFramer, ModbusSocketFramer
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
 
 from .const import (
+    DATA_SERVERS,
+    DATA_SERVERS_LOCK,
+    DOMAIN,
     CONF_SERVER_IP,
     CONF_SERVER_PORT,
     CONF_METER_MODBUS_ADDRESS,
@@ -25,6 +32,18 @@ from .const import (
     CONF_CT_INVERTED,
     CONF_PHASE_OFFSET,
     CONF_SERIAL_NUMBER,
+    CONF_DEMAND_PERIOD,
+    CONF_DEMAND_SUBINTERVALS,
+    CONF_UPDATE_MODE,
+    CONF_COALESCE_WINDOW,
+    CONF_MAX_AGE,
+    CONF_OUTPUT_FILTERS,
+    CONF_STALE_TIMEOUT,
+    CONF_STALE_POLICY,
+    CONF_CAPTURE_SIZE,
+    CONF_SERIAL_PORT,
+    CONF_BAUDRATE,
+    CONF_PARITY,
     DEFAULT_SERVER_IP,
     DEFAULT_SERVER_PORT,
     DEFAULT_METER_MODBUS_ADDRESS,
@@ -33,97 +52,561 @@ from .const import (
     DEFAULT_CT_INVERTED,
     DEFAULT_PHASE_OFFSET,
     DEFAULT_SERIAL_NUMBER,
+    DEFAULT_DEMAND_PERIOD,
+    DEFAULT_DEMAND_SUBINTERVALS,
+    DEFAULT_UPDATE_MODE,
+    DEFAULT_COALESCE_WINDOW,
+    DEFAULT_MAX_AGE,
+    DEFAULT_STALE_TIMEOUT,
+    DEFAULT_STALE_POLICY,
+    DEFAULT_CAPTURE_SIZE,
+    DEFAULT_BAUDRATE,
+    DEFAULT_PARITY,
+    PROTOCOL_RTU,
+    PROTOCOL_TCP,
+    STALE_POLICY_HOLD,
+    STALE_POLICY_MAX_IMPORT,
+    STALE_POLICY_NO_RESPONSE,
+    UPDATE_MODE_ON_DEMAND,
+    UPDATE_MODE_PUSH,
+)
+from .capture import NO_RESPONSE, CaptureLog, CaptureRecord
+from .coordinator import SolarEdgeMeterProxyCoordinator
+from .datastore import WattNodeSlaveContext
+from .derived import max_import_values
+from .filters import OutputFilter, parse_filters
+from .metrics import ProxyMetrics
+from .register_map import (
+    WATTNODE_BLOCK_1000,
+    WATTNODE_BLOCK_1100,
+    WATTNODE_BLOCK_1600,
+    WATTNODE_BLOCK_1650,
+    WATTNODE_BLOCK_1700,
+    WATTNODE_BLOCK_1700_SIZE,
+    RegisterBlock,
 )
 
 _LOGGER = logging.getLogger(__name__)
 
+# Requests awaiting a response on one connection before expired ones are
+# dropped, and how long a request may wait for its response
+MAX_PENDING_REQUESTS = 256
+PENDING_REQUEST_TIMEOUT = 10.0
+
+# Configuration register that resets the minimum and maximum demand
+RESET_DEMAND_REGISTER = 1620
+
+# How often the age of the meter data is checked between updates
+FRESHNESS_CHECK_INTERVAL = timedelta(seconds=1)
+
+# How often captured requests are appended to the capture file
+CAPTURE_FLUSH_INTERVAL = timedelta(seconds=5)
+
+# WattNode communication register codes for the serial line settings
+WATTNODE_BAUD_RATES = {
+    1200: 1,
+    2400: 2,
+    4800: 3,
+    9600: 4,
+    19200: 5,
+    38400: 6,
+    57600: 7,
+    76800: 8,
+    115200: 9,
+}
+WATTNODE_PARITY_MODES = {"N": 0, "E": 1}
+
+
+def rtu_frame_gap(baudrate: int) -> float:
+    """Return the Modbus RTU inter-frame silence (t3.5) in seconds.
+
+    Above 19200 baud the Modbus serial line specification fixes it at
+    1.75 ms, below that it is 3.5 character times of 11 bits.
+    """
+    if baudrate > 19200:
+        return 0.00175
+    return 3.5 * 11 / baudrate
+
+
+def listener_key(config: Mapping[str, Any]) -> tuple[str, Any]:
+    """Return the key of the listener a config entry is served on."""
+    if config.get(CONF_PROTOCOL, DEFAULT_PROTOCOL) == PROTOCOL_RTU and config.get(
+        CONF_SERIAL_PORT
+    ):
+        return (PROTOCOL_RTU, config[CONF_SERIAL_PORT])
+    return (
+        config.get(CONF_SERVER_IP, DEFAULT_SERVER_IP),
+        config.get(CONF_SERVER_PORT, DEFAULT_SERVER_PORT),
+    )
+
+
+class _TracingRequestHandler(ModbusServerRequestHandler):
+    """Request handler that traces the requests of its own connection.
+
+    Every client numbers its transactions itself, so the requests awaiting a
+    response are kept per connection instead of per listener.
+    """
+
+    def __init__(self, owner) -> None:
+        """Initialize the handler of a new connection."""
+        super().__init__(owner)
+        self.pending: dict[tuple[int, int], tuple[float, float, Any]] = {}
+
+    def execute(self, request, *addr):
+        """Note the request before it is executed."""
+        self.server.tracer.trace_request(self.pending, request)
+        super().execute(request, *addr)
+
+    def server_send(self, message, addr, **kwargs):
+        """Record the response, then send it unless it was silenced."""
+        self.server.tracer.trace_response(self.pending, message)
+        self.send_response(message, addr, **kwargs)
+
+    def send_response(self, message, addr, **kwargs):
+        """Send a traced response."""
+        super().server_send(message, addr, **kwargs)
+
+
+class _RtuRequestHandler(_TracingRequestHandler):
+    """Serial request handler that keeps the RTU inter-frame silence."""
+
+    def send_response(self, message, addr, **kwargs):
+        """Send the response once the line has been silent for t3.5."""
+        self.loop.call_later(
+            self.server.frame_gap,
+            partial(super().send_response, message, addr, **kwargs),
+        )
+
+
+class ModbusProxyTcpServer(ModbusTcpServer):
+    """TCP server tracing the requests of every client connection."""
+
+    def __init__(self, tracer: SharedModbusServer, **kwargs) -> None:
+        """Initialize the TCP server."""
+        super().__init__(**kwargs)
+        self.tracer = tracer
+
+    def callback_new_connection(self):
+        """Handle a client connection with its own tracing handler."""
+        return _TracingRequestHandler(self)
+
+
+class ModbusRtuSerialServer(ModbusSerialServer):
+    """Serial RTU server honouring the inter-frame timing of its baud rate."""
+
+    def __init__(self, context, tracer: SharedModbusServer, **kwargs) -> None:
+        """Initialize the serial server."""
+        super().__init__(context, framer=ModbusRtuFramer, **kwargs)
+        self.tracer = tracer
+        self.frame_gap = rtu_frame_gap(kwargs.get("baudrate", DEFAULT_BAUDRATE))
+        if identity := kwargs.get("identity"):
+            # ModbusSerialServer drops the identity passed as a keyword
+            self.control.Identity.update(identity)
+
+    def callback_new_connection(self):
+        """Handle the serial line with the timing-aware handler."""
+        return _RtuRequestHandler(self)
+
+
+def capture_record(
+    request, response, timestamp: float, latency: float
+) -> CaptureRecord:
+    """Return the capture record of a request and its response."""
+    if (values := getattr(request, "values", None)) is not None:
+        written = tuple(values)
+    elif (value := getattr(request, "value", None)) is not None:
+        written = (value,)
+    else:
+        written = ()
+    if not response.should_respond:
+        exception_code = NO_RESPONSE
+    elif response.isError():
+        exception_code = response.exception_code
+    else:
+        exception_code = 0
+    return CaptureRecord(
+        timestamp,
+        latency,
+        request.slave_id,
+        request.function_code,
+        getattr(request, "address", None) or 0,
+        getattr(request, "count", None) or len(written),
+        exception_code,
+        written,
+        tuple(getattr(response, "registers", None) or ()) if not exception_code else (),
+    )
+
+
+class SharedModbusServer:
+    """Modbus listener shared by every virtual meter on one address or line.
+
+    Each config entry attaches its own slave context under its meter unit id,
+    so several virtual WattNode meters are served from a single socket or
+    serial port. A silenced unit id still executes requests but sends no
+    response, like a meter that stopped answering. Requests and responses of
+    a unit id can be written to a capture log.
+    """
+
+    def __init__(self, hass: HomeAssistant, config: Mapping[str, Any]) -> None:
+        """Initialize the shared server from a config entry's data."""
+        self.hass = hass
+        self.key = listener_key(config)
+        self.protocol = config.get(CONF_PROTOCOL, DEFAULT_PROTOCOL)
+        self.server_ip = config.get(CONF_SERVER_IP, DEFAULT_SERVER_IP)
+        self.server_port = config.get(CONF_SERVER_PORT, DEFAULT_SERVER_PORT)
+        self.serial_port = config.get(CONF_SERIAL_PORT)
+        self.baudrate = config.get(CONF_BAUDRATE, DEFAULT_BAUDRATE)
+        self.parity = config.get(CONF_PARITY, DEFAULT_PARITY)
+        self.context = ModbusServerContext(slaves={}, single=False)
+        self._server: ModbusBaseServer | None = None
+        self._metrics: dict[int, ProxyMetrics] = {}
+        self._silenced: set[int] = set()
+        self._captures: dict[int, CaptureLog] = {}
+
+    @property
+    def is_serial(self) -> bool:
+        """Return whether the listener is a serial RTU line."""
+        return self.key[0] == PROTOCOL_RTU
+
+    @property
+    def name(self) -> str:
+        """Return a readable name of the listener for messages."""
+        if self.is_serial:
+            return f"{self.serial_port} ({self.baudrate} baud)"
+        return f"{self.server_ip}:{self.server_port}"
+
+    @property
+    def unit_ids(self) -> list[int]:
+        """Return the unit ids currently served."""
+        return self.context.slaves()
+
+    async def async_start(self) -> None:
+        """Bind the listener."""
+        # Create device identification
+        identity = ModbusDeviceIdentification()
+        identity.VendorName = "SolarEdge MeterProxy"
+        identity.ProductCode = "SEMP"
+        identity.VendorUrl = "https://github.com/AlbertHakvoort/hacs_solaredge_meterproxy"
+        identity.ProductName = "SolarEdge MeterProxy"
+        identity.ModelName = "WattNode Emulator"
+        identity.MajorMinorRevision = "1.0.0"
+
+        if self.is_serial:
+            self._server = ModbusRtuSerialServer(
+                self.context,
+                identity=identity,
+                port=self.serial_port,
+                baudrate=self.baudrate,
+                parity=self.parity,
+                bytesize=8,
+                stopbits=1,
+                tracer=self,
+            )
+        else:
+            if self.protocol == PROTOCOL_RTU:
+                _LOGGER.warning(
+                    "No serial port configured for protocol rtu, serving RTU "
+                    "over TCP on %s",
+                    self.name,
+                )
+            # Configure framer based on protocol
+            framer = ModbusSocketFramer if self.protocol == PROTOCOL_TCP else ModbusRtuFramer
+            self._server = ModbusProxyTcpServer(
+                self,
+                context=self.context,
+                identity=identity,
+                framer=framer,
+                address=(self.server_ip, self.server_port),
+            )
+
+        # Serve from Home Assistant's event loop; listen() returns once the
+        # socket is bound or the serial port is open
+        if not await self._server.listen():
+            self._server = None
+            raise ConnectionError(f"Could not open Modbus listener on {self.name}")
+        _LOGGER.info("Modbus listener started on %s", self.name)
+
+    async def async_stop(self) -> None:
+        """Close the listener."""
+        if self._server:
+            await self._server.shutdown()
+            self._server = None
+        _LOGGER.info("Modbus listener stopped on %s", self.name)
+
+    def attach(
+        self,
+        unit_id: int,
+        slave_context: WattNodeSlaveContext,
+        metrics: ProxyMetrics | None = None,
+        capture: CaptureLog | None = None,
+    ) -> None:
+        """Start serving a virtual meter under a unit id."""
+        if unit_id in self.context:
+            raise ValueError(f"Modbus address {unit_id} is already served on {self.name}")
+        self.context[unit_id] = slave_context
+        if metrics is not None:
+            self._metrics[unit_id] = metrics
+        if capture is not None:
+            self._captures[unit_id] = capture
+
+    def detach(self, unit_id: int) -> None:
+        """Stop serving a virtual meter."""
+        if unit_id in self.context:
+            del self.context[unit_id]
+        self._metrics.pop(unit_id, None)
+        self._captures.pop(unit_id, None)
+        self._silenced.discard(unit_id)
+
+    def silence(self, unit_id: int, silenced: bool = True) -> None:
+        """Stop or resume answering requests for a unit id."""
+        if silenced:
+            self._silenced.add(unit_id)
+        else:
+            self._silenced.discard(unit_id)
+
+    def trace_request(self, pending: dict, request) -> None:
+        """Note when a request for a metered or captured unit id arrived.
+
+        The request is kept in the pending requests of its connection.
+        """
+        slave_id = request.slave_id
+        if slave_id not in self._metrics and slave_id not in self._captures:
+            return
+        now = time.perf_counter()
+        if len(pending) >= MAX_PENDING_REQUESTS:
+            # Drop the requests whose response never came
+            for key, (started, *_) in list(pending.items()):
+                if now - started > PENDING_REQUEST_TIMEOUT:
+                    del pending[key]
+        pending[(slave_id, request.transaction_id)] = (now, time.time(), request)
+
+    def trace_response(self, pending: dict, response) -> None:
+        """Record the latency and outcome of a response, or silence it."""
+        traced = pending.pop((response.slave_id, response.transaction_id), None)
+        metrics = self._metrics.get(response.slave_id)
+        silenced = response.slave_id in self._silenced
+        if silenced:
+            response.should_respond = False
+            if metrics is not None:
+                metrics.record_silenced()
+        if traced is None:
+            return
+
+        started, timestamp, request = traced
+        latency = time.perf_counter() - started
+        if capture := self._captures.get(response.slave_id):
+            capture.record(capture_record(request, response, timestamp, latency))
+        if metrics is not None and not silenced:
+            metrics.record_request(
+                request.function_code, getattr(request, "address", None), latency
+            )
+            if response.isError():
+                metrics.record_exception(
+                    ModbusExceptions.decode(response.exception_code)
+                    or str(response.exception_code)
+                )
+
+
+async def async_attach_meter(
+    hass: HomeAssistant,
+    config: Mapping[str, Any],
+    unit_id: int,
+    slave_context: WattNodeSlaveContext,
+    metrics: ProxyMetrics | None = None,
+    capture: CaptureLog | None = None,
+) -> SharedModbusServer:
+    """Attach a virtual meter to the listener configured in its entry data.
+
+    The listener is started by the first meter that needs it.
+    """
+    lock = hass.data.setdefault(DATA_SERVERS_LOCK, asyncio.Lock())
+    async with lock:
+        servers: dict[tuple[str, Any], SharedModbusServer] = hass.data.setdefault(
+            DATA_SERVERS, {}
+        )
+        key = listener_key(config)
+        protocol = config.get(CONF_PROTOCOL, DEFAULT_PROTOCOL)
+        server = servers.get(key)
+        if server is None:
+            server = SharedModbusServer(hass, config)
+            await server.async_start()
+            servers[key] = server
+        elif server.protocol != protocol:
+            raise ValueError(
+                f"Modbus listener on {server.name} already uses "
+                f"protocol {server.protocol}"
+            )
+
+        server.attach(unit_id, slave_context, metrics, capture)
+        return server
+
+
+async def async_detach_meter(
+    hass: HomeAssistant, server: SharedModbusServer, unit_id: int
+) -> None:
+    """Detach a virtual meter, closing the listener once it serves none."""
+    lock = hass.data.setdefault(DATA_SERVERS_LOCK, asyncio.Lock())
+    async with lock:
+        server.detach(unit_id)
+        if server.unit_ids:
+            return
+
+        await server.async_stop()
+        servers = hass.data.get(DATA_SERVERS, {})
+        if servers.get(server.key) is server:
+            del servers[server.key]
+
 
 class ModbusProxyServer:
-    """Modbus proxy server that simulates a WattNode meter."""
+    """Modbus proxy server that simulates a WattNode meter.
+
+    The registers are encoded from the snapshots of the coordinator, the
+    same values the sensors show, unless output filters are configured for
+    the inverter. Once the meter data is older than the stale timeout, the
+    stale policy decides what the inverter gets instead: the last values,
+    maximum import, or no response at all.
+
+    With a capture size configured, every request and response is written
+    to a rotating capture file that the replay tool can send again.
+    """
 
     def __init__(
-        self, hass: HomeAssistant, entry: ConfigEntry, coordinator
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        coordinator: SolarEdgeMeterProxyCoordinator,
     ) -> None:
         """Initialize the Modbus proxy server."""
         self.hass = hass
         self.entry = entry
         self.coordinator = coordinator
-        self._server = None
-        self._server_task = None
-        self._update_task = None
-        self._stop_event = asyncio.Event()
+        self._server: SharedModbusServer | None = None
+        self._meter_address = entry.data.get(
+            CONF_METER_MODBUS_ADDRESS, DEFAULT_METER_MODBUS_ADDRESS
+        )
         self._slave_context = None
+        self.metrics = ProxyMetrics()
+        self._values: dict[str, float] | None = None
+        self._value_blocks = (
+            RegisterBlock(1000, WATTNODE_BLOCK_1000),
+            RegisterBlock(1100, WATTNODE_BLOCK_1100),
+        )
+        self._config_blocks = (
+            RegisterBlock(1600, WATTNODE_BLOCK_1600),
+            RegisterBlock(1650, WATTNODE_BLOCK_1650),
+            RegisterBlock(1700, WATTNODE_BLOCK_1700, WATTNODE_BLOCK_1700_SIZE),
+        )
+        self._last_update = 0.0
+        self._unsub_coordinator = None
+        self._unsub_freshness = None
+        self._coalesce_handle: asyncio.TimerHandle | None = None
+        self._stale = False
+
+        config = entry.data
+        self._update_mode = config.get(CONF_UPDATE_MODE, DEFAULT_UPDATE_MODE)
+        self._coalesce_window = (
+            config.get(CONF_COALESCE_WINDOW, DEFAULT_COALESCE_WINDOW) / 1000
+        )
+        self._max_age = config.get(CONF_MAX_AGE, DEFAULT_MAX_AGE)
+        self._output_filter: OutputFilter | None = None
+        if filters := parse_filters(config.get(CONF_OUTPUT_FILTERS)):
+            self._output_filter = OutputFilter(filters)
+        self._stale_timeout = config.get(CONF_STALE_TIMEOUT, DEFAULT_STALE_TIMEOUT)
+        self._stale_policy = config.get(CONF_STALE_POLICY, DEFAULT_STALE_POLICY)
+        self._ct_current = config.get(CONF_CT_CURRENT, DEFAULT_CT_CURRENT)
+        self.capture: CaptureLog | None = None
+        if capture_size := config.get(CONF_CAPTURE_SIZE, DEFAULT_CAPTURE_SIZE):
+            self.capture = CaptureLog(
+                hass.config.path(DOMAIN, f"capture_{entry.entry_id}.bin"),
+                capture_size * 1024,
+            )
+        self._unsub_capture = None
+        self._capture_task: asyncio.Task | None = None
 
     async def async_start(self) -> None:
         """Start the Modbus server."""
         try:
             await self._setup_server()
-            self._update_task = self.hass.async_create_task(self._update_loop())
+            self._check_freshness()
+            self._update_meter_values(self._get_meter_data())
+            self._slave_context.write_hook = self._handle_write
+            if self._update_mode == UPDATE_MODE_ON_DEMAND:
+                # Refresh from the inverter's reads instead of every snapshot
+                self._slave_context.read_hook = self._refresh_on_read
+            else:
+                self._unsub_coordinator = self.coordinator.async_add_listener(
+                    self._async_coordinator_updated
+                )
+                if self._output_filter and self._output_filter.extrapolates:
+                    # Move extrapolated values along between snapshots too
+                    self._slave_context.read_hook = self._refresh_on_read
+            if self._stale_timeout:
+                self._unsub_freshness = async_track_time_interval(
+                    self.hass, self._async_check_freshness, FRESHNESS_CHECK_INTERVAL
+                )
+            if self.capture is not None:
+                self._unsub_capture = async_track_time_interval(
+                    self.hass, self._async_flush_capture, CAPTURE_FLUSH_INTERVAL
+                )
+                _LOGGER.info("Capturing Modbus requests to %s", self.capture.path)
             _LOGGER.info("Modbus proxy server started successfully")
         except Exception as ex:
             _LOGGER.error("Failed to start Modbus server: %s", ex)
+            if self._server:
+                await async_detach_meter(self.hass, self._server, self._meter_address)
+                self._server = None
             raise
 
     async def async_stop(self) -> None:
         """Stop the Modbus server."""
-        self._stop_event.set()
-        
-        if self._update_task:
-            self._update_task.cancel()
-            try:
-                await self._update_task
-            except asyncio.CancelledError:
-                pass
+        if self._slave_context is not None:
+            self._slave_context.read_hook = None
+            self._slave_context.write_hook = None
+
+        if self._unsub_coordinator:
+            self._unsub_coordinator()
+            self._unsub_coordinator = None
+
+        if self._unsub_freshness:
+            self._unsub_freshness()
+            self._unsub_freshness = None
+
+        if self._coalesce_handle:
+            self._coalesce_handle.cancel()
+            self._coalesce_handle = None
 
         if self._server:
-            self._server.shutdown()
-            
+            await async_detach_meter(self.hass, self._server, self._meter_address)
+            self._server = None
+
+        if self._unsub_capture:
+            self._unsub_capture()
+            self._unsub_capture = None
+        if self.capture is not None:
+            if self._capture_task is not None:
+                await self._capture_task
+                self._capture_task = None
+            await self._async_write_capture()
+
         _LOGGER.info("Modbus proxy server stopped")
 
     async def _setup_server(self) -> None:
         """Set up the Modbus server with WattNode meter simulation."""
-        server_ip = self.entry.data.get(CONF_SERVER_IP, DEFAULT_SERVER_IP)
-        server_port = self.entry.data.get(CONF_SERVER_PORT, DEFAULT_SERVER_PORT)
-        meter_address = self.entry.data.get(CONF_METER_MODBUS_ADDRESS, DEFAULT_METER_MODBUS_ADDRESS)
-        protocol = self.entry.data.get(CONF_PROTOCOL, DEFAULT_PROTOCOL)
-
         # Create slave context for the meter
-        self._slave_context = ModbusSlaveContext()
+        self._slave_context = WattNodeSlaveContext()
         
         # Initialize meter configuration registers
         await self._initialize_meter_registers()
 
-        # Create server context with the slave
-        slaves = {meter_address: self._slave_context}
-        server_context = ModbusServerContext(slaves=slaves, single=False)
-
-        # Configure framer based on protocol
-        framer = ModbusSocketFramer if protocol == "tcp" else ModbusRtuFramer
-
-        # Create device identification
-        identity = ModbusDeviceIdentification()
-        identity.VendorName = "SolarEdge MeterProxy"
-        identity.ProductCode = "SEMP"
-        identity.VendorUrl = "https://github.com/AlbertHakvoort/hacs_solaredge_meterproxy"
-        identity.ProductName = "SolarEdge MeterProxy"
-        identity.ModelName = "WattNode Emulator"
-        identity.MajorMinorRevision = "1.0.0"
-
-        # Start the server in a separate thread
-        def run_server():
-            asyncio.set_event_loop(asyncio.new_event_loop())
-            self._server = StartTcpServer(
-                context=server_context,
-                identity=identity,
-                framer=framer,
-                address=(server_ip, server_port),
-            )
-
-        server_thread = threading.Thread(target=run_server, daemon=True)
-        server_thread.start()
-
-        # Give the server time to start
-        await asyncio.sleep(1)
+        # Serve the meter from the (possibly shared) listener for this address
+        self._server = await async_attach_meter(
+            self.hass,
+            self.entry.data,
+            self._meter_address,
+            self._slave_context,
+            self.metrics,
+            self.capture,
+        )
 
     async def _initialize_meter_registers(self) -> None:
         """Initialize the WattNode meter registers with default values."""
@@ -132,251 +615,219 @@ class ModbusProxyServer:
         phase_offset = self.entry.data.get(CONF_PHASE_OFFSET, DEFAULT_PHASE_OFFSET)
         serial_number = self.entry.data.get(CONF_SERIAL_NUMBER, DEFAULT_SERIAL_NUMBER)
 
-        # Configuration registers (1600-1699)
-        block_1601 = BinaryPayloadBuilder(byteorder=Endian.Big, wordorder=Endian.Little)
-        block_1601.add_32bit_int(1234)  # config passcode
-        block_1601.add_16bit_int(ct_current)  # ct rated current
-        block_1601.add_16bit_int(ct_current)  # ct rated current l1
-        block_1601.add_16bit_int(ct_current)  # ct rated current l2
-        block_1601.add_16bit_int(ct_current)  # ct rated current l3
-        block_1601.add_16bit_int(ct_inverted)  # ct direction inversion
-        block_1601.add_16bit_int(0)  # measurement averaging
-        block_1601.add_16bit_int(0)  # power scale
-        block_1601.add_16bit_int(15)  # demand period
-        block_1601.add_16bit_int(1)  # demand subintervals
-        block_1601.add_16bit_int(10000)  # power/energy adjustment l1
-        block_1601.add_16bit_int(10000)  # power/energy adjustment l2
-        block_1601.add_16bit_int(10000)  # power/energy adjustment l3
-        block_1601.add_16bit_int(-1000)  # ct phase angle adjustment l1
-        block_1601.add_16bit_int(-1000)  # ct phase angle adjustment l2
-        block_1601.add_16bit_int(-1000)  # ct phase angle adjustment l3
-        block_1601.add_16bit_int(1500)  # minimum power reading
-        block_1601.add_16bit_int(phase_offset)  # phase offset
-        block_1601.add_16bit_int(0)  # reset energy
-        block_1601.add_16bit_int(0)  # reset demand
-        block_1601.add_16bit_int(20000)  # voltage scale
-        block_1601.add_16bit_int(20000)  # current scale
-        block_1601.add_16bit_int(0)  # io pin mode
-
-        self._slave_context.setValues(3, 1600, block_1601.to_registers())
+        config_block, comm_block, info_block = self._config_blocks
+
+        # Configuration registers (1600-1649)
+        config_values = {
+            "config_passcode": 1234,
+            "ct_current": ct_current,
+            "ct_current_l1": ct_current,
+            "ct_current_l2": ct_current,
+            "ct_current_l3": ct_current,
+            "ct_inverted": ct_inverted,
+            "measurement_averaging": 0,
+            "power_scale": 0,
+            "demand_period": self.entry.data.get(
+                CONF_DEMAND_PERIOD, DEFAULT_DEMAND_PERIOD
+            ),
+            "demand_subintervals": self.entry.data.get(
+                CONF_DEMAND_SUBINTERVALS, DEFAULT_DEMAND_SUBINTERVALS
+            ),
+            "power_energy_adjustment_l1": 10000,
+            "power_energy_adjustment_l2": 10000,
+            "power_energy_adjustment_l3": 10000,
+            "ct_phase_angle_adjustment_l1": -1000,
+            "ct_phase_angle_adjustment_l2": -1000,
+            "ct_phase_angle_adjustment_l3": -1000,
+            "minimum_power_reading": 1500,
+            "phase_offset": phase_offset,
+            "reset_energy": 0,
+            "reset_demand": 0,
+            "voltage_scale": 20000,
+            "current_scale": 20000,
+            "io_pin_mode": 0,
+        }
+        self._slave_context.stage(1600, config_block.encode(config_values))
 
         # Communication settings (1650-1699)
-        block_1651 = BinaryPayloadBuilder(byteorder=Endian.Big, wordorder=Endian.Little)
-        block_1651.add_16bit_int(0)  # apply config
-        block_1651.add_16bit_int(2)  # modbus address
-        block_1651.add_16bit_int(4)  # baud rate
-        block_1651.add_16bit_int(0)  # parity mode
-        block_1651.add_16bit_int(0)  # modbus mode
-        block_1651.add_16bit_int(5)  # message delay
-
-        self._slave_context.setValues(3, 1650, block_1651.to_registers())
-
-        # Device information (1700-1799)
-        block_1701 = BinaryPayloadBuilder(byteorder=Endian.Big, wordorder=Endian.Little)
-        block_1701.add_32bit_int(serial_number)  # serial number
-        block_1701.add_32bit_int(0)  # uptime (s)
-        block_1701.add_32bit_int(0)  # total uptime (s)
-        block_1701.add_16bit_int(202)  # wattnode model
-        block_1701.add_16bit_int(31)  # firmware version
-        block_1701.add_16bit_int(0)  # wattnode options
-        block_1701.add_16bit_int(0)  # error status
-        block_1701.add_16bit_int(0)  # power fail count
-        block_1701.add_16bit_int(0)  # crc error count
-        block_1701.add_16bit_int(0)  # frame error count
-        block_1701.add_16bit_int(0)  # packet error count
-        block_1701.add_16bit_int(0)  # overrun count
-        
-        # Add error status registers (8 more registers)
-        for _ in range(8):
-            block_1701.add_16bit_int(0)
-
-        self._slave_context.setValues(3, 1700, block_1701.to_registers())
+        comm_values = {
+            "apply_config": 0,
+            "modbus_address": self._meter_address,
+            "baud_rate": WATTNODE_BAUD_RATES.get(
+                self.entry.data.get(CONF_BAUDRATE, DEFAULT_BAUDRATE), 4
+            ),
+            "parity_mode": WATTNODE_PARITY_MODES.get(
+                self.entry.data.get(CONF_PARITY, DEFAULT_PARITY), 0
+            ),
+            "modbus_mode": 0,
+            "message_delay": 5,
+        }
+        self._slave_context.stage(1650, comm_block.encode(comm_values))
+
+        # Device information (1700-1799), error status registers left at zero
+        info_values = {
+            "serial_number": serial_number,
+            "uptime": 0,
+            "total_uptime": 0,
+            "wattnode_model": 202,
+            "firmware_version": 31,
+        }
+        self._slave_context.stage(1700, info_block.encode(info_values))
+        self._slave_context.publish()
+
+    def _get_meter_data(self) -> dict[str, float]:
+        """Get the meter values of the latest coordinator snapshot."""
+        data = self.coordinator.data or {}
+        if self._stale and self._stale_policy == STALE_POLICY_MAX_IMPORT:
+            return max_import_values(data, self._ct_current)
+        if self._output_filter is not None:
+            return self._output_filter.apply(
+                data, time.monotonic(), self.coordinator.last_poll
+            )
+        return data
+
+    @callback
+    def _async_coordinator_updated(self) -> None:
+        """Serve a new snapshot of the meter values."""
+        if self._check_freshness() and self._stale_policy == STALE_POLICY_HOLD:
+            return
+
+        if self._update_mode != UPDATE_MODE_PUSH:
+            self._update_meter_values(self._get_meter_data())
+            return
+
+        if not self._coalesce_window:
+            self._apply_state_changes()
+            return
+
+        # Collect bursts (e.g. all phases of one P1 telegram) into one write
+        if self._coalesce_handle is None:
+            self._coalesce_handle = self.hass.loop.call_later(
+                self._coalesce_window, self._apply_state_changes
+            )
 
-    def _get_p1_value(self, entity_id: str | None) -> float:
-        """Get value from P1 entity."""
-        if not entity_id:
-            return 0.0
-        
+    @callback
+    def _apply_state_changes(self) -> None:
+        """Patch the registers affected by the latest snapshot."""
+        self._coalesce_handle = None
         try:
-            state = self.hass.states.get(entity_id)
-            if state and state.state not in ["unknown", "unavailable"]:
-                return float(state.state)
-        except (ValueError, TypeError):
-            _LOGGER.warning(f"Could not convert {entity_id} state to float: {state.state if state else 'None'}")
-        
-        return 0.0
-
-    async def _get_p1_meter_data(self) -> dict[str, float]:
-        """Get current P1 meter data from configured entities."""
-        config = self.entry.data
-        
-        # Read P1 values
-        power_total = self._get_p1_value(config.get("p1_power_entity"))
-        voltage_l1 = self._get_p1_value(config.get("p1_voltage_l1_entity"))
-        voltage_l2 = self._get_p1_value(config.get("p1_voltage_l2_entity")) 
-        voltage_l3 = self._get_p1_value(config.get("p1_voltage_l3_entity"))
-        current_l1 = self._get_p1_value(config.get("p1_current_l1_entity"))
-        current_l2 = self._get_p1_value(config.get("p1_current_l2_entity"))
-        current_l3 = self._get_p1_value(config.get("p1_current_l3_entity"))
-        power_l1 = self._get_p1_value(config.get("p1_power_l1_entity"))
-        power_l2 = self._get_p1_value(config.get("p1_power_l2_entity"))
-        power_l3 = self._get_p1_value(config.get("p1_power_l3_entity"))
-        
-        # Calculate missing values if needed
-        if power_total == 0 and (power_l1 or power_l2 or power_l3):
-            power_total = power_l1 + power_l2 + power_l3
-            
-        # Estimate average voltage if some phases missing
-        voltages = [v for v in [voltage_l1, voltage_l2, voltage_l3] if v > 0]
-        avg_voltage = sum(voltages) / len(voltages) if voltages else 230.0
-        
-        if voltage_l1 == 0:
-            voltage_l1 = avg_voltage
-        if voltage_l2 == 0:
-            voltage_l2 = avg_voltage  
-        if voltage_l3 == 0:
-            voltage_l3 = avg_voltage
-            
-        # Calculate currents from power if missing
-        if current_l1 == 0 and power_l1 > 0 and voltage_l1 > 0:
-            current_l1 = power_l1 / voltage_l1
-        if current_l2 == 0 and power_l2 > 0 and voltage_l2 > 0:
-            current_l2 = power_l2 / voltage_l2
-        if current_l3 == 0 and power_l3 > 0 and voltage_l3 > 0:
-            current_l3 = power_l3 / voltage_l3
-            
-        return {
-            "power_active": power_total,
-            "l1_power_active": power_l1,
-            "l2_power_active": power_l2, 
-            "l3_power_active": power_l3,
-            "l1n_voltage": voltage_l1,
-            "l2n_voltage": voltage_l2,
-            "l3n_voltage": voltage_l3,
-            "voltage_ln": avg_voltage,
-            "voltage_ll": avg_voltage * 1.732,  # Line-line voltage
-            "l12_voltage": voltage_l1 * 1.732,
-            "l23_voltage": voltage_l2 * 1.732,
-            "l31_voltage": voltage_l3 * 1.732,
-            "l1_current": current_l1,
-            "l2_current": current_l2,
-            "l3_current": current_l3,
-            "frequency": 50.0,  # Standard EU frequency
-            "energy_active": 0.0,  # P1 doesn't provide energy totals easily
-            "import_energy_active": 0.0,
-            "l1_energy_active": 0.0,
-            "l2_energy_active": 0.0,
-            "l3_energy_active": 0.0,
-            "l1_import_energy_active": 0.0,
-            "l2_import_energy_active": 0.0,
-            "l3_import_energy_active": 0.0,
-        }
+            self._patch_meter_values(self._get_meter_data())
+        except Exception as ex:
+            self.metrics.record_update_error()
+            _LOGGER.error("Failed to apply meter value change: %s", ex)
+
+    @callback
+    def _refresh_on_read(self, address: int, count: int) -> None:
+        """Refresh the value blocks if a read finds them older than max age."""
+        if address >= 1200 or time.monotonic() - self._last_update < self._max_age:
+            return
+        if self._check_freshness() and self._stale_policy == STALE_POLICY_HOLD:
+            return
+        self._update_meter_values(self._get_meter_data())
+
+    @callback
+    def _async_flush_capture(self, now=None) -> None:
+        """Append the captured requests, unless the previous write still runs."""
+        if self._capture_task is None or self._capture_task.done():
+            self._capture_task = self.hass.async_create_task(
+                self._async_write_capture()
+            )
 
-    async def _update_loop(self) -> None:
-        """Main update loop for the Modbus server."""
-        while not self._stop_event.is_set():
-            try:
-                # Get P1 meter data directly from Home Assistant
-                p1_data = await self._get_p1_meter_data()
-                await self._update_meter_values(p1_data)
-                
-                refresh_rate = self.entry.data.get("refresh_rate", 5)
-                await asyncio.sleep(refresh_rate)
-            except asyncio.CancelledError:
-                break
-            except Exception as ex:
-                _LOGGER.error("Error in update loop: %s", ex)
-                await asyncio.sleep(5)  # Wait before retrying
-
-    async def _update_meter_values(self, values: dict[str, Any]) -> None:
+    async def _async_write_capture(self) -> None:
+        """Append the captured requests to the capture file."""
+        try:
+            await self.hass.async_add_executor_job(
+                self.capture.write, self.capture.take()
+            )
+        except OSError as ex:
+            _LOGGER.error("Failed to write capture %s: %s", self.capture.path, ex)
+
+    @callback
+    def _async_check_freshness(self, now=None) -> None:
+        """Check the age of the meter data between updates."""
+        self._check_freshness()
+
+    @callback
+    def _check_freshness(self) -> bool:
+        """Apply or lift the stale policy, return whether the data is stale."""
+        if not self._stale_timeout:
+            return False
+        age = self.coordinator.data_age()
+        stale = age > self._stale_timeout
+        self.metrics.record_freshness(age, stale)
+        if stale == self._stale:
+            return stale
+
+        self._stale = stale
+        if stale:
+            _LOGGER.warning(
+                "Meter data is older than %s seconds, applying stale policy %s",
+                self._stale_timeout,
+                self._stale_policy,
+            )
+        else:
+            _LOGGER.info("Meter data is fresh again, serving live values")
+        if self._stale_policy == STALE_POLICY_NO_RESPONSE and self._server:
+            self._server.silence(self._meter_address, stale)
+        if self._slave_context is not None and not (
+            stale and self._stale_policy == STALE_POLICY_HOLD
+        ):
+            self._update_meter_values(self._get_meter_data())
+        return stale
+
+    @callback
+    def _handle_write(self, address: int, values: list[int]) -> None:
+        """Reset the demand when the inverter writes the reset register."""
+        offset = RESET_DEMAND_REGISTER - address
+        if not 0 <= offset < len(values) or not values[offset]:
+            return
+        _LOGGER.debug("Demand reset requested over Modbus")
+        # The register reads back as zero once the reset is done
+        self._slave_context.stage(RESET_DEMAND_REGISTER, [0])
+        self._slave_context.publish()
+        self.coordinator.async_reset_demand()
+
+    def _patch_meter_values(self, values: dict[str, Any]) -> None:
+        """Write only the registers whose value differs from what is served."""
+        started = time.perf_counter()
+        previous = self._values
+        if previous is None:
+            self._update_meter_values(values)
+            return
+
+        for key, value in values.items():
+            if previous.get(key) == value:
+                continue
+            for block in self._value_blocks:
+                for address, registers in block.patch(key, value):
+                    self._slave_context.stage(address, registers)
+
+        # Values that left the snapshot (e.g. an entity that was removed)
+        # read as zero, like in a full encode
+        for key in previous.keys() - values.keys():
+            for block in self._value_blocks:
+                for address, registers in block.patch(key, 0):
+                    self._slave_context.stage(address, registers)
+
+        self._slave_context.publish()
+        self._values = values
+        self._last_update = time.monotonic()
+        self.metrics.record_update(time.perf_counter() - started)
+
+    def _update_meter_values(self, values: dict[str, Any]) -> None:
         """Update the Modbus registers with meter values."""
+        started = time.perf_counter()
         try:
-            # Primary registers (1000-1099)
-            block_1001 = BinaryPayloadBuilder(byteorder=Endian.Big, wordorder=Endian.Little)
-            
-            # Energy values
-            block_1001.add_32bit_float(values.get("energy_active", 0))  # total active energy
-            block_1001.add_32bit_float(values.get("import_energy_active", 0))  # imported active energy
-            block_1001.add_32bit_float(values.get("energy_active", 0))  # total active energy non-reset
-            block_1001.add_32bit_float(values.get("import_energy_active", 0))  # imported active energy non-reset
-            
-            # Power values
-            block_1001.add_32bit_float(values.get("power_active", 0))  # total power
-            block_1001.add_32bit_float(values.get("l1_power_active", 0))  # power l1
-            block_1001.add_32bit_float(values.get("l2_power_active", 0))  # power l2
-            block_1001.add_32bit_float(values.get("l3_power_active", 0))  # power l3
-            
-            # Voltage values
-            block_1001.add_32bit_float(values.get("voltage_ln", 0))  # l-n voltage
-            block_1001.add_32bit_float(values.get("l1n_voltage", 0))  # l1-n voltage
-            block_1001.add_32bit_float(values.get("l2n_voltage", 0))  # l2-n voltage
-            block_1001.add_32bit_float(values.get("l3n_voltage", 0))  # l3-n voltage
-            block_1001.add_32bit_float(values.get("voltage_ll", 0))  # l-l voltage
-            block_1001.add_32bit_float(values.get("l12_voltage", 0))  # l1-l2 voltage
-            block_1001.add_32bit_float(values.get("l23_voltage", 0))  # l2-l3 voltage
-            block_1001.add_32bit_float(values.get("l31_voltage", 0))  # l3-l1 voltage
-            block_1001.add_32bit_float(values.get("frequency", 0))  # line frequency
-
-            self._slave_context.setValues(3, 1000, block_1001.to_registers())
-
-            # Extended registers (1100-1199)
-            block_1101 = BinaryPayloadBuilder(byteorder=Endian.Big, wordorder=Endian.Little)
-            
-            # Energy per phase
-            block_1101.add_32bit_float(values.get("l1_energy_active", 0))  # total active energy l1
-            block_1101.add_32bit_float(values.get("l2_energy_active", 0))  # total active energy l2
-            block_1101.add_32bit_float(values.get("l3_energy_active", 0))  # total active energy l3
-            
-            # Import/export energy
-            block_1101.add_32bit_float(values.get("l1_import_energy_active", 0))  # import energy l1
-            block_1101.add_32bit_float(values.get("l2_import_energy_active", 0))  # import energy l2
-            block_1101.add_32bit_float(values.get("l3_import_energy_active", 0))  # import energy l3
-            block_1101.add_32bit_float(values.get("export_energy_active", 0))  # export energy
-            block_1101.add_32bit_float(values.get("l1_export_energy_active", 0))  # export energy l1
-            block_1101.add_32bit_float(values.get("l2_export_energy_active", 0))  # export energy l2
-            block_1101.add_32bit_float(values.get("l3_export_energy_active", 0))  # export energy l3
-            
-            # Reactive and apparent energy
-            block_1101.add_32bit_float(values.get("energy_reactive", 0))  # total reactive energy
-            block_1101.add_32bit_float(values.get("l1_energy_reactive", 0))  # reactive energy l1
-            block_1101.add_32bit_float(values.get("l2_energy_reactive", 0))  # reactive energy l2
-            block_1101.add_32bit_float(values.get("l3_energy_reactive", 0))  # reactive energy l3
-            block_1101.add_32bit_float(values.get("energy_apparent", 0))  # total apparent energy
-            block_1101.add_32bit_float(values.get("l1_energy_apparent", 0))  # apparent energy l1
-            block_1101.add_32bit_float(values.get("l2_energy_apparent", 0))  # apparent energy l2
-            block_1101.add_32bit_float(values.get("l3_energy_apparent", 0))  # apparent energy l3
-            
-            # Power factor
-            block_1101.add_32bit_float(values.get("power_factor", 0))  # power factor
-            block_1101.add_32bit_float(values.get("l1_power_factor", 0))  # power factor l1
-            block_1101.add_32bit_float(values.get("l2_power_factor", 0))  # power factor l2
-            block_1101.add_32bit_float(values.get("l3_power_factor", 0))  # power factor l3
-            
-            # Reactive and apparent power
-            block_1101.add_32bit_float(values.get("power_reactive", 0))  # total reactive power
-            block_1101.add_32bit_float(values.get("l1_power_reactive", 0))  # reactive power l1
-            block_1101.add_32bit_float(values.get("l2_power_reactive", 0))  # reactive power l2
-            block_1101.add_32bit_float(values.get("l3_power_reactive", 0))  # reactive power l3
-            block_1101.add_32bit_float(values.get("power_apparent", 0))  # total apparent power
-            block_1101.add_32bit_float(values.get("l1_power_apparent", 0))  # apparent power l1
-            block_1101.add_32bit_float(values.get("l2_power_apparent", 0))  # apparent power l2
-            block_1101.add_32bit_float(values.get("l3_power_apparent", 0))  # apparent power l3
-            
-            # Current values
-            block_1101.add_32bit_float(values.get("l1_current", 0))  # current l1
-            block_1101.add_32bit_float(values.get("l2_current", 0))  # current l2
-            block_1101.add_32bit_float(values.get("l3_current", 0))  # current l3
-            
-            # Demand power
-            block_1101.add_32bit_float(values.get("demand_power_active", 0))  # demand power
-            block_1101.add_32bit_float(values.get("minimum_demand_power_active", 0))  # minimum demand power
-            block_1101.add_32bit_float(values.get("maximum_demand_power_active", 0))  # maximum demand power
-            block_1101.add_32bit_float(values.get("demand_power_apparent", 0))  # apparent demand power
-            block_1101.add_32bit_float(values.get("l1_demand_power_active", 0))  # demand power l1
-            block_1101.add_32bit_float(values.get("l2_demand_power_active", 0))  # demand power l2
-            block_1101.add_32bit_float(values.get("l3_demand_power_active", 0))  # demand power l3
-
-            self._slave_context.setValues(3, 1100, block_1101.to_registers())
+            # Primary (1000-1099) and extended (1100-1199) registers are
+            # published together so a read never mixes two updates
+            for block in self._value_blocks:
+                self._slave_context.stage(block.address, block.encode(values))
+            self._slave_context.publish()
+
+            self._values = values
+            self._last_update = time.monotonic()
+            self.metrics.record_update(time.perf_counter() - started)
 
         except Exception as ex:
-            _LOGGER.error("Failed to update meter values: %s", ex)
\ No newline at end of file
+            self.metrics.record_update_error()
+            _LOGGER.error("Failed to update meter values: %s", ex)
@@ -0,0 +1,156 @@
+"""Read planning for upstream Modbus meters."""
+from __future__ import annotations
+
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+import struct
+
+from .register_map import REGISTER_TYPES
+
+# Maximum number of registers in one read holding/input registers request
+MAX_READ_COUNT = 125
+
+
+@dataclass(frozen=True)
+class MeterRegister:
+    """A value read from an upstream meter.
+
+    Upstream meters (Eastron SDM and alike) use big-endian words with the
+    high word first.
+    """
+
+    name: str
+    address: int
+    type: str = "float32"
+    scale: float = 1
+
+    @property
+    def count(self) -> int:
+        """Return the width of the value in registers."""
+        return REGISTER_TYPES[self.type][1]
+
+
+@dataclass(frozen=True)
+class ReadRange:
+    """One contiguous register read."""
+
+    address: int
+    count: int
+
+    @property
+    def end(self) -> int:
+        """Return the first register after the range."""
+        return self.address + self.count
+
+
+def plan_reads(
+    registers: Iterable[MeterRegister],
+    max_count: int = MAX_READ_COUNT,
+    gaps: Iterable[tuple[int, int]] = (),
+) -> list[ReadRange]:
+    """Coalesce registers into the minimum number of contiguous reads.
+
+    Registers are merged while the read stays within ``max_count`` registers
+    and does not cross a ``(start, end)`` gap of registers the meter rejects.
+    Taking the registers in address order and extending the current read as
+    far as possible gives the minimum number of reads.
+    """
+    gaps = sorted(gaps)
+    reads: list[ReadRange] = []
+    start = end = None
+    for register in sorted(registers, key=lambda register: register.address):
+        register_end = register.address + register.count
+        if register.count > max_count:
+            raise ValueError(f"Register {register.address} exceeds {max_count} registers")
+        if start is not None and (
+            register_end - start <= max_count
+            and not _crosses_gap(gaps, end, register.address)
+        ):
+            end = max(end, register_end)
+            continue
+        if start is not None:
+            reads.append(ReadRange(start, end - start))
+        start, end = register.address, register_end
+    if start is not None:
+        reads.append(ReadRange(start, end - start))
+    return reads
+
+
+def _crosses_gap(gaps: Sequence[tuple[int, int]], end: int, address: int) -> bool:
+    """Return whether registers between ``end`` and ``address`` hit a gap."""
+    return any(start < address and end < stop for start, stop in gaps)
+
+
+class ReadPlan:
+    """A compiled set of reads and the decoder for their results.
+
+    Every read gets one struct format covering all of its values, with
+    padding for the registers in between, so a poll is decoded in one
+    ``unpack`` per read.
+    """
+
+    def __init__(
+        self,
+        registers: Iterable[MeterRegister],
+        max_count: int = MAX_READ_COUNT,
+        gaps: Iterable[tuple[int, int]] = (),
+    ) -> None:
+        """Plan the reads for a set of registers."""
+        self.registers = tuple(registers)
+        self.reads = plan_reads(self.registers, max_count, gaps)
+        self._decoders: list[
+            tuple[struct.Struct, struct.Struct, tuple[str, ...], tuple[float, ...]]
+        ] = []
+        for read in self.reads:
+            fields = sorted(
+                (
+                    register
+                    for register in self.registers
+                    if read.address <= register.address < read.end
+                ),
+                key=lambda register: register.address,
+            )
+            fmt = ">"
+            position = read.address
+            names = []
+            scales = []
+            for register in fields:
+                if register.address < position:
+                    raise ValueError(
+                        f"Register {register.address} ({register.name}) overlaps "
+                        "the previous register"
+                    )
+                if register.address > position:
+                    fmt += f"{2 * (register.address - position)}x"
+                fmt += REGISTER_TYPES[register.type][0]
+                position = register.address + register.count
+                names.append(register.name)
+                scales.append(register.scale)
+            if position < read.end:
+                fmt += f"{2 * (read.end - position)}x"
+            self._decoders.append(
+                (
+                    struct.Struct(f">{read.count}H"),
+                    struct.Struct(fmt),
+                    tuple(names),
+                    tuple(scales),
+                )
+            )
+
+    def __len__(self) -> int:
+        """Return the number of reads per poll."""
+        return len(self.reads)
+
+    def decode(self, results: Sequence[Sequence[int] | None]) -> dict[str, float]:
+        """Decode the registers of every read, in plan order.
+
+        A ``None`` result (failed read) leaves its values out.
+        """
+        values: dict[str, float] = {}
+        for registers, (words, fields, names, scales) in zip(results, self._decoders):
+            if registers is None:
+                continue
+            decoded = fields.unpack(words.pack(*registers))
+            for name, value, scale in zip(names, decoded, scales):
+                values[name] = value * scale if scale != 1 else value
+        return values
@@ -0,0 +1,266 @@
+"""WattNode register map for SolarEdge MeterProxy."""
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import dataclass
+from itertools import repeat
+import struct
+from typing import Any
+
+# Struct code and width in registers for every supported register type.
+# Blocks are packed little-endian: reading the packed bytes back as
+# little-endian 16-bit words yields big-endian words with the low word
+# first, which is the WattNode (and BinaryPayloadBuilder(Big, Little))
+# layout for 32-bit values.
+REGISTER_TYPES: dict[str, tuple[str, int]] = {
+    "float32": ("f", 2),
+    "int32": ("i", 2),
+    "uint32": ("I", 2),
+    "int16": ("h", 1),
+    "uint16": ("H", 1),
+}
+
+
+@dataclass(frozen=True)
+class RegisterField:
+    """A single value in a WattNode register block."""
+
+    name: str
+    offset: int
+    type: str = "float32"
+    scale: float = 1
+
+
+class RegisterBlock:
+    """A register block compiled into a single struct format.
+
+    The block owns a preallocated byte buffer and register list, so encoding
+    a full update is a single ``pack_into`` call and the result can be handed
+    to the datastore in one ``setValues`` call.
+    """
+
+    def __init__(
+        self, address: int, fields: Iterable[RegisterField], size: int | None = None
+    ) -> None:
+        """Compile the block layout."""
+        self.address = address
+        self.fields = tuple(sorted(fields, key=lambda field: field.offset))
+
+        fmt = "<"
+        position = 0
+        for field in self.fields:
+            code, width = REGISTER_TYPES[field.type]
+            if field.offset < position:
+                raise ValueError(
+                    f"Register {address + field.offset} ({field.name}) overlaps "
+                    "the previous field"
+                )
+            if field.offset > position:
+                fmt += f"{2 * (field.offset - position)}x"
+            fmt += code
+            position = field.offset + width
+
+        if size is not None:
+            if size < position:
+                raise ValueError(f"Block {address} needs at least {position} registers")
+            if size > position:
+                fmt += f"{2 * (size - position)}x"
+            position = size
+
+        self.size = position
+        self._struct = struct.Struct(fmt)
+        self._words = struct.Struct(f"<{position}H")
+        self._buffer = bytearray(self._struct.size)
+        self._registers = [0] * position
+
+        self._names = tuple(field.name for field in self.fields)
+        self._zeros = tuple(repeat(0, len(self._names)))
+        self._converters = tuple(_converter(field) for field in self.fields)
+        self._needs_conversion = any(
+            converter is not None for converter in self._converters
+        )
+
+        # Per-name field structs used to patch single values in place
+        self._patches: dict[str, list[tuple[struct.Struct, struct.Struct, int, Any]]] = {}
+        for field, converter in zip(self.fields, self._converters):
+            code, width = REGISTER_TYPES[field.type]
+            self._patches.setdefault(field.name, []).append(
+                (
+                    struct.Struct("<" + code),
+                    struct.Struct(f"<{width}H"),
+                    field.offset,
+                    converter,
+                )
+            )
+
+    @property
+    def registers(self) -> list[int]:
+        """Return the register values of the last encoded image."""
+        return self._registers
+
+    def encode(self, values: Mapping[str, float]) -> list[int]:
+        """Encode all fields and return the block's register values.
+
+        Missing values are encoded as zero. The returned list is reused by the
+        next call, so it must be consumed (e.g. written to the datastore)
+        before encoding again.
+        """
+        args = map(values.get, self._names, self._zeros)
+        if self._needs_conversion:
+            args = tuple(
+                converter(value) if converter else value
+                for converter, value in zip(self._converters, args)
+            )
+
+        self._struct.pack_into(self._buffer, 0, *args)
+        self._registers[:] = self._words.unpack_from(self._buffer)
+        return self._registers
+
+    def patch(self, name: str, value: float) -> list[tuple[int, list[int]]]:
+        """Encode a single value in place.
+
+        Returns the ``(address, registers)`` pairs that have to be written to
+        the datastore, one for every place the value is served.
+        """
+        writes = []
+        for field_struct, words, offset, converter in self._patches.get(name, ()):
+            field_struct.pack_into(
+                self._buffer, 2 * offset, converter(value) if converter else value
+            )
+            registers = list(words.unpack_from(self._buffer, 2 * offset))
+            self._registers[offset : offset + len(registers)] = registers
+            writes.append((self.address + offset, registers))
+        return writes
+
+    def __contains__(self, name: str) -> bool:
+        """Return whether the block serves a value with this name."""
+        return name in self._patches
+
+
+def _converter(field: RegisterField) -> Callable[[float], float] | None:
+    """Return the conversion needed before packing a field, if any."""
+    if field.type == "float32":
+        if field.scale == 1:
+            return None
+        return lambda value, scale=field.scale: value * scale
+    return lambda value, scale=field.scale: int(round(value * scale))
+
+
+# Primary registers (1000-1099)
+WATTNODE_BLOCK_1000 = (
+    RegisterField("energy_active", 0),  # total active energy
+    RegisterField("import_energy_active", 2),  # imported active energy
+    RegisterField("energy_active", 4),  # total active energy non-reset
+    RegisterField("import_energy_active", 6),  # imported active energy non-reset
+    RegisterField("power_active", 8),  # total power
+    RegisterField("l1_power_active", 10),  # power l1
+    RegisterField("l2_power_active", 12),  # power l2
+    RegisterField("l3_power_active", 14),  # power l3
+    RegisterField("voltage_ln", 16),  # l-n voltage
+    RegisterField("l1n_voltage", 18),  # l1-n voltage
+    RegisterField("l2n_voltage", 20),  # l2-n voltage
+    RegisterField("l3n_voltage", 22),  # l3-n voltage
+    RegisterField("voltage_ll", 24),  # l-l voltage
+    RegisterField("l12_voltage", 26),  # l1-l2 voltage
+    RegisterField("l23_voltage", 28),  # l2-l3 voltage
+    RegisterField("l31_voltage", 30),  # l3-l1 voltage
+    RegisterField("frequency", 32),  # line frequency
+)
+
+# Extended registers (1100-1199)
+WATTNODE_BLOCK_1100 = (
+    RegisterField("l1_energy_active", 0),  # total active energy l1
+    RegisterField("l2_energy_active", 2),  # total active energy l2
+    RegisterField("l3_energy_active", 4),  # total active energy l3
+    RegisterField("l1_import_energy_active", 6),  # import energy l1
+    RegisterField("l2_import_energy_active", 8),  # import energy l2
+    RegisterField("l3_import_energy_active", 10),  # import energy l3
+    RegisterField("export_energy_active", 12),  # export energy
+    RegisterField("l1_export_energy_active", 14),  # export energy l1
+    RegisterField("l2_export_energy_active", 16),  # export energy l2
+    RegisterField("l3_export_energy_active", 18),  # export energy l3
+    RegisterField("energy_reactive", 20),  # total reactive energy
+    RegisterField("l1_energy_reactive", 22),  # reactive energy l1
+    RegisterField("l2_energy_reactive", 24),  # reactive energy l2
+    RegisterField("l3_energy_reactive", 26),  # reactive energy l3
+    RegisterField("energy_apparent", 28),  # total apparent energy
+    RegisterField("l1_energy_apparent", 30),  # apparent energy l1
+    RegisterField("l2_energy_apparent", 32),  # apparent energy l2
+    RegisterField("l3_energy_apparent", 34),  # apparent energy l3
+    RegisterField("power_factor", 36),  # power factor
+    RegisterField("l1_power_factor", 38),  # power factor l1
+    RegisterField("l2_power_factor", 40),  # power factor l2
+    RegisterField("l3_power_factor", 42),  # power factor l3
+    RegisterField("power_reactive", 44),  # total reactive power
+    RegisterField("l1_power_reactive", 46),  # reactive power l1
+    RegisterField("l2_power_reactive", 48),  # reactive power l2
+    RegisterField("l3_power_reactive", 50),  # reactive power l3
+    RegisterField("power_apparent", 52),  # total apparent power
+    RegisterField("l1_power_apparent", 54),  # apparent power l1
+    RegisterField("l2_power_apparent", 56),  # apparent power l2
+    RegisterField("l3_power_apparent", 58),  # apparent power l3
+    RegisterField("l1_current", 60),  # current l1
+    RegisterField("l2_current", 62),  # current l2
+    RegisterField("l3_current", 64),  # current l3
+    RegisterField("demand_power_active", 66),  # demand power
+    RegisterField("minimum_demand_power_active", 68),  # minimum demand power
+    RegisterField("maximum_demand_power_active", 70),  # maximum demand power
+    RegisterField("demand_power_apparent", 72),  # apparent demand power
+    RegisterField("l1_demand_power_active", 74),  # demand power l1
+    RegisterField("l2_demand_power_active", 76),  # demand power l2
+    RegisterField("l3_demand_power_active", 78),  # demand power l3
+)
+
+# Configuration registers (1600-1649)
+WATTNODE_BLOCK_1600 = (
+    RegisterField("config_passcode", 0, "int32"),
+    RegisterField("ct_current", 2, "int16"),  # ct rated current
+    RegisterField("ct_current_l1", 3, "int16"),
+    RegisterField("ct_current_l2", 4, "int16"),
+    RegisterField("ct_current_l3", 5, "int16"),
+    RegisterField("ct_inverted", 6, "int16"),  # ct direction inversion
+    RegisterField("measurement_averaging", 7, "int16"),
+    RegisterField("power_scale", 8, "int16"),
+    RegisterField("demand_period", 9, "int16"),
+    RegisterField("demand_subintervals", 10, "int16"),
+    RegisterField("power_energy_adjustment_l1", 11, "int16"),
+    RegisterField("power_energy_adjustment_l2", 12, "int16"),
+    RegisterField("power_energy_adjustment_l3", 13, "int16"),
+    RegisterField("ct_phase_angle_adjustment_l1", 14, "int16"),
+    RegisterField("ct_phase_angle_adjustment_l2", 15, "int16"),
+    RegisterField("ct_phase_angle_adjustment_l3", 16, "int16"),
+    RegisterField("minimum_power_reading", 17, "int16"),
+    RegisterField("phase_offset", 18, "int16"),
+    RegisterField("reset_energy", 19, "int16"),
+    RegisterField("reset_demand", 20, "int16"),
+    RegisterField("voltage_scale", 21, "int16"),
+    RegisterField("current_scale", 22, "int16"),
+    RegisterField("io_pin_mode", 23, "int16"),
+)
+
+# Communication settings (1650-1699)
+WATTNODE_BLOCK_1650 = (
+    RegisterField("apply_config", 0, "int16"),
+    RegisterField("modbus_address", 1, "int16"),
+    RegisterField("baud_rate", 2, "int16"),
+    RegisterField("parity_mode", 3, "int16"),
+    RegisterField("modbus_mode", 4, "int16"),
+    RegisterField("message_delay", 5, "int16"),
+)
+
+# Device information (1700-1799), followed by eight error status registers
+WATTNODE_BLOCK_1700 = (
+    RegisterField("serial_number", 0, "int32"),
+    RegisterField("uptime", 2, "int32"),  # uptime (s)
+    RegisterField("total_uptime", 4, "int32"),  # total uptime (s)
+    RegisterField("wattnode_model", 6, "int16"),
+    RegisterField("firmware_version", 7, "int16"),
+    RegisterField("wattnode_options", 8, "int16"),
+    RegisterField("error_status", 9, "int16"),
+    RegisterField("power_fail_count", 10, "int16"),
+    RegisterField("crc_error_count", 11, "int16"),
+    RegisterField("frame_error_count", 12, "int16"),
+    RegisterField("packet_error_count", 13, "int16"),
+    RegisterField("overrun_count", 14, "int16"),
+)
+WATTNODE_BLOCK_1700_SIZE = 23
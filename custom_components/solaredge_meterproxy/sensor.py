@@ -1,6 +1,8 @@
 """Sensor platform for SolarEdge MeterProxy integration."""
 from __future__ import annotations
 
+from collections.abc import Callable
+
 from homeassistant.components.sensor import (
     SensorDeviceClass,
     SensorEntity,
@@ -8,25 +10,58 @@ from homeassistant.components.sensor import (
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
+    EntityCategory,
     UnitOfElectricCurrent,
     UnitOfElectricPotential,
     UnitOfEnergy,
     UnitOfFrequency,
     UnitOfPower,
+    UnitOfTime,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import CONF_SENSOR_DEADBAND, DEFAULT_SENSOR_DEADBAND, DOMAIN
+from .coordinator import SolarEdgeMeterProxyCoordinator
+from .metrics import ProxyMetrics
+
+# Changes below the displayed precision are never written
+SENSOR_RESOLUTIONS = {
+    SensorDeviceClass.POWER: 1.0,
+    SensorDeviceClass.VOLTAGE: 0.1,
+    SensorDeviceClass.CURRENT: 0.01,
+    SensorDeviceClass.FREQUENCY: 0.01,
+}
+
 
-from .const import DOMAIN
+def exceeds_deadband(
+    written: float | None, value: float, deadband: float, resolution: float
+) -> bool:
+    """Return whether a value moved far enough from the written one.
 
+    ``deadband`` is relative to the written value, ``resolution`` is the
+    smallest absolute change that counts.
+    """
+    if written is None:
+        return True
+    return abs(value - written) >= max(resolution, deadband * abs(written), 1e-9)
 
-class P1MeterProxySensor(SensorEntity):
-    """Representation of a P1 meter proxy sensor."""
+
+class P1MeterProxySensor(
+    CoordinatorEntity[SolarEdgeMeterProxyCoordinator], SensorEntity
+):
+    """Representation of a P1 meter proxy sensor.
+
+    The value is taken from each coordinator snapshot once, and the state is
+    only written when it moved beyond the deadband since the last write.
+    """
 
     def __init__(
         self,
         hass: HomeAssistant,
         entry: ConfigEntry,
+        coordinator: SolarEdgeMeterProxyCoordinator,
         sensor_key: str,
         name: str,
         unit: str,
@@ -34,110 +69,178 @@ class P1MeterProxySensor(SensorEntity):
         state_class: SensorStateClass | None = None,
     ) -> None:
         """Initialize the sensor."""
+        super().__init__(coordinator)
         self.hass = hass
         self._entry = entry
         self._sensor_key = sensor_key
-        self._name = name
-        self._unit = unit
-        self._device_class = device_class
-        self._state_class = state_class
+        self._attr_name = f"SolarEdge MeterProxy {name}"
+        self._attr_native_unit_of_measurement = unit
+        self._attr_device_class = device_class
+        self._attr_state_class = state_class
         self._attr_unique_id = f"{entry.entry_id}_{sensor_key}"
+        self._deadband = (
+            entry.data.get(CONF_SENSOR_DEADBAND, DEFAULT_SENSOR_DEADBAND) / 100
+        )
+        self._resolution = SENSOR_RESOLUTIONS.get(device_class, 0.0)
+        self._attr_native_value = self._snapshot_value()
+        self._written_available = True
 
-    @property
-    def name(self) -> str:
-        """Return the name of the sensor."""
-        return f"SolarEdge MeterProxy {self._name}"
+    def _snapshot_value(self) -> float:
+        """Get the value served for this sensor key from the coordinator."""
+        return (self.coordinator.data or {}).get(self._sensor_key, 0.0)
 
-    @property
-    def device_class(self) -> SensorDeviceClass | None:
-        """Return the device class."""
-        return self._device_class
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state if the value left the deadband or availability changed."""
+        value = self._snapshot_value()
+        available = self.available
+        if available == self._written_available and not exceeds_deadband(
+            self._attr_native_value, value, self._deadband, self._resolution
+        ):
+            return
+        self._attr_native_value = value
+        self._written_available = available
+        self.async_write_ha_state()
 
     @property
-    def state_class(self) -> SensorStateClass | None:
-        """Return the state class."""
-        return self._state_class
+    def device_info(self):
+        """Return device information."""
+        return {
+            "identifiers": {(DOMAIN, self._entry.entry_id)},
+            "name": "SolarEdge MeterProxy",
+            "manufacturer": "SolarEdge MeterProxy",
+            "model": "P1 Virtual Meter",
+            "sw_version": "1.0.2",
+        }
 
-    @property
-    def native_unit_of_measurement(self) -> str:
-        """Return the unit of measurement."""
-        return self._unit
+
+class ProxyMetricSensor(SensorEntity):
+    """Diagnostic sensor exposing a Modbus proxy metric."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(
+        self,
+        entry: ConfigEntry,
+        metrics: ProxyMetrics,
+        sensor_key: str,
+        name: str,
+        unit: str | None,
+        value_fn: Callable[[ProxyMetrics], float | None],
+        state_class: SensorStateClass | None = SensorStateClass.MEASUREMENT,
+    ) -> None:
+        """Initialize the sensor."""
+        self._entry = entry
+        self._metrics = metrics
+        self._value_fn = value_fn
+        self._attr_name = f"SolarEdge MeterProxy {name}"
+        self._attr_unique_id = f"{entry.entry_id}_{sensor_key}"
+        self._attr_native_unit_of_measurement = unit
+        self._attr_state_class = state_class
 
     @property
     def native_value(self) -> float | None:
-        """Return the current value."""
-        return self._get_p1_value()
-
-    def _get_p1_value(self) -> float:
-        """Get value from P1 entity based on sensor key."""
-        config = self._entry.data
-        
-        # Map sensor keys to P1 entity config keys
-        entity_mapping = {
-            "power_active": "p1_power_entity",
-            "l1_power_active": "p1_power_l1_entity", 
-            "l2_power_active": "p1_power_l2_entity",
-            "l3_power_active": "p1_power_l3_entity",
-            "l1n_voltage": "p1_voltage_l1_entity",
-            "l2n_voltage": "p1_voltage_l2_entity",
-            "l3n_voltage": "p1_voltage_l3_entity",
-            "l1_current": "p1_current_l1_entity",
-            "l2_current": "p1_current_l2_entity", 
-            "l3_current": "p1_current_l3_entity",
-        }
-        
-        entity_config_key = entity_mapping.get(self._sensor_key)
-        if not entity_config_key:
-            # For unmapped sensors, return calculated or default values
-            if self._sensor_key == "voltage_ln":
-                # Return average voltage
-                v1 = self._get_entity_value(config.get("p1_voltage_l1_entity"))
-                v2 = self._get_entity_value(config.get("p1_voltage_l2_entity"))  
-                v3 = self._get_entity_value(config.get("p1_voltage_l3_entity"))
-                voltages = [v for v in [v1, v2, v3] if v > 0]
-                return sum(voltages) / len(voltages) if voltages else 230.0
-            elif self._sensor_key == "frequency":
-                return 50.0  # Standard EU frequency
-            return 0.0
-            
-        entity_id = config.get(entity_config_key)
-        return self._get_entity_value(entity_id)
-
-    def _get_entity_value(self, entity_id: str | None) -> float:
-        """Get numeric value from Home Assistant entity."""
-        if not entity_id:
-            return 0.0
-            
-        try:
-            state = self.hass.states.get(entity_id)
-            if state and state.state not in ["unknown", "unavailable"]:
-                return float(state.state)
-        except (ValueError, TypeError):
-            pass
-        
-        return 0.0
+        """Return the current metric value."""
+        value = self._value_fn(self._metrics)
+        return round(value, 3) if value is not None else None
 
     @property
     def device_info(self):
         """Return device information."""
         return {
             "identifiers": {(DOMAIN, self._entry.entry_id)},
-            "name": "SolarEdge MeterProxy",
-            "manufacturer": "SolarEdge MeterProxy",
-            "model": "P1 Virtual Meter",
-            "sw_version": "1.0.2",
         }
 
 
+def _metric_sensors(entry: ConfigEntry, metrics: ProxyMetrics) -> list[ProxyMetricSensor]:
+    """Create the diagnostic sensors for the Modbus proxy metrics."""
+    return [
+        ProxyMetricSensor(
+            entry,
+            metrics,
+            "modbus_request_rate",
+            "Modbus Requests per Second",
+            "req/s",
+            lambda metrics: metrics.request_rate(),
+        ),
+        ProxyMetricSensor(
+            entry,
+            metrics,
+            "modbus_latency_p50",
+            "Modbus Response Latency p50",
+            UnitOfTime.MILLISECONDS,
+            lambda metrics: _ms(metrics.latency_percentile(50)),
+        ),
+        ProxyMetricSensor(
+            entry,
+            metrics,
+            "modbus_latency_p99",
+            "Modbus Response Latency p99",
+            UnitOfTime.MILLISECONDS,
+            lambda metrics: _ms(metrics.latency_percentile(99)),
+        ),
+        ProxyMetricSensor(
+            entry,
+            metrics,
+            "modbus_exceptions",
+            "Modbus Exceptions",
+            None,
+            lambda metrics: metrics.exception_count,
+            SensorStateClass.TOTAL_INCREASING,
+        ),
+        ProxyMetricSensor(
+            entry,
+            metrics,
+            "register_snapshot_age",
+            "Register Snapshot Age",
+            UnitOfTime.SECONDS,
+            lambda metrics: metrics.snapshot_age,
+        ),
+        ProxyMetricSensor(
+            entry,
+            metrics,
+            "register_update_duration",
+            "Register Update Duration",
+            UnitOfTime.MILLISECONDS,
+            lambda metrics: _ms(metrics.last_update_duration),
+        ),
+        ProxyMetricSensor(
+            entry,
+            metrics,
+            "source_data_age",
+            "Source Data Age",
+            UnitOfTime.SECONDS,
+            lambda metrics: metrics.source_age,
+        ),
+        ProxyMetricSensor(
+            entry,
+            metrics,
+            "stale_data_transitions",
+            "Stale Data Transitions",
+            None,
+            lambda metrics: metrics.stale_transitions,
+            SensorStateClass.TOTAL_INCREASING,
+        ),
+    ]
+
+
+def _ms(seconds: float | None) -> float | None:
+    """Convert seconds to milliseconds."""
+    return seconds * 1000 if seconds is not None else None
+
+
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
 ) -> None:
     """Set up SolarEdge MeterProxy sensors from a config entry."""
-    
+    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+
     entities = [
         P1MeterProxySensor(
             hass,
             entry,
+            coordinator,
             "power_active",
             "Total Active Power",
             UnitOfPower.WATT,
@@ -147,6 +250,7 @@ async def async_setup_entry(
         P1MeterProxySensor(
             hass,
             entry,
+            coordinator,
             "l1_power_active",
             "L1 Active Power",
             UnitOfPower.WATT,
@@ -156,6 +260,7 @@ async def async_setup_entry(
         P1MeterProxySensor(
             hass,
             entry,
+            coordinator,
             "l2_power_active",
             "L2 Active Power",
             UnitOfPower.WATT,
@@ -165,6 +270,7 @@ async def async_setup_entry(
         P1MeterProxySensor(
             hass,
             entry,
+            coordinator,
             "l3_power_active",
             "L3 Active Power",
             UnitOfPower.WATT,
@@ -174,6 +280,7 @@ async def async_setup_entry(
         P1MeterProxySensor(
             hass,
             entry,
+            coordinator,
             "voltage_ln",
             "Line to Neutral Voltage",
             UnitOfElectricPotential.VOLT,
@@ -183,6 +290,7 @@ async def async_setup_entry(
         P1MeterProxySensor(
             hass,
             entry,
+            coordinator,
             "l1n_voltage",
             "L1-N Voltage",
             UnitOfElectricPotential.VOLT,
@@ -192,6 +300,7 @@ async def async_setup_entry(
         P1MeterProxySensor(
             hass,
             entry,
+            coordinator,
             "l2n_voltage",
             "L2-N Voltage",
             UnitOfElectricPotential.VOLT,
@@ -201,6 +310,7 @@ async def async_setup_entry(
         P1MeterProxySensor(
             hass,
             entry,
+            coordinator,
             "l3n_voltage",
             "L3-N Voltage",
             UnitOfElectricPotential.VOLT,
@@ -210,6 +320,7 @@ async def async_setup_entry(
         P1MeterProxySensor(
             hass,
             entry,
+            coordinator,
             "l1_current",
             "L1 Current",
             UnitOfElectricCurrent.AMPERE,
@@ -219,6 +330,7 @@ async def async_setup_entry(
         P1MeterProxySensor(
             hass,
             entry,
+            coordinator,
             "l2_current",
             "L2 Current",
             UnitOfElectricCurrent.AMPERE,
@@ -228,6 +340,7 @@ async def async_setup_entry(
         P1MeterProxySensor(
             hass,
             entry,
+            coordinator,
             "l3_current",
             "L3 Current",
             UnitOfElectricCurrent.AMPERE,
@@ -237,6 +350,7 @@ async def async_setup_entry(
         P1MeterProxySensor(
             hass,
             entry,
+            coordinator,
             "frequency",
             "Line Frequency",
             UnitOfFrequency.HERTZ,
@@ -245,4 +359,8 @@ async def async_setup_entry(
         ),
     ]
 
+    modbus_server = hass.data[DOMAIN][entry.entry_id].get("modbus_server")
+    if modbus_server is not None:
+        entities.extend(_metric_sensors(entry, modbus_server.metrics))
+
     async_add_entities(entities)
\ No newline at end of file
@@ -0,0 +1,220 @@
+"""Cached P1 entity state for SolarEdge MeterProxy."""
+from __future__ import annotations
+
+from collections.abc import Callable, Mapping
+import logging
+import math
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, State, callback
+from homeassistant.helpers.event import async_track_state_change_event
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CONF_P1_CURRENT_L1_ENTITY,
+    CONF_P1_CURRENT_L2_ENTITY,
+    CONF_P1_CURRENT_L3_ENTITY,
+    CONF_P1_EXPORT_ENERGY_T1_ENTITY,
+    CONF_P1_EXPORT_ENERGY_T2_ENTITY,
+    CONF_P1_IMPORT_ENERGY_T1_ENTITY,
+    CONF_P1_IMPORT_ENERGY_T2_ENTITY,
+    CONF_P1_POWER_ENTITY,
+    CONF_P1_POWER_L1_ENTITY,
+    CONF_P1_POWER_L2_ENTITY,
+    CONF_P1_POWER_L3_ENTITY,
+    CONF_P1_VOLTAGE_L1_ENTITY,
+    CONF_P1_VOLTAGE_L2_ENTITY,
+    CONF_P1_VOLTAGE_L3_ENTITY,
+    CONF_PHASE_OFFSET,
+    DEFAULT_PHASE_OFFSET,
+    P1_ENTITY_KEYS,
+)
+from .derived import (
+    INPUT_CURRENT,
+    INPUT_POWER,
+    INPUT_POWER_TOTAL,
+    INPUT_VOLTAGE,
+    DerivedQuantities,
+    meter_derivations,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# P1 entities that are written with every telegram
+POWER_ENTITY_KEYS = (
+    CONF_P1_POWER_ENTITY,
+    CONF_P1_POWER_L1_ENTITY,
+    CONF_P1_POWER_L2_ENTITY,
+    CONF_P1_POWER_L3_ENTITY,
+)
+
+
+class P1StateCache:
+    """Parsed P1 entity values for one config entry.
+
+    Entity ids are resolved from the config entry once, values are parsed
+    once per state change, and the derived meter data is computed at most
+    once per change and shared by the Modbus server and the sensors.
+    """
+
+    def __init__(self, hass: HomeAssistant, config: Mapping[str, Any]) -> None:
+        """Initialize the cache."""
+        self.hass = hass
+        self._keys_by_entity: dict[str, list[str]] = {}
+        for key in P1_ENTITY_KEYS:
+            if entity_id := config.get(key):
+                self._keys_by_entity.setdefault(entity_id, []).append(key)
+        self._power_entity_ids = {
+            config[key] for key in POWER_ENTITY_KEYS if config.get(key)
+        }
+
+        self._values: dict[str, float] = dict.fromkeys(P1_ENTITY_KEYS, 0.0)
+        self._meter_data: dict[str, float] | None = None
+        self._quantities = DerivedQuantities(
+            meter_derivations(config.get(CONF_PHASE_OFFSET, DEFAULT_PHASE_OFFSET))
+        )
+        self._listeners: list[Callable[[], None]] = []
+        self._unsub: CALLBACK_TYPE | None = None
+
+    @property
+    def entity_ids(self) -> list[str]:
+        """Return the configured P1 entity ids."""
+        return list(self._keys_by_entity)
+
+    @property
+    def meter_data(self) -> dict[str, float]:
+        """Return the meter data derived from the current P1 values."""
+        if self._meter_data is None:
+            self._meter_data = derive_meter_data(self._values, self._quantities)
+        return self._meter_data
+
+    def data_age(self) -> float | None:
+        """Return the seconds since a P1 power entity was last written.
+
+        The most recently written power entity counts, as phases may keep
+        the same value for long. The age is infinite while all of them are
+        unavailable, and None without power entities.
+        """
+        if not self._power_entity_ids:
+            return None
+        now = dt_util.utcnow()
+        age = math.inf
+        for entity_id in self._power_entity_ids:
+            state = self.hass.states.get(entity_id)
+            if state is None or state.state in ("unknown", "unavailable"):
+                continue
+            # Writes of an unchanged state only move last_reported (2024.4+)
+            written = getattr(state, "last_reported", None) or state.last_updated
+            age = min(age, (now - written).total_seconds())
+        return age
+
+    def get(self, key: str) -> float:
+        """Return the parsed value for a P1 entity config key."""
+        return self._values.get(key, 0.0)
+
+    @callback
+    def async_start(self) -> None:
+        """Read the current states and follow their changes."""
+        for entity_id in self._keys_by_entity:
+            self._update(entity_id, self.hass.states.get(entity_id))
+        if self._keys_by_entity:
+            self._unsub = async_track_state_change_event(
+                self.hass, self.entity_ids, self._async_state_changed
+            )
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop following state changes."""
+        if self._unsub:
+            self._unsub()
+            self._unsub = None
+        self._listeners.clear()
+
+    @callback
+    def async_add_listener(self, update_callback: Callable[[], None]) -> CALLBACK_TYPE:
+        """Call back after every applied state change."""
+        self._listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            if update_callback in self._listeners:
+                self._listeners.remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def _async_state_changed(self, event: Event) -> None:
+        """Parse a changed P1 state and notify listeners."""
+        if not self._update(event.data["entity_id"], event.data.get("new_state")):
+            return
+        for update_callback in list(self._listeners):
+            update_callback()
+
+    def _update(self, entity_id: str, state: State | None) -> bool:
+        """Store the parsed state of an entity, return whether it changed."""
+        value = _parse_state(entity_id, state)
+        changed = False
+        for key in self._keys_by_entity.get(entity_id, ()):
+            if self._values[key] != value:
+                self._values[key] = value
+                changed = True
+        if changed:
+            self._meter_data = None
+        return changed
+
+
+def _parse_state(entity_id: str, state: State | None) -> float:
+    """Parse an entity state to a float, 0.0 when unavailable."""
+    if state is None or state.state in ("unknown", "unavailable"):
+        return 0.0
+    try:
+        return float(state.state)
+    except (ValueError, TypeError):
+        _LOGGER.warning("Could not convert %s state to float: %s", entity_id, state.state)
+        return 0.0
+
+
+def derive_meter_data(
+    values: Mapping[str, float], quantities: DerivedQuantities | None = None
+) -> dict[str, float]:
+    """Derive the served meter values from the raw P1 values.
+
+    Pass the ``quantities`` of the previous call to only recompute what the
+    changed values affect.
+    """
+    if quantities is None:
+        quantities = DerivedQuantities()
+    meter_data = quantities.update(
+        {
+            INPUT_POWER_TOTAL: values[CONF_P1_POWER_ENTITY],
+            INPUT_POWER: (
+                values[CONF_P1_POWER_L1_ENTITY],
+                values[CONF_P1_POWER_L2_ENTITY],
+                values[CONF_P1_POWER_L3_ENTITY],
+            ),
+            INPUT_VOLTAGE: (
+                values[CONF_P1_VOLTAGE_L1_ENTITY],
+                values[CONF_P1_VOLTAGE_L2_ENTITY],
+                values[CONF_P1_VOLTAGE_L3_ENTITY],
+            ),
+            INPUT_CURRENT: (
+                values[CONF_P1_CURRENT_L1_ENTITY],
+                values[CONF_P1_CURRENT_L2_ENTITY],
+                values[CONF_P1_CURRENT_L3_ENTITY],
+            ),
+        }
+    )
+    meter_data["frequency"] = 50.0  # Standard EU frequency
+
+    # Cumulative tariff totals (kWh); the energy accumulator fills in between
+    imported = values.get(CONF_P1_IMPORT_ENERGY_T1_ENTITY, 0.0) + values.get(
+        CONF_P1_IMPORT_ENERGY_T2_ENTITY, 0.0
+    )
+    exported = values.get(CONF_P1_EXPORT_ENERGY_T1_ENTITY, 0.0) + values.get(
+        CONF_P1_EXPORT_ENERGY_T2_ENTITY, 0.0
+    )
+    if imported > 0:
+        meter_data["import_energy_active"] = imported
+    if exported > 0:
+        meter_data["export_energy_active"] = exported
+    return meter_data
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""Load test a SolarEdge MeterProxy listener with concurrent Modbus clients.
+
+Every client polls like a SolarEdge inverter: both value pages (1000-1199)
+on every poll, the configuration and device information pages (1600-1799)
+once every few polls. Clients start at random offsets within one poll
+interval, so they don't run in lockstep:
+
+    python scripts/loadtest.py --host 127.0.0.1 --port 5502 --clients 16
+
+The report shows the throughput, response latency percentiles and the error
+rate per kind of error. Only pymodbus is needed, not Home Assistant.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import Counter
+from dataclasses import dataclass, field
+import json
+import math
+import random
+import sys
+import time
+from typing import Any
+
+from pymodbus.client import AsyncModbusTcpClient
+
+# Reads of every poll: the basic and advanced value pages
+VALUE_READS = ((1000, 100), (1100, 100))
+# Configuration and device information, read once every CONFIG_EVERY polls
+CONFIG_READS = ((1600, 100), (1700, 100))
+CONFIG_EVERY = 10
+
+
+@dataclass
+class LoadReport:
+    """Throughput, latency and errors of a load test."""
+
+    clients: int = 0
+    requests: int = 0
+    duration: float = 0.0
+    latencies: list[float] = field(default_factory=list)
+    errors: Counter[str] = field(default_factory=Counter)
+
+    def latency_percentile(self, percentile: float) -> float | None:
+        """Return a response latency percentile in seconds (nearest rank)."""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        rank = max(math.ceil(percentile / 100 * len(ordered)), 1)
+        return ordered[rank - 1]
+
+    @property
+    def error_rate(self) -> float:
+        """Return the share of requests that failed."""
+        return sum(self.errors.values()) / self.requests if self.requests else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the report in a JSON serialisable form."""
+        return {
+            "clients": self.clients,
+            "requests": self.requests,
+            "duration_s": round(self.duration, 3),
+            "requests_per_second": (
+                round(self.requests / self.duration, 1) if self.duration else None
+            ),
+            "latency_p50_ms": _milliseconds(self.latency_percentile(50)),
+            "latency_p95_ms": _milliseconds(self.latency_percentile(95)),
+            "latency_p99_ms": _milliseconds(self.latency_percentile(99)),
+            "latency_max_ms": _milliseconds(max(self.latencies, default=None)),
+            "error_rate": round(self.error_rate, 4),
+            "errors": dict(self.errors),
+        }
+
+
+async def _async_client(
+    report: LoadReport,
+    host: str,
+    port: int,
+    unit_id: int,
+    interval: float,
+    deadline: float,
+    timeout: float,
+) -> None:
+    """Poll until the deadline from one connection, like one inverter."""
+    client = AsyncModbusTcpClient(host, port=port, timeout=timeout, retries=0)
+    await asyncio.sleep(random.uniform(0, interval))
+    polls = 0
+    try:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            reads = VALUE_READS
+            if polls % CONFIG_EVERY == 0:
+                reads += CONFIG_READS
+            polls += 1
+            for address, count in reads:
+                await _async_read(report, client, address, count, unit_id)
+            if interval:
+                await asyncio.sleep(
+                    max(interval - (time.perf_counter() - started), 0)
+                )
+    finally:
+        client.close()
+
+
+async def _async_read(
+    report: LoadReport, client, address: int, count: int, unit_id: int
+) -> None:
+    """Send one read and record its latency or error."""
+    report.requests += 1
+    sent = time.perf_counter()
+    try:
+        if not client.connected and not await client.connect():
+            report.errors["connect"] += 1
+            await asyncio.sleep(0.1)
+            return
+        response = await client.read_holding_registers(address, count, slave=unit_id)
+    except Exception as ex:  # pylint: disable=broad-except
+        report.errors[type(ex).__name__] += 1
+        return
+    report.latencies.append(time.perf_counter() - sent)
+    if response.isError():
+        report.errors[f"exception {response.exception_code}"] += 1
+
+
+async def async_load_test(
+    host: str,
+    port: int,
+    clients: int,
+    duration: float,
+    unit_id: int = 2,
+    interval: float = 0.5,
+    timeout: float = 3.0,
+) -> LoadReport:
+    """Poll a listener from ``clients`` connections for ``duration`` seconds.
+
+    ``interval`` is the time between the polls of one client; 0 polls as
+    fast as the listener answers.
+    """
+    report = LoadReport(clients=clients)
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(
+            _async_client(
+                report, host, port, unit_id, interval, started + duration, timeout
+            )
+            for _ in range(clients)
+        )
+    )
+    report.duration = time.perf_counter() - started
+    return report
+
+
+def _milliseconds(seconds: float | None) -> float | None:
+    """Convert seconds to rounded milliseconds."""
+    if seconds is None:
+        return None
+    return round(seconds * 1000, 3)
+
+
+def main() -> int:
+    """Parse the command line and run the load test."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5502)
+    parser.add_argument("--unit", type=int, default=2, help="unit id to poll")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.5,
+        help="seconds between the polls of a client, 0 for as fast as possible",
+    )
+    parser.add_argument("--timeout", type=float, default=3.0)
+    args = parser.parse_args()
+    report = asyncio.run(
+        async_load_test(
+            args.host,
+            args.port,
+            args.clients,
+            args.duration,
+            args.unit,
+            args.interval,
+            args.timeout,
+        )
+    )
+    print(json.dumps(report.as_dict(), indent=2))
+    return 1 if report.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Replay a SolarEdge MeterProxy Modbus capture against a running proxy.
+
+The capture files are written by the proxy when a capture size is
+configured, to ``<config>/solaredge_meterproxy/capture_<entry id>.bin``
+with the previous file as ``.bin.1``. Pass the files oldest first:
+
+    python scripts/replay_capture.py capture_x.bin.1 capture_x.bin \\
+        --host 127.0.0.1 --port 5502 --speed max --json report.json
+
+The report shows throughput and response latency percentiles, and every
+served register that differs from the capture, so the same capture
+replayed against two versions shows both performance and value changes.
+Only pymodbus is needed, not Home Assistant.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib.util
+import itertools
+import json
+from pathlib import Path
+import sys
+
+from pymodbus.client import AsyncModbusTcpClient
+from pymodbus.transaction import ModbusRtuFramer, ModbusSocketFramer
+
+CAPTURE_MODULE = (
+    Path(__file__).resolve().parents[1]
+    / "custom_components"
+    / "solaredge_meterproxy"
+    / "capture.py"
+)
+
+
+def _load_capture():
+    """Import the capture module without importing the integration."""
+    spec = importlib.util.spec_from_file_location("semp_capture", CAPTURE_MODULE)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+capture = _load_capture()
+
+
+def _speed(value: str) -> float | None:
+    """Parse the replay speed, ``max`` sends requests back to back."""
+    if value == "max":
+        return None
+    speed = float(value)
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be positive or max")
+    return speed
+
+
+async def _async_main(args: argparse.Namespace) -> int:
+    """Replay the captures and print the report."""
+    records = itertools.chain.from_iterable(
+        capture.read_capture(path) for path in args.captures
+    )
+    if args.list:
+        for record in records:
+            print(record)
+        return 0
+
+    client = AsyncModbusTcpClient(
+        args.host,
+        port=args.port,
+        framer=ModbusRtuFramer if args.rtu_over_tcp else ModbusSocketFramer,
+        timeout=args.timeout,
+        retries=0,
+    )
+    if not await client.connect():
+        print(f"Could not connect to {args.host}:{args.port}", file=sys.stderr)
+        return 1
+    try:
+        report = await capture.async_replay(client, records, args.speed, args.unit)
+    finally:
+        client.close()
+
+    result = report.as_dict()
+    print(json.dumps(result, indent=2))
+    if args.json:
+        Path(args.json).write_text(json.dumps(result, indent=2) + "\n")
+    return 0
+
+
+def main() -> int:
+    """Parse the command line and run the replay."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("captures", nargs="+", help="capture files, oldest first")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5502)
+    parser.add_argument(
+        "--rtu-over-tcp", action="store_true", help="use RTU framing over TCP"
+    )
+    parser.add_argument(
+        "--speed",
+        type=_speed,
+        default=1.0,
+        help="replay speed, 1 keeps the captured timing, max sends back to back",
+    )
+    parser.add_argument("--unit", type=int, help="send to this unit id instead")
+    parser.add_argument("--timeout", type=float, default=3.0)
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument(
+        "--list", action="store_true", help="print the captured records only"
+    )
+    return asyncio.run(_async_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
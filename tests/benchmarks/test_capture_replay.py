@@ -0,0 +1,71 @@
+"""Benchmark replaying a captured Modbus session against a local listener.
+
+A SolarEdge poll pattern is captured from a local listener, then replayed
+back to back to measure throughput and latency, and replayed again after a
+register changed to check the difference is reported. Run with
+``pytest tests/benchmarks -s`` to see the results.
+"""
+import json
+
+import pytest
+from homeassistant.core import HomeAssistant
+from pymodbus.client import AsyncModbusTcpClient
+
+from custom_components.solaredge_meterproxy.capture import (
+    CaptureLog,
+    async_replay,
+    read_capture,
+)
+from custom_components.solaredge_meterproxy.datastore import WattNodeSlaveContext
+from custom_components.solaredge_meterproxy.modbus_server import SharedModbusServer
+
+PORT = 15626
+CYCLES = 200
+
+# Typical SolarEdge poll: basic block, advanced block, config and device info
+READS = ((1000, 34), (1100, 80), (1600, 24), (1700, 23))
+
+
+@pytest.fixture
+async def listener(hass: HomeAssistant):
+    """Serve a recognisable register image on a local listener."""
+    server = SharedModbusServer(
+        hass, {"server_ip": "127.0.0.1", "server_port": PORT}
+    )
+    context = WattNodeSlaveContext()
+    for address in (1000, 1100, 1600, 1700):
+        context.setValues(3, address, [(address + i) & 0xFFFF for i in range(100)])
+    await server.async_start()
+    yield server, context
+    await server.async_stop()
+
+
+async def test_capture_replay(listener, tmp_path):
+    """Report the replay throughput and the registers that changed."""
+    server, context = listener
+    log = CaptureLog(tmp_path / "capture.bin", 1 << 20)
+    server.attach(2, context, capture=log)
+
+    client = AsyncModbusTcpClient("127.0.0.1", port=PORT)
+    await client.connect()
+    for _ in range(CYCLES):
+        for address, count in READS:
+            await client.read_holding_registers(address, count, slave=2)
+    log.write(log.take())
+    records = list(read_capture(log.path))
+    assert len(records) == CYCLES * len(READS)
+
+    # Replay without capturing the replay itself
+    server.detach(2)
+    server.attach(2, context)
+    report = await async_replay(client, records, speed=None)
+    print()
+    print(json.dumps(report.as_dict(), indent=2))
+    assert report.requests == len(records)
+    assert report.errors == 0
+    assert not report.mismatches
+
+    context.setValues(3, 1010, [0])
+    report = await async_replay(client, records, speed=None)
+    client.close()
+    assert report.mismatches == {1010: CYCLES}
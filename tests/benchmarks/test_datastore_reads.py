@@ -0,0 +1,64 @@
+"""Benchmark register reads from the WattNode datastore.
+
+Run with ``pytest tests/benchmarks -s`` to see the timings. Only the served
+registers are asserted, timings vary too much between machines.
+"""
+import timeit
+
+from pymodbus.datastore import ModbusSlaveContext
+
+from custom_components.solaredge_meterproxy.datastore import WattNodeSlaveContext
+
+ITERATIONS = 20000
+
+# Typical SolarEdge poll: basic block, advanced block, config and device info
+READS = ((3, 1000, 34), (3, 1100, 80), (3, 1600, 24), (3, 1700, 23))
+
+
+def _fill(context):
+    """Write the same recognisable image into a context."""
+    for address in (1000, 1100, 1600, 1700):
+        context.setValues(3, address, [(address + i) & 0xFFFF for i in range(100)])
+
+
+def _read_all(context):
+    """Serve one poll cycle the way a pymodbus request handler does."""
+    for fc_as_hex, address, count in READS:
+        if context.validate(fc_as_hex, address, count):
+            context.getValues(fc_as_hex, address, count)
+
+
+def test_out_of_map_reads_are_rejected():
+    """Reads outside the WattNode pages fail validation."""
+    context = WattNodeSlaveContext()
+    assert context.validate(3, 1000, 125)
+    assert not context.validate(3, 1199, 2)
+    assert not context.validate(3, 0, 1)
+    assert not context.validate(1, 1000, 1)
+
+
+def test_datastore_read_benchmark():
+    """Compare reads/sec against the default ModbusSlaveContext."""
+    default_context = ModbusSlaveContext()
+    wattnode_context = WattNodeSlaveContext()
+    _fill(default_context)
+    _fill(wattnode_context)
+
+    for fc_as_hex, address, count in READS:
+        assert wattnode_context.getValues(
+            fc_as_hex, address, count
+        ) == default_context.getValues(fc_as_hex, address, count)
+
+    before = min(
+        timeit.repeat(lambda: _read_all(default_context), number=ITERATIONS, repeat=5)
+    )
+    after = min(
+        timeit.repeat(lambda: _read_all(wattnode_context), number=ITERATIONS, repeat=5)
+    )
+
+    reads = ITERATIONS * len(READS)
+    print(
+        f"\nModbusSlaveContext: {reads / before:,.0f} reads/s, "
+        f"WattNodeSlaveContext: {reads / after:,.0f} reads/s "
+        f"({before / after:.1f}x)"
+    )
@@ -0,0 +1,47 @@
+"""Benchmark the P1 reader path: framing, CRC check and parsing.
+
+Replays the recorded DSMR 5 telegrams as fast as possible in 64 byte chunks,
+as they arrive from a serial port. Run with ``pytest tests/benchmarks -s`` to
+see the throughput.
+"""
+from pathlib import Path
+import time
+
+from custom_components.solaredge_meterproxy.dsmr import (
+    DsmrParser,
+    TelegramFramer,
+    dsmr_meter_data,
+)
+
+RECORDING = (
+    Path(__file__).parent.parent / "fixtures" / "dsmr5_telegrams.txt"
+).read_bytes()
+ROUNDS = 400
+CHUNK_SIZE = 64
+
+
+def test_p1_throughput():
+    """Report how many telegrams per second the P1 reader path handles."""
+    framer = TelegramFramer()
+    parser = DsmrParser()
+    stream = RECORDING * ROUNDS
+    chunks = [
+        stream[position : position + CHUNK_SIZE]
+        for position in range(0, len(stream), CHUNK_SIZE)
+    ]
+
+    telegrams = 0
+    start = time.perf_counter()
+    for chunk in chunks:
+        for telegram in framer.feed(chunk):
+            if parser.parse_telegram(telegram):
+                dsmr_meter_data(parser.values)
+            telegrams += 1
+    elapsed = time.perf_counter() - start
+
+    assert telegrams == 5 * ROUNDS
+    assert framer.crc_errors == 0
+    print(
+        f"\nP1 reader: {telegrams / elapsed:.0f} telegrams/s "
+        f"({1e6 * elapsed / telegrams:.1f} µs per telegram)"
+    )
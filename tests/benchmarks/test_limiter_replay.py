@@ -0,0 +1,112 @@
+"""Benchmark the output filters against the error seen by the export limiter.
+
+Two grid power traces are replayed, each an hour long and generated from a
+fixed seed: PV output ramping up and down with passing clouds, and
+household loads switching with an occasional spike in the P1 readings
+(e.g. motor inrush). Meter readings arrive every 1 to 10 seconds and are a
+new sample even when they repeat the value, the inverter polls twice a
+second and the limiter error is the difference between the served and the
+actual grid power. Run with ``pytest tests/benchmarks -s`` to see the
+results.
+"""
+import random
+
+from custom_components.solaredge_meterproxy.filters import OutputFilter, parse_filters
+
+DURATION = 3600.0
+POLL_INTERVAL = 0.5
+SPIKE = 3000.0
+FILTERS = (
+    "",
+    "power_active=median:3",
+    "power_active=ema:2",
+    "power_active=extrapolate:2",
+    "power_active=extrapolate:5",
+)
+
+
+def _clouds(rng: random.Random) -> list[tuple[float, float]]:
+    """Return breakpoints of PV output ramping between levels."""
+    points = []
+    time = 0.0
+    pv = 3000.0
+    while time < DURATION:
+        pv = min(max(pv + rng.uniform(-1500, 1500), 200.0), 4500.0)
+        points.append((time, 400.0 - pv))
+        time += rng.uniform(20.0, 120.0)
+    return points
+
+
+def _loads(rng: random.Random) -> list[tuple[float, float]]:
+    """Return breakpoints of household loads switching on and off."""
+    points = []
+    time = 0.0
+    while time < DURATION:
+        load = rng.choice((150.0, 400.0, 2200.0, 2500.0, 3100.0))
+        points.append((time, load - 3000.0))
+        time += rng.uniform(30.0, 300.0)
+        points.append((time - 0.01, load - 3000.0))
+    return points
+
+
+TRACES = {
+    # name: (breakpoints, share of P1 readings with a spike)
+    "clouds": (_clouds, 0.0),
+    "loads": (_loads, 0.05),
+}
+
+
+def _actual(points: list[tuple[float, float]], time: float) -> float:
+    """Interpolate the trace at a point in time."""
+    for (start, low), (end, high) in zip(points, points[1:]):
+        if start <= time <= end:
+            return low + (high - low) * (time - start) / (end - start)
+    return points[-1][1]
+
+
+def _replay(option: str, trace: str, seed: int = 7) -> float:
+    """Return the mean absolute limiter error of one filter option."""
+    build, spikes = TRACES[trace]
+    points = build(random.Random(seed))
+    rng = random.Random(seed + 1)
+    output = OutputFilter(parse_filters(option))
+    snapshot = {"power_active": 0.0}
+    reading = None
+    next_update = 0.0
+    error = 0.0
+    polls = 0
+    time = 0.0
+    while time < DURATION:
+        if time >= next_update:
+            value = _actual(points, time)
+            if rng.random() < spikes:
+                value += rng.choice((-1, 1)) * SPIKE
+            snapshot = {"power_active": value}
+            reading = time
+            next_update = time + rng.uniform(1.0, 10.0)
+        served = output.apply(snapshot, time, reading)["power_active"]
+        error += abs(served - _actual(points, time))
+        polls += 1
+        time += POLL_INTERVAL
+    return error / polls
+
+
+def test_limiter_error():
+    """Report the mean limiter error per trace and filter configuration."""
+    results = {
+        trace: {option: _replay(option, trace) for option in FILTERS}
+        for trace in TRACES
+    }
+
+    print()
+    for trace, errors in results.items():
+        raw = errors[""]
+        for option, error in errors.items():
+            print(
+                f"{trace:7} {option or 'unfiltered':28} {error:7.1f} W "
+                f"({error / raw:.0%})"
+            )
+
+    # Extrapolation removes the lag on ramps, the median removes spikes
+    assert results["clouds"]["power_active=extrapolate:5"] < results["clouds"][""]
+    assert results["loads"]["power_active=median:3"] < results["loads"][""]
@@ -0,0 +1,52 @@
+"""Benchmark the Modbus proxy polled by many concurrent clients.
+
+A proxy is set up like a config entry would be and polled with the load
+generator in ``scripts/loadtest.py``: several inverters and monitoring
+tools each reading the value pages on every poll and the configuration
+pages now and then, as fast as the listener answers. The clients share the
+event loop with the proxy, so the throughput is a lower bound of what the
+proxy serves on its own. Run with ``pytest tests/benchmarks -s`` to see
+the results.
+"""
+import pytest
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.solaredge_meterproxy.const import CONF_UPDATE_MODE, DOMAIN
+from scripts.loadtest import async_load_test
+from tests.conftest import TEST_CONFIG
+
+PORT = 15627
+CLIENTS = (1, 4, 16, 64)
+DURATION = 2.0
+
+
+@pytest.mark.parametrize("update_mode", ["push", "on_demand"])
+async def test_concurrent_clients(hass: HomeAssistant, update_mode: str):
+    """Report throughput, latency and errors per number of clients."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={**TEST_CONFIG, "server_port": PORT, CONF_UPDATE_MODE: update_mode},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    reports = [
+        await async_load_test("127.0.0.1", PORT, clients, DURATION, interval=0)
+        for clients in CLIENTS
+    ]
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+    print()
+    for report in reports:
+        result = report.as_dict()
+        print(
+            f"{update_mode:9} {report.clients:3} clients "
+            f"{result['requests_per_second']:8.1f} req/s "
+            f"p50 {result['latency_p50_ms']:6.2f} ms "
+            f"p99 {result['latency_p99_ms']:6.2f} ms "
+            f"errors {result['error_rate']:.2%}"
+        )
+        assert report.requests
+        assert not report.errors
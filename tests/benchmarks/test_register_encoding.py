@@ -0,0 +1,89 @@
+"""Micro-benchmark for encoding the WattNode value blocks.
+
+Run with ``pytest tests/benchmarks -s`` to see the timings. Only the encoded
+registers are asserted, timings vary too much between machines.
+"""
+import timeit
+
+import pytest
+
+from custom_components.solaredge_meterproxy.register_map import (
+    WATTNODE_BLOCK_1000,
+    WATTNODE_BLOCK_1100,
+    RegisterBlock,
+)
+
+payload = pytest.importorskip("pymodbus.payload")
+constants = pytest.importorskip("pymodbus.constants")
+
+ITERATIONS = 2000
+
+SAMPLE_VALUES = {
+    "power_active": -1532.0,
+    "l1_power_active": -812.0,
+    "l2_power_active": -420.0,
+    "l3_power_active": -300.0,
+    "l1n_voltage": 231.2,
+    "l2n_voltage": 229.8,
+    "l3n_voltage": 230.4,
+    "voltage_ln": 230.5,
+    "voltage_ll": 399.2,
+    "l12_voltage": 400.4,
+    "l23_voltage": 398.0,
+    "l31_voltage": 399.0,
+    "l1_current": 3.5,
+    "l2_current": 1.8,
+    "l3_current": 1.3,
+    "frequency": 50.0,
+    "energy_active": 0.0,
+    "import_energy_active": 0.0,
+}
+
+
+def _encode_with_payload_builder(values):
+    """Encode both blocks the way the server did before the register map."""
+    registers = []
+    for fields in (WATTNODE_BLOCK_1000, WATTNODE_BLOCK_1100):
+        builder = payload.BinaryPayloadBuilder(
+            byteorder=constants.Endian.BIG, wordorder=constants.Endian.LITTLE
+        )
+        for field in fields:
+            builder.add_32bit_float(values.get(field.name, 0))
+        registers.append(builder.to_registers())
+    return registers
+
+
+def test_register_block_encoding_benchmark():
+    """Compare the compiled register blocks to BinaryPayloadBuilder."""
+    blocks = (
+        RegisterBlock(1000, WATTNODE_BLOCK_1000),
+        RegisterBlock(1100, WATTNODE_BLOCK_1100),
+    )
+
+    def encode_with_register_map(values):
+        return [list(block.encode(values)) for block in blocks]
+
+    assert encode_with_register_map(SAMPLE_VALUES) == _encode_with_payload_builder(
+        SAMPLE_VALUES
+    )
+
+    before = min(
+        timeit.repeat(
+            lambda: _encode_with_payload_builder(SAMPLE_VALUES),
+            number=ITERATIONS,
+            repeat=5,
+        )
+    )
+    after = min(
+        timeit.repeat(
+            lambda: [block.encode(SAMPLE_VALUES) for block in blocks],
+            number=ITERATIONS,
+            repeat=5,
+        )
+    )
+
+    print(
+        f"\nBinaryPayloadBuilder: {before / ITERATIONS * 1e6:.1f} us/update, "
+        f"RegisterBlock: {after / ITERATIONS * 1e6:.1f} us/update "
+        f"({before / after:.1f}x)"
+    )
@@ -0,0 +1,84 @@
+"""Benchmark SDM120 polling against a local pymodbus simulator.
+
+Compares the planned read (one request for registers 0-73) with the former
+five separate reads. Run with ``pytest tests/benchmarks -s`` to see the
+timings.
+"""
+import struct
+import time
+
+import pytest
+from homeassistant.core import HomeAssistant
+
+from custom_components.solaredge_meterproxy.meter_devices import SDM120MeterDevice
+from custom_components.solaredge_meterproxy.read_planner import ReadRange
+
+datastore = pytest.importorskip("pymodbus.datastore")
+server = pytest.importorskip("pymodbus.server")
+
+POLLS = 200
+PORT = 15620
+
+SDM120_VALUES = {0: 231.4, 6: 4.2, 12: 958.0, 70: 49.98, 72: 1234.5}
+
+
+def _simulator_context():
+    """Return a simulator context with SDM120 input registers."""
+    registers = [0] * 100
+    for address, value in SDM120_VALUES.items():
+        registers[address : address + 2] = struct.unpack(">2H", struct.pack(">f", value))
+    slave = datastore.ModbusSlaveContext(
+        ir=datastore.ModbusSequentialDataBlock(0, registers), zero_mode=True
+    )
+    return datastore.ModbusServerContext(slaves={1: slave}, single=False)
+
+
+async def _read_separately(client):
+    """Poll the way the device did before reads were planned."""
+    for address in (0, 6, 12, 72, 70):
+        await client.async_read_registers([ReadRange(address, 2)], 1)
+
+
+async def test_sdm120_planned_reads(hass: HomeAssistant):
+    """Measure round trips and poll time of planned vs separate reads."""
+    requests = []
+    simulator = server.ModbusTcpServer(
+        _simulator_context(),
+        address=("127.0.0.1", PORT),
+        request_tracer=lambda request, *addr: requests.append(request.function_code),
+    )
+    assert await simulator.listen()
+    device = SDM120MeterDevice(
+        hass, {"meter_host": "127.0.0.1", "meter_port": PORT, "meter_address": 1}
+    )
+    try:
+        await device.async_connect()
+        values = await device.async_read_values()
+        assert values["l1n_voltage"] == pytest.approx(231.4, rel=1e-6)
+        assert values["import_energy_active"] == pytest.approx(1234.5, rel=1e-6)
+        assert values["frequency"] == pytest.approx(49.98, rel=1e-6)
+
+        requests.clear()
+        started = time.perf_counter()
+        for _ in range(POLLS):
+            await device.async_read_values()
+        planned = time.perf_counter() - started
+        planned_requests = len(requests)
+
+        requests.clear()
+        started = time.perf_counter()
+        for _ in range(POLLS):
+            await _read_separately(device._client)
+        separate = time.perf_counter() - started
+        separate_requests = len(requests)
+    finally:
+        await device.async_disconnect()
+        await simulator.shutdown()
+
+    print(
+        f"\nSDM120 poll: planned {planned_requests / POLLS:.0f} request(s), "
+        f"{planned / POLLS * 1e3:.2f} ms; separate {separate_requests / POLLS:.0f} "
+        f"requests, {separate / POLLS * 1e3:.2f} ms ({separate / planned:.1f}x)"
+    )
+    assert planned_requests == POLLS
+    assert separate_requests == 5 * POLLS
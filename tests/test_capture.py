@@ -0,0 +1,121 @@
+"""Test the Modbus capture log."""
+import asyncio
+from collections import Counter
+
+from homeassistant.core import HomeAssistant
+from pymodbus.client import AsyncModbusTcpClient
+from pymodbus.pdu import ExceptionResponse
+from pymodbus.register_read_message import (
+    ReadHoldingRegistersRequest,
+    ReadHoldingRegistersResponse,
+)
+from pymodbus.register_write_message import (
+    WriteMultipleRegistersRequest,
+    WriteMultipleRegistersResponse,
+)
+
+from custom_components.solaredge_meterproxy.capture import (
+    CAPTURE_MAGIC,
+    NO_RESPONSE,
+    CaptureLog,
+    CaptureRecord,
+    read_capture,
+)
+from custom_components.solaredge_meterproxy.datastore import WattNodeSlaveContext
+from custom_components.solaredge_meterproxy.modbus_server import (
+    SharedModbusServer,
+    capture_record,
+)
+
+READ = CaptureRecord(
+    1700000000.25, 0.00048828125, 2, 3, 1000, 3, registers=(1, 2, 3)
+)
+WRITE = CaptureRecord(1700000000.5, 0.0009765625, 2, 16, 1620, 1, written=(1,))
+
+
+def test_records_round_trip(tmp_path):
+    """Test records read back as written, a cut off record ends the file."""
+    log = CaptureLog(tmp_path / "capture.bin", 4096)
+    log.record(READ)
+    log.record(WRITE)
+    log.write(log.take())
+    assert list(read_capture(log.path)) == [READ, WRITE]
+
+    with log.path.open("ab") as file:
+        file.write(READ.encode()[:-1])
+    assert list(read_capture(log.path)) == [READ, WRITE]
+    assert log.take() == b""
+
+
+def test_rotation_bounds_size(tmp_path):
+    """Test the log rotates and keeps one previous file."""
+    size = len(READ.encode())
+    log = CaptureLog(tmp_path / "capture.bin", len(CAPTURE_MAGIC) + 3 * size)
+    for _ in range(10):
+        log.record(READ)
+        log.write(log.take())
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "capture.bin",
+        "capture.bin.1",
+    ]
+    assert len(list(read_capture(tmp_path / "capture.bin.1"))) == 3
+    assert len(list(read_capture(log.path))) == 1
+
+
+def test_pending_data_is_bounded(tmp_path):
+    """Test records are dropped while too much waits to be written."""
+    log = CaptureLog(tmp_path / "capture.bin", 2 * len(READ.encode()))
+    for _ in range(5):
+        log.record(READ)
+    assert (log.records, log.dropped) == (2, 3)
+
+
+def test_capture_record_from_pdus():
+    """Test requests and responses are captured with what was served."""
+    request = ReadHoldingRegistersRequest(1000, 3, slave=2)
+    response = ReadHoldingRegistersResponse([1, 2, 3], slave=2)
+    assert capture_record(request, response, 1700000000.25, 0.00048828125) == READ
+
+    request = WriteMultipleRegistersRequest(1620, [1], slave=2)
+    response = WriteMultipleRegistersResponse(1620, 1, slave=2)
+    record = capture_record(request, response, 1700000000.5, 0.0009765625)
+    assert (record.count, record.written, record.registers) == (1, (1,), ())
+
+    request = ReadHoldingRegistersRequest(0, 1, slave=2)
+    record = capture_record(request, ExceptionResponse(3, 2), 0.0, 0.0)
+    assert record.exception_code == 2
+
+    response = ReadHoldingRegistersResponse([0], slave=2)
+    response.should_respond = False
+    record = capture_record(request, response, 0.0, 0.0)
+    assert (record.exception_code, record.registers) == (NO_RESPONSE, ())
+
+
+async def test_capture_concurrent_clients(hass: HomeAssistant, tmp_path):
+    """Test the requests of every client are captured with their own response."""
+    server = SharedModbusServer(hass, {"server_ip": "127.0.0.1", "server_port": 15634})
+    context = WattNodeSlaveContext()
+    for address in (1000, 1100):
+        context.setValues(3, address, [address + i for i in range(34)])
+    log = CaptureLog(tmp_path / "capture.bin", 1 << 20)
+    await server.async_start()
+    server.attach(2, context, capture=log)
+
+    async def _async_poll(address: int) -> None:
+        client = AsyncModbusTcpClient("127.0.0.1", port=15634)
+        await client.connect()
+        for _ in range(20):
+            await client.read_holding_registers(address, 34, slave=2)
+        client.close()
+
+    try:
+        await asyncio.gather(_async_poll(1000), _async_poll(1100))
+    finally:
+        await server.async_stop()
+    log.write(log.take())
+
+    records = list(read_capture(log.path))
+    assert Counter(record.address for record in records) == {1000: 20, 1100: 20}
+    for record in records:
+        assert record.registers == tuple(record.address + i for i in range(34))
@@ -0,0 +1,88 @@
+"""Test the shared upstream Modbus client."""
+import asyncio
+
+import pytest
+from homeassistant.core import HomeAssistant
+
+from custom_components.solaredge_meterproxy import client_pool
+from custom_components.solaredge_meterproxy.client_pool import (
+    async_acquire_client,
+    async_release_client,
+)
+from custom_components.solaredge_meterproxy.const import DATA_CLIENTS
+from custom_components.solaredge_meterproxy.read_planner import ReadRange
+
+datastore = pytest.importorskip("pymodbus.datastore")
+server = pytest.importorskip("pymodbus.server")
+
+PORT = 15621
+
+
+@pytest.fixture
+async def gateway():
+    """Run a local Modbus TCP gateway with two meters behind it."""
+    slaves = {
+        unit: datastore.ModbusSlaveContext(
+            ir=datastore.ModbusSequentialDataBlock(0, [unit * 100 + i for i in range(100)]),
+            zero_mode=True,
+        )
+        for unit in (1, 2)
+    }
+    requests = []
+    simulator = server.ModbusTcpServer(
+        datastore.ModbusServerContext(slaves=slaves, single=False),
+        address=("127.0.0.1", PORT),
+        request_tracer=lambda request, *addr: requests.append(request.slave_id),
+    )
+    assert await simulator.listen()
+    yield requests
+    await simulator.shutdown()
+
+
+async def test_meters_share_one_client(hass: HomeAssistant, gateway):
+    """Test meters behind one gateway share a client until the last release."""
+    first = await async_acquire_client(hass, "127.0.0.1", PORT)
+    second = await async_acquire_client(hass, "127.0.0.1", PORT)
+    assert first is second
+
+    assert await first.async_read_registers([ReadRange(0, 2)], 1) == [[100, 101]]
+    assert await second.async_read_registers([ReadRange(4, 2)], 2) == [[204, 205]]
+    assert gateway == [1, 2]
+
+    await async_release_client(hass, first)
+    assert first.connected
+    await async_release_client(hass, second)
+    assert not first.connected
+    assert hass.data[DATA_CLIENTS] == {}
+
+
+async def test_pipelined_reads(hass: HomeAssistant, gateway):
+    """Test pipelined reads are matched to their own responses."""
+    client = await async_acquire_client(hass, "127.0.0.1", PORT, pipeline_depth=4)
+    reads = [ReadRange(address, 3) for address in range(0, 60, 6)]
+
+    results = await asyncio.gather(
+        client.async_read_registers(reads, 1), client.async_read_registers(reads, 2)
+    )
+
+    assert results[0] == [[100 + read.address + i for i in range(3)] for read in reads]
+    assert results[1] == [[200 + read.address + i for i in range(3)] for read in reads]
+    await async_release_client(hass, client)
+
+
+async def test_reconnect_backoff(hass: HomeAssistant, monkeypatch):
+    """Test failed connects back off exponentially."""
+    monkeypatch.setattr(client_pool, "RECONNECT_DELAY", 0.2)
+    client = await async_acquire_client(hass, "127.0.0.1", PORT)
+
+    with pytest.raises(ConnectionError, match="Failed"):
+        await client.async_connect()
+    # Within the backoff no new connection attempt is made
+    with pytest.raises(ConnectionError, match="Reconnecting"):
+        await client.async_read_registers([ReadRange(0, 2)], 1)
+    await asyncio.sleep(0.25)
+    with pytest.raises(ConnectionError, match="Failed"):
+        await client.async_connect()
+    assert client._reconnect_delay == pytest.approx(0.8)
+
+    await async_release_client(hass, client)
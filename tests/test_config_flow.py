@@ -1,5 +1,6 @@
 """Test the SolarEdge MeterProxy config flow."""
 import pytest
+import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.core import HomeAssistant
 from homeassistant.data_entry_flow import FlowResultType
@@ -56,4 +57,74 @@ async def test_config_flow_complete(hass: HomeAssistant):
 
     assert result["type"] == FlowResultType.CREATE_ENTRY
     assert result["title"].startswith("SolarEdge MeterProxy")
-    assert result["data"] == TEST_CONFIG
\ No newline at end of file
+    assert result["data"] == TEST_CONFIG
+
+async def test_config_flow_invalid_output_filters(hass: HomeAssistant):
+    """Test output filters that can't be parsed are rejected."""
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"],
+        {
+            "server_ip": TEST_CONFIG["server_ip"],
+            "server_port": TEST_CONFIG["server_port"],
+            "protocol": TEST_CONFIG["protocol"],
+            "output_filters": "power_active=median:20",
+        },
+    )
+
+    assert result["type"] == FlowResultType.FORM
+    assert result["step_id"] == "user"
+    assert result["errors"] == {"output_filters": "invalid_output_filters"}
+
+
+async def test_config_flow_modbus_meter_needs_host(hass: HomeAssistant):
+    """Test a Modbus meter type without a meter host is rejected."""
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"],
+        {
+            "server_ip": TEST_CONFIG["server_ip"],
+            "server_port": TEST_CONFIG["server_port"],
+            "protocol": TEST_CONFIG["protocol"],
+        },
+    )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"],
+        {"meter_type": "sdm630", "meter_modbus_address": 2, "refresh_rate": 5},
+    )
+
+    assert result["type"] == FlowResultType.FORM
+    assert result["step_id"] == "meter"
+    assert result["errors"] == {"meter_host": "meter_host_required"}
+
+
+@pytest.mark.parametrize(
+    ("option", "value"), [("ct_current", 32768), ("serial_number", 2**31)]
+)
+async def test_config_flow_register_ranges(hass: HomeAssistant, option, value):
+    """Test values that don't fit their register are rejected."""
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"],
+        {
+            "server_ip": TEST_CONFIG["server_ip"],
+            "server_port": TEST_CONFIG["server_port"],
+            "protocol": TEST_CONFIG["protocol"],
+        },
+    )
+    with pytest.raises(vol.Invalid):
+        await hass.config_entries.flow.async_configure(
+            result["flow_id"],
+            {
+                "meter_type": "generic",
+                "meter_modbus_address": 2,
+                "refresh_rate": 5,
+                option: value,
+            },
+        )
@@ -0,0 +1,175 @@
+"""Test the coordinator feeding the Modbus server and the sensors."""
+import math
+
+import pytest
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.solaredge_meterproxy.const import (
+    CONF_METER_TYPE,
+    CONF_P1_POWER_ENTITY,
+    CONF_STALE_POLICY,
+    CONF_STALE_TIMEOUT,
+    DOMAIN,
+    STALE_POLICY_HOLD,
+    STALE_POLICY_NO_RESPONSE,
+)
+from custom_components.solaredge_meterproxy.coordinator import (
+    SolarEdgeMeterProxyCoordinator,
+)
+from tests.conftest import TEST_CONFIG
+
+
+async def test_p1_entities_pushed(hass: HomeAssistant):
+    """Test P1 state changes reach the listeners without waiting for a poll."""
+    hass.states.async_set("sensor.p1_power", "1500")
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_METER_TYPE: "p1", CONF_P1_POWER_ENTITY: "sensor.p1_power"},
+    )
+    entry.add_to_hass(hass)
+    coordinator = SolarEdgeMeterProxyCoordinator(hass, entry)
+    await coordinator.async_config_entry_first_refresh()
+    assert coordinator.data["power_active"] == 1500.0
+
+    updates = []
+    unsub = coordinator.async_add_listener(
+        lambda: updates.append(coordinator.data["power_active"])
+    )
+    hass.states.async_set("sensor.p1_power", "-200")
+    await hass.async_block_till_done()
+    assert updates == [-200.0]
+    # Refreshes of a pushing device only repeat its values
+    assert coordinator.last_poll is None
+
+    unsub()
+    await coordinator.async_shutdown()
+    assert coordinator.meter_device is None
+
+
+async def test_polled_meter_device(hass: HomeAssistant):
+    """Test a polled meter device is read once per refresh."""
+    entry = MockConfigEntry(domain=DOMAIN, data=TEST_CONFIG)
+    entry.add_to_hass(hass)
+    coordinator = SolarEdgeMeterProxyCoordinator(hass, entry)
+    await coordinator.async_config_entry_first_refresh()
+
+    assert coordinator.data["power_active"] == 500.0
+    last_poll = coordinator.last_poll
+    await coordinator.async_refresh()
+    assert coordinator.last_poll > last_poll
+    await coordinator.async_shutdown()
+
+
+async def test_server_and_sensors_share_snapshot(hass: HomeAssistant):
+    """Test the inverter is served exactly the values the sensors show."""
+    pytest.importorskip("pymodbus")
+    hass.states.async_set("sensor.p1_power", "1500")
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            **TEST_CONFIG,
+            "server_port": 15623,
+            CONF_METER_TYPE: "p1",
+            CONF_P1_POWER_ENTITY: "sensor.p1_power",
+        },
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    data = hass.data[DOMAIN][entry.entry_id]
+    coordinator = data["coordinator"]
+    hass.states.async_set("sensor.p1_power", "-750")
+    await hass.async_block_till_done()
+
+    assert data["modbus_server"]._values is coordinator.data
+    state = hass.states.get("sensor.solaredge_meterproxy_total_active_power")
+    assert float(state.state) == coordinator.data["power_active"] == -750.0
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_energy_counters_persisted(hass: HomeAssistant, hass_storage):
+    """Test the energy counters continue after a restart."""
+    hass.states.async_set("sensor.p1_power", "1500")
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_METER_TYPE: "p1", CONF_P1_POWER_ENTITY: "sensor.p1_power"},
+    )
+    entry.add_to_hass(hass)
+    key = f"{DOMAIN}.{entry.entry_id}.energy"
+    hass_storage[key] = {
+        "version": 1,
+        "key": key,
+        "data": {"counters": {"import_energy_active": 12.5}},
+    }
+
+    coordinator = SolarEdgeMeterProxyCoordinator(hass, entry)
+    await coordinator.async_config_entry_first_refresh()
+    assert coordinator.data["import_energy_active"] == 12.5
+    assert coordinator.data["energy_active"] == 12.5
+
+    await coordinator.async_shutdown()
+    assert hass_storage[key]["data"]["counters"]["import_energy_active"] >= 12.5
+
+
+async def test_data_age_follows_p1_entities(hass: HomeAssistant):
+    """Test the data age is infinite once the P1 power is unavailable."""
+    hass.states.async_set("sensor.p1_power", "1500")
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_METER_TYPE: "p1", CONF_P1_POWER_ENTITY: "sensor.p1_power"},
+    )
+    entry.add_to_hass(hass)
+    coordinator = SolarEdgeMeterProxyCoordinator(hass, entry)
+    await coordinator.async_config_entry_first_refresh()
+    assert coordinator.data_age() < 5
+
+    hass.states.async_set("sensor.p1_power", "unavailable")
+    await hass.async_block_till_done()
+    assert coordinator.data_age() == math.inf
+    await coordinator.async_shutdown()
+
+
+@pytest.mark.parametrize(
+    ("policy", "silenced", "served"),
+    [(STALE_POLICY_HOLD, False, 1500.0), (STALE_POLICY_NO_RESPONSE, True, 0.0)],
+)
+async def test_stale_data_policy(
+    hass: HomeAssistant, policy: str, silenced: bool, served: float
+):
+    """Test unavailable P1 data switches the inverter to the stale policy."""
+    pytest.importorskip("pymodbus")
+    hass.states.async_set("sensor.p1_power", "1500")
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            **TEST_CONFIG,
+            "server_port": 15624,
+            CONF_METER_TYPE: "p1",
+            CONF_P1_POWER_ENTITY: "sensor.p1_power",
+            CONF_STALE_TIMEOUT: 10,
+            CONF_STALE_POLICY: policy,
+        },
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    server = hass.data[DOMAIN][entry.entry_id]["modbus_server"]
+    hass.states.async_set("sensor.p1_power", "unavailable")
+    await hass.async_block_till_done()
+    assert server.metrics.stale
+    assert server.metrics.stale_transitions == 1
+    assert server._values["power_active"] == served
+    assert (2 in server._server._silenced) is silenced
+
+    hass.states.async_set("sensor.p1_power", "-750")
+    await hass.async_block_till_done()
+    assert not server.metrics.stale
+    assert server.metrics.fresh_transitions == 1
+    assert server._values["power_active"] == -750.0
+    assert 2 not in server._server._silenced
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
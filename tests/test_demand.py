@@ -0,0 +1,72 @@
+"""Test the rolling demand calculator."""
+import pytest
+
+from custom_components.solaredge_meterproxy.demand import DemandCalculator
+
+
+def _feed(demand: DemandCalculator, power: float, start: float, end: float) -> dict:
+    """Feed one sample per second of constant power."""
+    registers = {}
+    for second in range(int(start), int(end) + 1):
+        registers = demand.update({"power_active": power}, float(second))
+    return registers
+
+
+def test_block_demand():
+    """Test the demand is the average of the last full period."""
+    demand = DemandCalculator(period=1, subintervals=1)
+    registers = _feed(demand, 1000.0, 0, 59)
+    # Nothing is published until the first period has ended
+    assert registers["demand_power_active"] == 0.0
+
+    registers = _feed(demand, 1000.0, 60, 60)
+    assert registers["demand_power_active"] == pytest.approx(1000.0)
+
+    # The ramp from 1000 to 3000 W averages 2000 W for one second
+    registers = _feed(demand, 3000.0, 61, 120)
+    expected = (2000 + 59 * 3000) / 60
+    assert registers["demand_power_active"] == pytest.approx(expected)
+    assert registers["minimum_demand_power_active"] == pytest.approx(1000.0)
+    assert registers["maximum_demand_power_active"] == pytest.approx(expected)
+
+
+def test_rolling_demand():
+    """Test subintervals move the window along in steps."""
+    demand = DemandCalculator(period=1, subintervals=4)
+    _feed(demand, 1000.0, 0, 60)
+    registers = _feed(demand, 5000.0, 61, 75)
+    # The window holds three subintervals of 1000 W and the one just closed
+    expected = (3 * 15 * 1000 + 3000 + 14 * 5000) / 60
+    assert registers["demand_power_active"] == pytest.approx(expected)
+    assert registers["minimum_demand_power_active"] == pytest.approx(1000.0)
+    assert registers["maximum_demand_power_active"] == pytest.approx(expected)
+
+
+def test_phases_and_apparent():
+    """Test every channel gets its own demand."""
+    demand = DemandCalculator(period=1, subintervals=1)
+    sample = {
+        "power_active": 900.0,
+        "power_apparent": 1000.0,
+        "l1_power_active": 300.0,
+        "l2_power_active": -300.0,
+    }
+    for second in range(61):
+        registers = demand.update(sample, float(second))
+    assert registers["demand_power_apparent"] == pytest.approx(1000.0)
+    assert registers["l1_demand_power_active"] == pytest.approx(300.0)
+    assert registers["l2_demand_power_active"] == pytest.approx(-300.0)
+    assert registers["l3_demand_power_active"] == 0.0
+
+
+def test_gap_and_reset():
+    """Test a gap is not integrated and reset clears the extremes."""
+    demand = DemandCalculator(period=1, subintervals=2)
+    _feed(demand, 1000.0, 0, 30)
+    registers = demand.update({"power_active": 4000.0}, 600.0)
+    assert registers["demand_power_active"] == pytest.approx(1000.0)
+
+    demand.reset()
+    registers = demand.registers()
+    assert registers["minimum_demand_power_active"] == 0.0
+    assert registers["maximum_demand_power_active"] == 0.0
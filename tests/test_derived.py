@@ -0,0 +1,108 @@
+"""Test the derived quantities."""
+import pytest
+
+from custom_components.solaredge_meterproxy.derived import (
+    INPUT_CURRENT,
+    INPUT_POWER,
+    INPUT_POWER_TOTAL,
+    INPUT_VOLTAGE,
+    Derivation,
+    DerivedQuantities,
+    max_import_values,
+    meter_derivations,
+)
+
+
+def _inputs(total=0.0, power=(0.0,) * 3, voltage=(0.0,) * 3, current=(0.0,) * 3):
+    """Return raw inputs for the meter derivations."""
+    return {
+        INPUT_POWER_TOTAL: total,
+        INPUT_POWER: power,
+        INPUT_VOLTAGE: voltage,
+        INPUT_CURRENT: current,
+    }
+
+
+def test_three_phase_quantities():
+    """Test S, Q and PF per phase from measured voltage, current and power."""
+    data = DerivedQuantities().update(
+        _inputs(
+            power=(920.0, -460.0, 0.0),
+            voltage=(230.0, 230.0, 230.0),
+            current=(5.0, 2.0, 0.0),
+        )
+    )
+    assert data["power_active"] == 460.0
+    assert data["l1_power_apparent"] == pytest.approx(1150.0)
+    assert data["l1_power_reactive"] == pytest.approx(690.0)
+    assert data["l1_power_factor"] == pytest.approx(0.8)
+    # Exporting phases get a negative current and power factor
+    assert data["l2_current"] == -2.0
+    assert data["l2_power_factor"] == pytest.approx(-1.0)
+    assert data["l3_power_factor"] == 1.0
+    assert data["power_apparent"] == pytest.approx(1610.0)
+    assert data["power_factor"] == pytest.approx(460.0 / 1610.0)
+
+
+def test_missing_values_are_derived():
+    """Test currents, voltages and phase power are filled in."""
+    data = DerivedQuantities().update(
+        _inputs(total=-2300.0, voltage=(230.0, 0.0, 0.0))
+    )
+    assert data["l1_power_active"] == -2300.0
+    assert data["l2_power_active"] == 0.0
+    assert data["l1_current"] == pytest.approx(-10.0)
+    assert data["l2n_voltage"] == 230.0
+    assert data["l1_power_apparent"] == pytest.approx(2300.0)
+    assert data["l1_power_factor"] == pytest.approx(-1.0)
+
+
+def test_line_to_line_voltage():
+    """Test line to line voltages follow the phase offset."""
+    voltage = _inputs(voltage=(230.0, 230.0, 230.0))
+    data = DerivedQuantities().update(voltage)
+    assert data["l12_voltage"] == pytest.approx(398.37, abs=0.01)
+    assert data["voltage_ll"] == pytest.approx(398.37, abs=0.01)
+
+    data = DerivedQuantities(meter_derivations(phase_offset=180)).update(voltage)
+    assert data["l12_voltage"] == pytest.approx(460.0)
+
+
+def test_only_changed_inputs_are_recomputed():
+    """Test a derivation only runs when one of its inputs changed."""
+    calls = []
+
+    def double(value):
+        calls.append(value)
+        return (value * 2,)
+
+    def total(doubled, other):
+        calls.append(other)
+        return (doubled[0] + other,)
+
+    quantities = DerivedQuantities(
+        (
+            Derivation("doubled", ("a",), double, ("a2",)),
+            Derivation("total", ("doubled", "b"), total, ("sum",)),
+        )
+    )
+    assert quantities.update({"a": 1, "b": 10}) == {"a2": 2, "sum": 12}
+    assert quantities.update({"a": 1, "b": 20})["sum"] == 22
+    assert calls == [1, 10, 20]
+    assert quantities.update({"a": 1, "b": 20}) == {"a2": 2, "sum": 22}
+    assert calls == [1, 10, 20]
+
+
+def test_max_import_values():
+    """Test the fail-safe image imports at full scale on every phase."""
+    live = DerivedQuantities().update(
+        _inputs(total=-2300.0, voltage=(230.0, 240.0, 0.0))
+    )
+    data = max_import_values({**live, "import_energy_active": 12.5}, ct_current=5)
+    assert data["l1_power_active"] == 1150.0
+    assert data["l2_power_active"] == 1200.0
+    assert data["l3_current"] == 5.0
+    assert data["power_active"] == data["power_apparent"] == pytest.approx(3525.0)
+    assert data["power_factor"] == 1.0
+    assert data["l2n_voltage"] == 240.0
+    assert data["import_energy_active"] == 12.5
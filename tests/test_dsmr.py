@@ -0,0 +1,92 @@
+"""Test DSMR telegram parsing and the MQTT P1 meter device."""
+from pathlib import Path
+
+import pytest
+from homeassistant.core import HomeAssistant
+
+from custom_components.solaredge_meterproxy.dsmr import (
+    DsmrParser,
+    dsmr_meter_data,
+    parse_value,
+)
+from custom_components.solaredge_meterproxy.meter_devices import MqttP1MeterDevice
+
+TELEGRAMS = [
+    telegram + "\r\n"
+    for telegram in (Path(__file__).parent / "fixtures" / "dsmr5_telegrams.txt")
+    .read_bytes()
+    .decode()
+    .split("\r\n/")
+]
+TELEGRAMS = [TELEGRAMS[0]] + ["/" + telegram for telegram in TELEGRAMS[1:]]
+
+
+def test_parse_value():
+    """Test COSEM values with and without unit and brackets."""
+    assert parse_value("01.193*kW") == 1.193
+    assert parse_value("(230.1*V)") == 230.1
+    assert parse_value("002") == 2
+
+
+def test_parse_telegram():
+    """Test a recorded telegram is parsed into served meter values."""
+    parser = DsmrParser()
+    assert parser.parse_telegram(TELEGRAMS[0])
+    meter_data = dsmr_meter_data(parser.values)
+
+    assert meter_data["power_active"] == pytest.approx(-1532.0)
+    assert meter_data["l1_power_active"] == pytest.approx(-2262.0)
+    assert meter_data["l2_power_active"] == pytest.approx(412.0)
+    assert meter_data["l1n_voltage"] == 232.1
+    assert meter_data["l3_current"] == 1
+    assert meter_data["import_energy_active"] == pytest.approx(9444.468)
+    assert meter_data["export_energy_active"] == pytest.approx(3580.245)
+
+    # The third telegram repeats the second one
+    assert parser.parse_telegram(TELEGRAMS[1])
+    assert not parser.parse_telegram(TELEGRAMS[2])
+
+
+def test_parse_object():
+    """Test single OBIS references, as published per topic."""
+    parser = DsmrParser()
+    assert parser.parse_object("1-0:1.7.0", "01.871*kW")
+    assert not parser.parse_object("1-0:1.7.0", "(01.871*kW)")
+    assert not parser.parse_object("0-0:96.14.0", "0002")
+    assert not parser.parse_object("1-0:32.7.0", "invalid")
+    assert dsmr_meter_data(parser.values)["power_active"] == pytest.approx(1871.0)
+
+
+async def test_mqtt_telegrams(hass: HomeAssistant, mqtt_mock):
+    """Test telegrams received over MQTT update the device and its listeners."""
+    from pytest_homeassistant_custom_component.common import async_fire_mqtt_message
+
+    device = MqttP1MeterDevice(hass, {"mqtt_topic": "dsmr/telegram"})
+    updates = []
+    device.async_add_listener(lambda: updates.append(device.meter_data["power_active"]))
+    await device.async_connect()
+
+    for telegram in TELEGRAMS:
+        async_fire_mqtt_message(hass, "dsmr/telegram", telegram)
+    await hass.async_block_till_done()
+
+    assert device.telegrams == len(TELEGRAMS)
+    assert updates == pytest.approx([-1532.0, -1498.0, 215.0, 1871.0])
+    assert (await device.async_read_values())["power_active"] == pytest.approx(1871.0)
+    await device.async_disconnect()
+
+
+async def test_mqtt_objects(hass: HomeAssistant, mqtt_mock):
+    """Test one OBIS reference per topic."""
+    from pytest_homeassistant_custom_component.common import async_fire_mqtt_message
+
+    device = MqttP1MeterDevice(hass, {"mqtt_topic": "dsmr/#"})
+    await device.async_connect()
+
+    async_fire_mqtt_message(hass, "dsmr/1-0:2.7.0", "00.750*kW")
+    async_fire_mqtt_message(hass, "dsmr/1-0:32.7.0", "231.5*V")
+    await hass.async_block_till_done()
+
+    assert device.meter_data["power_active"] == pytest.approx(-750.0)
+    assert device.meter_data["l1n_voltage"] == 231.5
+    await device.async_disconnect()
@@ -0,0 +1,120 @@
+"""Test the P1 telegram framer and the direct P1 port reader."""
+import asyncio
+import os
+from pathlib import Path
+
+import pytest
+from homeassistant.core import HomeAssistant
+
+from custom_components.solaredge_meterproxy.const import CONF_P1_PORT
+from custom_components.solaredge_meterproxy.dsmr import (
+    TelegramFramer,
+    async_replay,
+    crc16,
+    split_recording,
+)
+from custom_components.solaredge_meterproxy.meter_devices import DsmrP1MeterDevice
+
+RECORDING = (Path(__file__).parent / "fixtures" / "dsmr5_telegrams.txt").read_bytes()
+TELEGRAMS = split_recording(RECORDING)
+
+
+def test_crc16():
+    """Test the CRC of a recorded telegram matches the one it carries."""
+    telegram = TELEGRAMS[0]
+    end = telegram.index(b"!")
+    assert crc16(telegram[: end + 1]) == int(telegram[end + 1 :].strip(), 16)
+
+
+def test_framer_chunks():
+    """Test telegrams split over arbitrary chunks are reassembled."""
+    framer = TelegramFramer()
+    telegrams = []
+    for position in range(0, len(RECORDING), 7):
+        telegrams += framer.feed(RECORDING[position : position + 7])
+
+    assert [telegram.encode() for telegram in telegrams] == TELEGRAMS
+    assert framer.crc_errors == 0
+
+
+def test_framer_corrupted_data():
+    """Test garbage is skipped and corrupted telegrams are dropped."""
+    framer = TelegramFramer()
+    corrupted = TELEGRAMS[1].replace(b"1-0:1.7.0(0", b"1-0:1.7.0(9")
+
+    telegrams = framer.feed(b"\x00garbage\r\n" + corrupted + TELEGRAMS[0])
+    assert telegrams == [TELEGRAMS[0].decode()]
+    assert framer.crc_errors == 1
+
+    # A telegram cut short is abandoned when the next one starts
+    assert framer.feed(TELEGRAMS[1][:100] + TELEGRAMS[3]) == [TELEGRAMS[3].decode()]
+
+
+def test_framer_without_crc():
+    """Test DSMR 2 and 3 telegrams, which carry no CRC, are passed on."""
+    framer = TelegramFramer()
+    telegram = b"/ISk5\\2MT382-1000\r\n\r\n1-0:1.7.0(0001.19*kW)\r\n!\r\n"
+    assert framer.feed(telegram) == [telegram.decode()]
+
+
+def test_framer_oversized():
+    """Test a telegram without end marker does not grow the buffer forever."""
+    framer = TelegramFramer(max_size=256)
+    framer.feed(b"/" + b"x" * 1000)
+    assert framer.feed(TELEGRAMS[0]) == [TELEGRAMS[0].decode()]
+
+
+async def test_serial_port(hass: HomeAssistant):
+    """Test telegrams replayed on a serial port update the meter values."""
+    pytest.importorskip("serial")
+    master, slave = os.openpty()
+    device = DsmrP1MeterDevice(hass, {CONF_P1_PORT: os.ttyname(slave)})
+    updates = []
+    device.async_add_listener(lambda: updates.append(device.meter_data["power_active"]))
+    await device.async_connect()
+
+    sent = await async_replay(
+        RECORDING, lambda data: os.write(master, data), speed=100
+    )
+    await asyncio.sleep(0.1)
+
+    assert device.telegrams == sent == len(TELEGRAMS)
+    assert device.crc_errors == 0
+    # Telegrams 2 and 3 are identical
+    assert len(updates) == sent - 1
+    assert updates[0] == pytest.approx(-1532.0)
+
+    await device.async_disconnect()
+    os.close(master)
+    os.close(slave)
+
+
+async def test_tcp_port(hass: HomeAssistant):
+    """Test a P1 port shared over TCP, reconnecting when it drops."""
+    connections = []
+
+    async def handle(reader, writer):
+        connections.append(writer)
+        await async_replay(RECORDING[: len(TELEGRAMS[0])], writer.write)
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    device = DsmrP1MeterDevice(hass, {CONF_P1_PORT: f"socket://127.0.0.1:{port}"})
+    await device.async_connect()
+    await asyncio.sleep(0.1)
+
+    assert device.telegrams == 1
+    assert device.meter_data["import_energy_active"] == pytest.approx(9444.468)
+
+    await device.async_disconnect()
+    server.close()
+    await server.wait_closed()
+
+
+async def test_connect_failure(hass: HomeAssistant):
+    """Test a port that cannot be opened fails the connect."""
+    device = DsmrP1MeterDevice(hass, {CONF_P1_PORT: "socket://127.0.0.1:1"})
+    with pytest.raises(ConnectionError):
+        await device.async_connect()
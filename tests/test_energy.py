@@ -0,0 +1,83 @@
+"""Test the energy accumulator."""
+import pytest
+
+from custom_components.solaredge_meterproxy.energy import (
+    EnergyAccumulator,
+    split_trapezoid,
+)
+
+
+def test_split_trapezoid():
+    """Test a ramp is split at its zero crossing."""
+    assert split_trapezoid(1000, 2000, 10) == (15000, 0)
+    assert split_trapezoid(-1000, -3000, 10) == (0, 20000)
+    # 100 W down to -100 W: half a second on each side
+    assert split_trapezoid(100, -100, 2) == (50, 50)
+    assert split_trapezoid(-100, 300, 4) == (450, 50)
+
+
+def test_import_export_and_net():
+    """Test power is integrated into import, export and net counters."""
+    energy = EnergyAccumulator()
+    energy.update({"power_active": 3600.0, "l1_power_active": 3600.0}, 0.0)
+    counters = energy.update({"power_active": 3600.0, "l1_power_active": 3600.0}, 1.0)
+    assert counters["import_energy_active"] == pytest.approx(0.001)
+    assert counters["l1_import_energy_active"] == pytest.approx(0.001)
+
+    counters = energy.update({"power_active": -3600.0}, 3.0)
+    assert counters["import_energy_active"] == pytest.approx(0.0015)
+    assert counters["export_energy_active"] == pytest.approx(0.0005)
+    assert counters["energy_active"] == pytest.approx(0.001)
+    # The missing phase sample is not integrated
+    assert counters["l1_import_energy_active"] == pytest.approx(0.001)
+
+
+def test_gap_is_skipped():
+    """Test no energy is invented across an outage."""
+    energy = EnergyAccumulator(max_gap=60)
+    energy.update({"power_active": 1000.0}, 0.0)
+    counters = energy.update({"power_active": 1000.0}, 3600.0)
+    assert counters["import_energy_active"] == 0.0
+
+    counters = energy.update({"power_active": 1000.0}, 3636.0)
+    assert counters["import_energy_active"] == pytest.approx(0.01)
+
+
+def test_meter_readings_seed_counters():
+    """Test meter readings take over and the counter never decreases."""
+    energy = EnergyAccumulator()
+    sample = {"power_active": 3600.0, "import_energy_active": 100.0}
+    assert energy.update(sample, 0.0)["import_energy_active"] == 100.0
+
+    # Integrated energy fills in until the next reading
+    counters = energy.update({**sample}, 10.0)
+    assert counters["import_energy_active"] == pytest.approx(100.01)
+
+    # A reading below the served counter doesn't make it go backwards
+    counters = energy.update({**sample, "import_energy_active": 100.005}, 20.0)
+    assert counters["import_energy_active"] == pytest.approx(100.015)
+
+    counters = energy.update({**sample, "import_energy_active": 101.0}, 30.0)
+    assert counters["import_energy_active"] == pytest.approx(101.01)
+
+
+def test_reported_totals_are_served():
+    """Test totals reported by the meter itself win over integrated ones."""
+    energy = EnergyAccumulator()
+    counters = energy.update({"energy_reactive": 12.5, "energy_active": 40.0}, 0.0)
+    assert counters["energy_reactive"] == 12.5
+    assert counters["energy_active"] == 40.0
+
+
+def test_restore():
+    """Test the counters continue from a persisted state."""
+    energy = EnergyAccumulator()
+    energy.update({"power_active": 3600.0, "import_energy_active": 50.0}, 0.0)
+    energy.update({"power_active": 3600.0, "import_energy_active": 50.0}, 10.0)
+
+    restored = EnergyAccumulator()
+    restored.restore(energy.as_dict())
+    counters = restored.update({"power_active": 0.0, "import_energy_active": 50.0}, 0.0)
+    assert counters["import_energy_active"] == pytest.approx(50.01)
+    counters = restored.update({"power_active": 3600.0}, 10.0)
+    assert counters["import_energy_active"] == pytest.approx(50.015)
@@ -0,0 +1,91 @@
+"""Test the output filters."""
+import pytest
+
+from custom_components.solaredge_meterproxy.filters import (
+    EmaFilter,
+    MedianFilter,
+    OutputFilter,
+    parse_filters,
+)
+
+
+def test_parse_filters():
+    """Test filter options are parsed per quantity."""
+    assert parse_filters(None) == {}
+    assert parse_filters(
+        "power_active=median:3+ema:2+extrapolate:1.5, l1_power_active=ema:0.5"
+    ) == {
+        "power_active": {"median": 3, "ema": 2.0, "extrapolate": 1.5},
+        "l1_power_active": {"ema": 0.5},
+    }
+    for option in (
+        "power_active",
+        "power_active=median:10",
+        "power_active=median:2.5",
+        "power_active=ema:0",
+        "power_active=extrapolate:60",
+        "power_active=lowpass:1",
+    ):
+        with pytest.raises(ValueError):
+            parse_filters(option)
+
+
+def test_median_rejects_spikes():
+    """Test a single outlier doesn't pass the median."""
+    median = MedianFilter(3)
+    assert [median.update(value, 0) for value in (100, 5000, 110, 120)] == [
+        100,
+        2550,
+        110,
+        120,
+    ]
+
+
+def test_ema_follows_time():
+    """Test the EMA weight depends on the time between samples."""
+    ema = EmaFilter(1.0)
+    assert ema.update(0.0, 0.0) == 0.0
+    assert ema.update(1000.0, 1.0) == pytest.approx(632.1, abs=0.1)
+    assert ema.update(1000.0, 11.0) == pytest.approx(1000.0, abs=0.1)
+
+
+def test_extrapolation():
+    """Test values follow their trend between samples, for a short time."""
+    output = OutputFilter(parse_filters("power_active=extrapolate:2"))
+    output.apply({"power_active": 1000.0, "frequency": 50.0}, 0.0)
+    sample = {"power_active": 800.0, "frequency": 50.0}
+    assert output.apply(sample, 1.0) == {"power_active": 800.0, "frequency": 50.0}
+    # Serving the same snapshot later moves along the slope of -200 W/s
+    assert output.apply(sample, 2.0)["power_active"] == pytest.approx(600.0)
+    assert output.apply(sample, 10.0)["power_active"] == pytest.approx(400.0)
+    assert output.extrapolates
+
+
+def test_repeated_values_are_not_samples():
+    """Test snapshots repeating a value don't fill the filters."""
+    output = OutputFilter(parse_filters("power_active=median:3"))
+    served = [
+        output.apply({"power_active": power, "l1_power_active": l1}, 0.0)
+        for power, l1 in ((100, 0), (5000, 0), (5000, 10), (5000, 20), (110, 20))
+    ]
+    assert [values["power_active"] for values in served] == [
+        100,
+        2550,
+        2550,
+        2550,
+        110,
+    ]
+
+    # A new reading of a polled meter is a sample, also with the same value
+    output = OutputFilter(parse_filters("power_active=median:3"))
+    for power, reading in ((100, 0.0), (5000, 1.0), (5000, 2.0), (5000, 2.0)):
+        served = output.apply({"power_active": power}, reading, reading)
+    assert served["power_active"] == 5000
+
+    output = OutputFilter(parse_filters("power_active=extrapolate:5"))
+    output.apply({"power_active": 1000.0}, 0.0)
+    output.apply({"power_active": 800.0}, 1.0)
+    # A new snapshot with the same value keeps the slope of -200 W/s
+    assert output.apply({"power_active": 800.0}, 1.5)["power_active"] == (
+        pytest.approx(700.0)
+    )
@@ -0,0 +1,244 @@
+"""Test the InfluxDB meter device against a local InfluxDB stand-in."""
+import asyncio
+from datetime import UTC, datetime
+import math
+import time
+
+import aiohttp
+from aiohttp import web
+import pytest
+from homeassistant.core import HomeAssistant
+
+from custom_components.solaredge_meterproxy.const import (
+    CONF_INFLUXDB_CACHE_TTL,
+    CONF_INFLUXDB_FIELDS,
+    CONF_INFLUXDB_ORG,
+    CONF_INFLUXDB_TOKEN,
+    CONF_INFLUXDB_URL,
+)
+from custom_components.solaredge_meterproxy.influxdb import (
+    flux_query,
+    influxql_query,
+    parse_field_map,
+    parse_flux_csv,
+    parse_flux_times,
+    parse_influxql_response,
+    parse_influxql_times,
+)
+from custom_components.solaredge_meterproxy.meter_devices import InfluxDbMeterDevice
+
+# Last values of the "meter" measurement
+POINTS = {
+    "P": -1532.0,
+    "P1": -2262.0,
+    "P2": 412.0,
+    "P3": 318.0,
+    "import": 9444.468,
+    "export": 3580.245,
+}
+FIELDS = (
+    "power_active=P,l1_power_active=P1,l2_power_active=P2,l3_power_active=P3,"
+    "import_energy_active=import,export_energy_active=export"
+)
+# Seconds since the points were written
+POINT_AGE = 42
+
+
+@pytest.fixture
+async def influxdb():
+    """Run a local stand-in answering InfluxQL and Flux queries."""
+    queries = []
+
+    async def influxql(request: web.Request) -> web.Response:
+        query = request.query["q"]
+        queries.append(query)
+        assert request.query["epoch"] == "s"
+        results = []
+        for statement_id, statement in enumerate(query.split("; ")):
+            fields = [field for field in POINTS if f'last("{field}")' in statement]
+            # Several selectors return the start of the time range
+            point_time = time.time() - (POINT_AGE if len(fields) == 1 else 900)
+            series = {
+                "name": "meter",
+                "columns": ["time", *fields],
+                "values": [[int(point_time), *(POINTS[field] for field in fields)]],
+            }
+            results.append({"statement_id": statement_id, "series": [series]})
+        return web.json_response({"results": results})
+
+    async def flux(request: web.Request) -> web.Response:
+        if request.headers.get("Authorization") != "Token secret":
+            return web.Response(status=401)
+        query = await request.text()
+        queries.append(query)
+        point_time = datetime.fromtimestamp(time.time() - POINT_AGE, UTC)
+        tables = [
+            ",result,table,_field,_value,_time\r\n"
+            f",_result,{table},{field},{POINTS[field]},{point_time.isoformat()}\r\n"
+            for table, field in enumerate(POINTS)
+            if f'r._field == "{field}"' in query
+        ]
+        return web.Response(text="\r\n".join(tables), content_type="text/csv")
+
+    app = web.Application()
+    app.router.add_get("/query", influxql)
+    app.router.add_post("/api/v2/query", flux)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    yield f"http://127.0.0.1:{port}", queries
+    await runner.cleanup()
+
+
+def test_field_map():
+    """Test field mappings default to the served value names."""
+    assert parse_field_map(None)["power_active"] == "power_active"
+    assert parse_field_map("power_active=P, frequency") == {
+        "power_active": "P",
+        "frequency": "frequency",
+    }
+    with pytest.raises(ValueError):
+        parse_field_map("=P")
+
+
+def test_queries():
+    """Test every field is fetched by one query."""
+    assert influxql_query("meter", ["P", "U 1"]) == (
+        'SELECT last("P") AS "P", last("U 1") AS "U 1" FROM "meter" '
+        "WHERE time > now() - 15m"
+    )
+    assert influxql_query("meter", ["P", "U1"], ["P"]) == (
+        'SELECT last("P") AS "P", last("U1") AS "U1" FROM "meter" '
+        "WHERE time > now() - 15m; "
+        'SELECT last("P") AS "P" FROM "meter" WHERE time > now() - 15m'
+    )
+    # A single selector returns the time of its point already
+    assert influxql_query("meter", ["P"], ["P"]).count("SELECT") == 1
+    query = flux_query("grid", "meter", ["P", "U1"])
+    assert 'r._field == "P" or r._field == "U1"' in query
+    assert query.count("from(") == 1
+
+
+def test_parse_responses():
+    """Test InfluxQL JSON and Flux CSV responses."""
+    series = {"columns": ["time", "P", "U1"], "values": [[0, 5, None]]}
+    assert parse_influxql_response({"results": [{"series": [series]}]}) == {"P": 5.0}
+    with pytest.raises(ValueError):
+        parse_influxql_response({"results": [{"error": "database not found"}]})
+
+    csv = (
+        "#datatype,string,long,string,double\r\n"
+        ",result,table,_field,_value\r\n"
+        ",_result,0,P,-12.5\r\n"
+        "\r\n"
+        ",result,table,_field,_value\r\n"
+        ",_result,1,U1,231\r\n"
+    )
+    assert parse_flux_csv(csv) == {"P": -12.5, "U1": 231.0}
+
+
+def test_parse_point_times():
+    """Test point times are read from single selectors and Flux rows."""
+    data = {
+        "results": [
+            {"series": [{"columns": ["time", "P", "U1"], "values": [[0, 5, 230]]}]},
+            {"series": [{"columns": ["time", "P"], "values": [[1700000000, 5]]}]},
+        ]
+    }
+    assert parse_influxql_times(data) == {"P": 1700000000.0}
+
+    csv = (
+        ",result,table,_field,_value,_time\r\n"
+        ",_result,0,P,-12.5,2023-11-14T22:13:20.123456789Z\r\n"
+    )
+    assert parse_flux_times(csv) == {"P": pytest.approx(1700000000.123456)}
+
+
+async def test_influxql_cached(hass: HomeAssistant, influxdb):
+    """Test one query per poll and no queries within the cache TTL."""
+    url, queries = influxdb
+    device = InfluxDbMeterDevice(
+        hass, {CONF_INFLUXDB_URL: url, CONF_INFLUXDB_FIELDS: FIELDS}
+    )
+    await device.async_connect()
+    values = await device.async_read_values()
+
+    assert len(queries) == 1
+    assert values["power_active"] == -1532.0
+    assert values["l2_power_active"] == 412.0
+    assert values["energy_active"] == pytest.approx(9444.468 - 3580.245)
+    assert values["l1n_voltage"] == 230.0
+    # The age of the points, not of the query
+    assert device.data_age() == pytest.approx(POINT_AGE, abs=2)
+
+    # Concurrent reads after expiry share one query
+    device._fetched -= 10
+    await asyncio.gather(*(device.async_read_values() for _ in range(5)))
+    assert len(queries) == 2
+    await device.async_disconnect()
+
+
+async def test_flux(hass: HomeAssistant, influxdb):
+    """Test InfluxDB 2.x is queried with Flux when a token is set."""
+    url, queries = influxdb
+    device = InfluxDbMeterDevice(
+        hass,
+        {
+            CONF_INFLUXDB_URL: url,
+            CONF_INFLUXDB_TOKEN: "secret",
+            CONF_INFLUXDB_ORG: "home",
+            CONF_INFLUXDB_FIELDS: "l1_power_active=P1,l2_power_active=P2,"
+            "l3_power_active=P3",
+            CONF_INFLUXDB_CACHE_TTL: 0,
+        },
+    )
+    await device.async_connect()
+    values = await device.async_read_values()
+
+    assert len(queries) == 2
+    assert values["power_active"] == pytest.approx(-1532.0)
+    assert values["l3_power_active"] == 318.0
+    assert device.data_age() == pytest.approx(POINT_AGE, abs=1)
+
+
+async def test_query_failure(hass: HomeAssistant, influxdb):
+    """Test a failed connect, and the last values served on failed polls."""
+    url, queries = influxdb
+    device = InfluxDbMeterDevice(
+        hass, {CONF_INFLUXDB_URL: url, CONF_INFLUXDB_TOKEN: "wrong"}
+    )
+    with pytest.raises(ConnectionError):
+        await device.async_connect()
+
+    device = InfluxDbMeterDevice(
+        hass,
+        {
+            CONF_INFLUXDB_URL: url,
+            CONF_INFLUXDB_FIELDS: FIELDS,
+            CONF_INFLUXDB_CACHE_TTL: 0,
+        },
+    )
+    await device.async_connect()
+    device._url = f"{url}/missing"
+    values = await device.async_read_values()
+    assert values["power_active"] == -1532.0
+
+    # Without cached values a failed poll fails, instead of serving made-up
+    # values
+    await device.async_disconnect()
+    with pytest.raises(aiohttp.ClientResponseError):
+        await device.async_read_values()
+
+
+async def test_no_power_points(hass: HomeAssistant, influxdb):
+    """Test a result without power values fails instead of serving zeros."""
+    url, queries = influxdb
+    device = InfluxDbMeterDevice(
+        hass,
+        {CONF_INFLUXDB_URL: url, CONF_INFLUXDB_FIELDS: "power_active=gone,frequency=P"},
+    )
+    with pytest.raises(ConnectionError):
+        await device.async_connect()
+    assert device.data_age() == math.inf
@@ -0,0 +1,103 @@
+"""Test the table-driven Modbus meter devices against a local simulator."""
+import math
+import struct
+
+import pytest
+from homeassistant.core import HomeAssistant
+
+from custom_components.solaredge_meterproxy.meter_devices import (
+    SDM120MeterDevice,
+    SDM230MeterDevice,
+    SDM630MeterDevice,
+)
+from custom_components.solaredge_meterproxy.read_planner import MeterRegister
+
+datastore = pytest.importorskip("pymodbus.datastore")
+server = pytest.importorskip("pymodbus.server")
+
+PORT = 15622
+
+
+@pytest.fixture
+async def simulator():
+    """Run a simulated meter whose float at register n holds the value n."""
+    registers = [0] * 400
+    for address in range(0, 400, 2):
+        registers[address : address + 2] = struct.unpack(
+            ">2H", struct.pack(">f", address)
+        )
+    slave = datastore.ModbusSlaveContext(
+        ir=datastore.ModbusSequentialDataBlock(0, registers), zero_mode=True
+    )
+    requests = []
+    modbus_server = server.ModbusTcpServer(
+        datastore.ModbusServerContext(slaves={1: slave}, single=False),
+        address=("127.0.0.1", PORT),
+        request_tracer=lambda request, *addr: requests.append(
+            (request.address, request.count)
+        ),
+    )
+    assert await modbus_server.listen()
+    yield requests
+    await modbus_server.shutdown()
+
+
+@pytest.mark.parametrize(
+    ("device_class", "reads"),
+    [
+        (SDM120MeterDevice, [(0, 74)]),
+        (SDM230MeterDevice, [(0, 88), (342, 4)]),
+        (SDM630MeterDevice, [(0, 88), (200, 8), (342, 22)]),
+    ],
+)
+async def test_bulk_reads(hass: HomeAssistant, simulator, device_class, reads):
+    """Test every register of a meter is served from a few bulk reads."""
+    device = device_class(
+        hass, {"meter_host": "127.0.0.1", "meter_port": PORT, "meter_address": 1}
+    )
+    await device.async_connect()
+    values = await device.async_read_values()
+    await device.async_disconnect()
+
+    assert sorted(simulator) == reads
+    for register in device.registers:
+        assert values[register.name] == register.address
+
+
+async def test_sdm630_phases(hass: HomeAssistant, simulator):
+    """Test all three phases of an SDM630 are decoded."""
+    device = SDM630MeterDevice(
+        hass, {"meter_host": "127.0.0.1", "meter_port": PORT, "meter_address": 1}
+    )
+    values = await device.async_read_values()
+    await device.async_disconnect()
+
+    assert [values[f"l{phase}n_voltage"] for phase in (1, 2, 3)] == [0, 2, 4]
+    assert [values[f"l{phase}_power_active"] for phase in (1, 2, 3)] == [12, 14, 16]
+    assert [values[f"l{phase}_energy_active"] for phase in (1, 2, 3)] == [358, 360, 362]
+
+
+
+async def test_default_unit_address(hass: HomeAssistant, simulator):
+    """Test the meter unit address defaults to 1."""
+    device = SDM630MeterDevice(hass, {"meter_host": "127.0.0.1", "meter_port": PORT})
+    values = await device.async_read_values()
+    await device.async_disconnect()
+    assert values["l2n_voltage"] == 2
+
+
+class UnmappedMeterDevice(SDM630MeterDevice):
+    """Meter asking for a register the simulator doesn't have."""
+
+    registers = (MeterRegister("power_active", 1000),)
+
+
+async def test_failed_read_raises(hass: HomeAssistant, simulator):
+    """Test a failed read raises instead of serving made-up values."""
+    device = UnmappedMeterDevice(
+        hass, {"meter_host": "127.0.0.1", "meter_port": PORT, "meter_address": 1}
+    )
+    with pytest.raises(ValueError):
+        await device.async_read_values()
+    await device.async_disconnect()
+    assert device.data_age() == math.inf
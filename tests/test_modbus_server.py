@@ -0,0 +1,180 @@
+"""Test the Modbus proxy server serving the coordinator snapshots."""
+import asyncio
+import struct
+
+import pytest
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.solaredge_meterproxy.const import (
+    CONF_COALESCE_WINDOW,
+    CONF_MAX_AGE,
+    CONF_METER_MODBUS_ADDRESS,
+    CONF_METER_TYPE,
+    CONF_OUTPUT_FILTERS,
+    CONF_P1_POWER_ENTITY,
+    CONF_P1_POWER_L1_ENTITY,
+    CONF_UPDATE_MODE,
+    DATA_SERVERS,
+    DOMAIN,
+    UPDATE_MODE_ON_DEMAND,
+)
+from tests.conftest import TEST_CONFIG
+
+pymodbus_client = pytest.importorskip("pymodbus.client")
+
+
+def _float(context, address: int) -> float:
+    """Return the float32 served at a register address."""
+    registers = context.getValues(3, address, 2)
+    return struct.unpack("<f", struct.pack("<2H", *registers))[0]
+
+
+async def _async_read_power(port: int, unit_id: int) -> float:
+    """Read the total power of a unit id over Modbus TCP."""
+    client = pymodbus_client.AsyncModbusTcpClient(
+        "127.0.0.1", port=port, timeout=1, retries=0
+    )
+    await client.connect()
+    response = await client.read_holding_registers(1008, 2, slave=unit_id)
+    client.close()
+    return struct.unpack("<f", struct.pack("<2H", *response.registers))[0]
+
+
+async def _async_setup_p1(hass: HomeAssistant, port: int, **options):
+    """Set up a P1 entry served on a local port, return its proxy server."""
+    hass.states.async_set("sensor.p1_power", "1500")
+    hass.states.async_set("sensor.p1_power_l1", "1500")
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            **TEST_CONFIG,
+            "server_port": port,
+            CONF_METER_TYPE: "p1",
+            CONF_P1_POWER_ENTITY: "sensor.p1_power",
+            CONF_P1_POWER_L1_ENTITY: "sensor.p1_power_l1",
+            **options,
+        },
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    return entry, hass.data[DOMAIN][entry.entry_id]["modbus_server"]
+
+
+async def test_push_coalesced(hass: HomeAssistant):
+    """Test a burst of P1 changes is published once, after the window."""
+    entry, server = await _async_setup_p1(hass, 15628, **{CONF_COALESCE_WINDOW: 50})
+    context = server._slave_context
+    updates = server.metrics.update_count
+    assert _float(context, 1008) == 1500.0
+
+    for power in ("-100", "-200", "-300"):
+        hass.states.async_set("sensor.p1_power", power)
+    await hass.async_block_till_done()
+    assert _float(context, 1008) == 1500.0
+
+    await asyncio.sleep(0.1)
+    assert _float(context, 1008) == -300.0
+    assert server.metrics.update_count == updates + 1
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_patch_clears_removed_values(hass: HomeAssistant):
+    """Test a value that left the snapshot is no longer served."""
+    entry, server = await _async_setup_p1(hass, 15628)
+    context = server._slave_context
+    values = dict(server._values)
+
+    server._patch_meter_values({**values, "l2_power_active": 250.0})
+    assert _float(context, 1012) == 250.0
+
+    del values["l1_power_active"]
+    server._patch_meter_values(values)
+    assert _float(context, 1010) == 0.0
+    assert _float(context, 1012) == 0.0
+    assert _float(context, 1008) == 1500.0
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_filters_sample_changed_values(hass: HomeAssistant):
+    """Test P1 snapshots of other entities don't fill the median window."""
+    entry, server = await _async_setup_p1(
+        hass, 15635, **{CONF_OUTPUT_FILTERS: "power_active=median:3"}
+    )
+    context = server._slave_context
+
+    # A one-telegram spike, followed by the phase entity of the same telegram
+    hass.states.async_set("sensor.p1_power", "5000")
+    for power in ("1400", "1300", "1200"):
+        hass.states.async_set("sensor.p1_power_l1", power)
+    await hass.async_block_till_done()
+    assert _float(context, 1008) == 3250.0
+
+    hass.states.async_set("sensor.p1_power", "1600")
+    await hass.async_block_till_done()
+    assert _float(context, 1008) == 1600.0
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_on_demand_refresh(hass: HomeAssistant):
+    """Test reads refresh the registers once they are older than max age."""
+    entry, server = await _async_setup_p1(
+        hass, 15632, **{CONF_UPDATE_MODE: UPDATE_MODE_ON_DEMAND, CONF_MAX_AGE: 0.5}
+    )
+    updates = server.metrics.update_count
+    hass.states.async_set("sensor.p1_power", "-300")
+    await hass.async_block_till_done()
+
+    # Within max age the served image is kept
+    assert await _async_read_power(15632, 2) == 1500.0
+    assert server.metrics.update_count == updates
+
+    # After max age the first read refreshes, concurrent reads share it
+    await asyncio.sleep(0.5)
+    powers = await asyncio.gather(*(_async_read_power(15632, 2) for _ in range(5)))
+    assert powers == [-300.0] * 5
+    assert server.metrics.update_count == updates + 1
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_entries_share_listener(hass: HomeAssistant):
+    """Test two entries on one port answer from their own registers."""
+    entries = []
+    for unit_id, power in ((2, "1500"), (3, "-800")):
+        hass.states.async_set(f"sensor.p1_power_{unit_id}", power)
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            data={
+                **TEST_CONFIG,
+                "server_port": 15629,
+                CONF_METER_MODBUS_ADDRESS: unit_id,
+                CONF_METER_TYPE: "p1",
+                CONF_P1_POWER_ENTITY: f"sensor.p1_power_{unit_id}",
+            },
+        )
+        entry.add_to_hass(hass)
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        entries.append(entry)
+    await hass.async_block_till_done()
+
+    servers = [
+        hass.data[DOMAIN][entry.entry_id]["modbus_server"]._server
+        for entry in entries
+    ]
+    assert servers[0] is servers[1]
+    assert sorted(servers[0].unit_ids) == [2, 3]
+    assert await _async_read_power(15629, 2) == 1500.0
+    assert await _async_read_power(15629, 3) == -800.0
+
+    # The listener stays up for the entry that is still loaded
+    assert await hass.config_entries.async_unload(entries[0].entry_id)
+    assert servers[0].unit_ids == [3]
+    assert await _async_read_power(15629, 3) == -800.0
+
+    assert await hass.config_entries.async_unload(entries[1].entry_id)
+    assert not hass.data[DATA_SERVERS]
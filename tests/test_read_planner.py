@@ -0,0 +1,71 @@
+"""Test the upstream meter read planner."""
+import struct
+
+import pytest
+
+from custom_components.solaredge_meterproxy.meter_registers import SDM120_REGISTERS
+from custom_components.solaredge_meterproxy.read_planner import (
+    MeterRegister,
+    ReadPlan,
+    ReadRange,
+    plan_reads,
+)
+
+
+def _float_registers(value: float) -> list[int]:
+    """Encode a float as two big-endian registers, high word first."""
+    return list(struct.unpack(">2H", struct.pack(">f", value)))
+
+
+def test_sdm120_single_read():
+    """Test the SDM120 poll is coalesced into one read."""
+    assert plan_reads(SDM120_REGISTERS) == [ReadRange(0, 74)]
+
+
+def test_max_count_splits_reads():
+    """Test reads never exceed the register limit."""
+    registers = [MeterRegister(f"value_{address}", address) for address in (0, 100, 200)]
+    assert plan_reads(registers) == [ReadRange(0, 102), ReadRange(200, 2)]
+    assert plan_reads(registers, max_count=2) == [
+        ReadRange(0, 2),
+        ReadRange(100, 2),
+        ReadRange(200, 2),
+    ]
+    with pytest.raises(ValueError):
+        plan_reads([MeterRegister("wide", 0, "int32")], max_count=1)
+
+
+def test_gaps_split_reads():
+    """Test reads do not cross registers the meter rejects."""
+    assert plan_reads(SDM120_REGISTERS, gaps=[(40, 70)]) == [
+        ReadRange(0, 14),
+        ReadRange(70, 4),
+    ]
+
+
+def test_decode():
+    """Test all values of a plan are decoded in one pass."""
+    plan = ReadPlan(
+        [
+            MeterRegister("voltage", 0),
+            MeterRegister("current", 6),
+            MeterRegister("counter", 8, "uint16"),
+            MeterRegister("scaled", 9, "int16", 0.1),
+            MeterRegister("far", 200),
+        ]
+    )
+    assert len(plan) == 2
+
+    first = [0] * plan.reads[0].count
+    first[0:2] = _float_registers(230.5)
+    first[6:8] = _float_registers(1.25)
+    first[8] = 7
+    first[9] = 0xFFF6  # -10
+    values = plan.decode([first, None])
+
+    assert values == {
+        "voltage": 230.5,
+        "current": 1.25,
+        "counter": 7,
+        "scaled": pytest.approx(-1.0),
+    }
@@ -0,0 +1,83 @@
+"""Test the Modbus RTU listener against a local pseudo-terminal pair."""
+import asyncio
+import os
+import time
+import tty
+
+import pytest
+from homeassistant.core import HomeAssistant
+
+from custom_components.solaredge_meterproxy.datastore import WattNodeSlaveContext
+from custom_components.solaredge_meterproxy.modbus_server import (
+    SharedModbusServer,
+    listener_key,
+    rtu_frame_gap,
+)
+
+pytest.importorskip("serial")
+
+# Read holding registers 1000-1002 from unit 2, with CRC
+READ_REQUEST = bytes.fromhex("020303e800038588")
+READ_RESPONSE = bytes.fromhex("020306000100020003e984")
+
+
+def test_rtu_frame_gap():
+    """Test the inter-frame silence follows the serial line specification."""
+    assert rtu_frame_gap(9600) == pytest.approx(0.00401, abs=1e-5)
+    assert rtu_frame_gap(19200) == pytest.approx(0.00201, abs=1e-5)
+    assert rtu_frame_gap(38400) == 0.00175
+    assert rtu_frame_gap(115200) == 0.00175
+
+
+def test_listener_key():
+    """Test serial and TCP entries are keyed by their own listener."""
+    assert listener_key({"protocol": "rtu", "serial_port": "/dev/ttyUSB0"}) == (
+        "rtu",
+        "/dev/ttyUSB0",
+    )
+    assert listener_key(
+        {"protocol": "rtu_over_tcp", "server_ip": "127.0.0.1", "server_port": 5502}
+    ) == ("127.0.0.1", 5502)
+    # Legacy rtu entries without a serial port keep serving RTU over TCP
+    assert listener_key(
+        {"protocol": "rtu", "server_ip": "127.0.0.1", "server_port": 5502}
+    ) == ("127.0.0.1", 5502)
+
+
+@pytest.mark.parametrize("baudrate", [9600, 19200, 57600, 115200])
+async def test_rtu_serial_read(hass: HomeAssistant, baudrate: int):
+    """Test a read over a pty is answered after the t3.5 silence."""
+    master, slave = os.openpty()
+    tty.setraw(master)
+    tty.setraw(slave)
+    server = SharedModbusServer(
+        hass,
+        {"protocol": "rtu", "serial_port": os.ttyname(slave), "baudrate": baudrate},
+    )
+    context = WattNodeSlaveContext()
+    context.setValues(3, 1000, [1, 2, 3])
+    await server.async_start()
+    server.attach(2, context)
+
+    loop = asyncio.get_running_loop()
+    received = bytearray()
+    done = loop.create_future()
+
+    def _read() -> None:
+        received.extend(os.read(master, 256))
+        if len(received) >= len(READ_RESPONSE) and not done.done():
+            done.set_result(time.perf_counter())
+
+    loop.add_reader(master, _read)
+    try:
+        started = time.perf_counter()
+        os.write(master, READ_REQUEST)
+        answered = await asyncio.wait_for(done, 3)
+    finally:
+        loop.remove_reader(master)
+        await server.async_stop()
+        os.close(master)
+        os.close(slave)
+
+    assert bytes(received) == READ_RESPONSE
+    assert answered - started >= rtu_frame_gap(baudrate)
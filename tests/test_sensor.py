@@ -0,0 +1,57 @@
+"""Test the SolarEdge MeterProxy sensors."""
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.solaredge_meterproxy.const import (
+    CONF_METER_TYPE,
+    CONF_P1_POWER_ENTITY,
+    CONF_SENSOR_DEADBAND,
+    DOMAIN,
+)
+from custom_components.solaredge_meterproxy.sensor import exceeds_deadband
+from tests.conftest import TEST_CONFIG
+
+POWER_SENSOR = "sensor.solaredge_meterproxy_total_active_power"
+
+
+def test_exceeds_deadband():
+    """Test the relative deadband and the absolute resolution."""
+    assert exceeds_deadband(None, 0.0, 0.005, 1.0)
+    assert not exceeds_deadband(1000.0, 1004.0, 0.005, 1.0)
+    assert exceeds_deadband(1000.0, 1005.0, 0.005, 1.0)
+    assert exceeds_deadband(1000.0, 995.0, 0.005, 1.0)
+    # Around zero the resolution applies
+    assert not exceeds_deadband(0.0, 0.5, 0.005, 1.0)
+    assert exceeds_deadband(0.0, -1.0, 0.005, 1.0)
+    assert not exceeds_deadband(230.0, 230.0, 0.0, 0.0)
+
+
+async def test_sensor_deadband(hass: HomeAssistant):
+    """Test sensor states are only written for changes beyond the deadband."""
+    hass.states.async_set("sensor.p1_power", "1000")
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            **TEST_CONFIG,
+            "server_port": 15624,
+            CONF_METER_TYPE: "p1",
+            CONF_P1_POWER_ENTITY: "sensor.p1_power",
+            CONF_SENSOR_DEADBAND: 1,
+        },
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    assert float(hass.states.get(POWER_SENSOR).state) == 1000.0
+    written = hass.states.get(POWER_SENSOR).last_updated
+
+    hass.states.async_set("sensor.p1_power", "1008")
+    await hass.async_block_till_done()
+    assert hass.states.get(POWER_SENSOR).last_updated == written
+    assert float(hass.states.get(POWER_SENSOR).state) == 1000.0
+
+    hass.states.async_set("sensor.p1_power", "1012")
+    await hass.async_block_till_done()
+    assert float(hass.states.get(POWER_SENSOR).state) == 1012.0
+
+    assert await hass.config_entries.async_unload(entry.entry_id)